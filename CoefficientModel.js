@@ -0,0 +1,73 @@
+const fs = require('fs');
+
+// Evaluates a job's coefficient_model.json (written by scripts/coeff_model.py at
+// postprocess time): AoA breakpoints plus c0..c3 per interval and coefficient,
+// so predictions are a binary search and a cubic with no Python round trip.
+class CoefficientModel {
+    constructor(data) {
+        if (data.version !== 1) {
+            throw new Error(`Unsupported coefficient model version: ${data.version}`);
+        }
+        this.breakpoints = Float64Array.from(data.breakpoints);
+        this.names = Object.keys(data.coefficients);
+        // name -> flat [c0, c1, c2, c3, c0, ...] per interval
+        this.coefficients = {};
+        for (const name of this.names) {
+            this.coefficients[name] = Float64Array.from(data.coefficients[name].flat());
+        }
+    }
+
+    static load(file_path) {
+        const mtime = fs.statSync(file_path).mtimeMs;
+        const cached = CoefficientModel.cache.get(file_path);
+        if (cached && cached.mtime === mtime) {
+            return cached.model;
+        }
+        const model = new CoefficientModel(JSON.parse(fs.readFileSync(file_path, 'utf8')));
+        CoefficientModel.cache.set(file_path, { mtime, model });
+        return model;
+    }
+
+    // Index of the interval containing aoa; the end intervals are extended outwards
+    interval(aoa) {
+        let lo = 0;
+        let hi = this.breakpoints.length - 2;
+        while (lo < hi) {
+            const mid = (lo + hi + 1) >> 1;
+            if (this.breakpoints[mid] <= aoa) {
+                lo = mid;
+            } else {
+                hi = mid - 1;
+            }
+        }
+        return lo;
+    }
+
+    // Values at one AoA ({ Cl, Cd, CmPitch }) or at an array of AoAs ({ Cl: [...], ... })
+    evaluate(aoa) {
+        if (Array.isArray(aoa)) {
+            const result = Object.fromEntries(this.names.map((name) => [name, []]));
+            for (const value of aoa) {
+                const point = this.evaluate(value);
+                for (const name of this.names) {
+                    result[name].push(point[name]);
+                }
+            }
+            return result;
+        }
+
+        const i = this.interval(aoa);
+        const dx = aoa - this.breakpoints[i];
+        const result = {};
+        for (const name of this.names) {
+            const c = this.coefficients[name];
+            const k = 4 * i;
+            result[name] = ((c[k + 3] * dx + c[k + 2]) * dx + c[k + 1]) * dx + c[k];
+        }
+        return result;
+    }
+}
+
+CoefficientModel.cache = new Map(); // file path -> { mtime, model }
+
+module.exports = CoefficientModel;
@@ -0,0 +1,153 @@
+// Watches simpleFoam output and decides when a run has converged: either every
+// tracked initial residual is below residual_tolerance, or Cl and Cd have stayed
+// within coefficient_tolerance (relative spread) over the last `window` iterations.
+// Residuals of bluff bodies like discs often stall above the tolerance while the
+// force coefficients have long settled, so either criterion stops the run.
+// Every check that changes the verdict, and a status every `window` iterations,
+// is kept in `decisions` with its reason.
+class ConvergenceMonitor {
+    constructor(options={}) {
+        this.residual_tolerance = options.residual_tolerance ?? 1e-4;
+        this.coefficient_tolerance = options.coefficient_tolerance ?? 1e-3;
+        this.window = options.window || 100;
+        this.min_iterations = options.min_iterations || 200;
+        this.coefficients = options.coefficients || ['Cl', 'Cd'];
+        this.reset();
+    }
+
+    reset() {
+        this.iteration = null;
+        this.buffer = '';
+        this.residuals = {};         // field -> largest initial residual of the current iteration
+        this.last_residuals = {};    // same for the last completed iteration
+        this.history = Object.fromEntries(this.coefficients.map((name) => [name, []]));
+        this.decisions = [];
+        this.stop = null;
+    }
+
+    // Feed a chunk of solver output; returns a stop decision the first time the run converges
+    update(data) {
+        const lines = (this.buffer + data).split('\n');
+        this.buffer = lines.pop();
+        let decision = null;
+        for (const line of lines) {
+            decision = this.parse_line(line) || decision;
+        }
+        return decision;
+    }
+
+    parse_line(line) {
+        const time_match = line.match(/^Time = ([0-9.eE+-]+)/);
+        if (time_match) {
+            // A new iteration starts: judge the one that just finished
+            const decision = this.iteration === null ? null : this.check();
+            this.iteration = parseFloat(time_match[1]);
+            this.last_residuals = this.residuals;
+            this.residuals = {};
+            return decision;
+        }
+
+        const residual_match = line.match(/Solving for ([A-Za-z0-9_]+), Initial residual = ([0-9.eE+-]+)/);
+        if (residual_match) {
+            const field = residual_match[1];
+            const residual = parseFloat(residual_match[2]);
+            this.residuals[field] = Math.max(this.residuals[field] ?? 0, residual);
+            return null;
+        }
+
+        // forceCoeffs log, e.g. "    Cl       : 0.2345" (newer releases append "(...)" details)
+        const coefficient_match = line.match(/^\s*([A-Za-z]+)\s*:\s*([0-9.eE+-]+)/);
+        if (coefficient_match && coefficient_match[1] in this.history) {
+            const values = this.history[coefficient_match[1]];
+            values.push(parseFloat(coefficient_match[2]));
+            if (values.length > this.window) {
+                values.shift();
+            }
+        }
+        return null;
+    }
+
+    // Relative spread (max - min) / max(|mean|, 1e-2) of a coefficient over the window
+    spread(name) {
+        const values = this.history[name];
+        if (values.length < this.window) {
+            return Infinity;
+        }
+        const mean = values.reduce((a, b) => a + b, 0) / values.length;
+        return (Math.max(...values) - Math.min(...values)) / Math.max(Math.abs(mean), 1e-2);
+    }
+
+    check() {
+        if (this.stop || this.iteration < this.min_iterations) {
+            return null;
+        }
+
+        const residuals = this.residuals;
+        const fields = Object.keys(residuals);
+        const max_residual = fields.length > 0 ? Math.max(...fields.map((f) => residuals[f])) : Infinity;
+        const spreads = Object.fromEntries(this.coefficients.map((name) => [name, this.spread(name)]));
+        const max_spread = Math.max(...Object.values(spreads));
+
+        let reason = null;
+        if (max_residual < this.residual_tolerance) {
+            reason = `all initial residuals below ${this.residual_tolerance} (max ${max_residual.toExponential(2)})`;
+        } else if (max_spread <= this.coefficient_tolerance) {
+            reason = `${this.coefficients.join('/')} within ${this.coefficient_tolerance} relative spread `
+                + `over ${this.window} iterations (max ${max_spread.toExponential(2)})`;
+        }
+
+        if (reason) {
+            this.stop = this.record('stop', reason, max_residual, spreads);
+            return this.stop;
+        }
+        if (this.iteration % this.window === 0) {
+            this.record('continue', `max initial residual ${max_residual.toExponential(2)}, `
+                + `max ${this.coefficients.join('/')} spread ${Number.isFinite(max_spread) ? max_spread.toExponential(2) : 'n/a'}`,
+                max_residual, spreads);
+        }
+        return null;
+    }
+
+    record(action, reason, max_residual, spreads) {
+        const decision = {
+            iteration: this.iteration,
+            action: action,
+            reason: reason,
+            max_residual: Number.isFinite(max_residual) ? max_residual : null,
+            residuals: { ...this.residuals },
+            spreads: Object.fromEntries(Object.entries(spreads).map(([k, v]) => [k, Number.isFinite(v) ? v : null])),
+            time: new Date().toISOString(),
+        };
+        this.decisions.push(decision);
+        return decision;
+    }
+
+    // Called once the solver exits; records why it ended if the monitor did not stop it
+    finish(end_time) {
+        if (!this.stop && this.iteration !== null) {
+            const reason = this.iteration >= end_time
+                ? `reached endTime ${end_time} without meeting the convergence criteria`
+                : `solver stopped by itself at iteration ${this.iteration} (fvSolution residualControl)`;
+            this.record('end', reason, Math.max(...Object.values(this.last_residuals), -Infinity), {});
+        }
+        return this.summary();
+    }
+
+    summary() {
+        return {
+            settings: {
+                residual_tolerance: this.residual_tolerance,
+                coefficient_tolerance: this.coefficient_tolerance,
+                window: this.window,
+                min_iterations: this.min_iterations,
+                coefficients: this.coefficients,
+            },
+            converged: this.stop !== null,
+            stopped_at: this.stop ? this.stop.iteration : null,
+            final_iteration: this.iteration,
+            decisions: this.decisions,
+        };
+    }
+}
+
+module.exports = ConvergenceMonitor;
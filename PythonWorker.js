@@ -0,0 +1,143 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const { Logger } = require("yalls");
+
+// Client for scripts/worker.py: one resident Python process that keeps imports,
+// meshes and interpolators warm, called with JSON-lines requests over stdin/stdout.
+class PythonWorker {
+    constructor(options={}) {
+        this.python = options.python || './venv/bin/python3';
+        this.script = options.script || path.join(__dirname, 'scripts', 'worker.py');
+        this.cwd = options.cwd || process.cwd();
+        this.log = Logger.console('PythonWorker');
+        this.log.set_log_level("info");
+
+        this.process = null;
+        this.ready = null;
+        this.on_ready = null;
+        this.on_start_failed = null;
+        this.pending = new Map(); // id -> { resolve, reject, output_cb }
+        this.next_id = 1;
+        this.buffer = '';
+    }
+
+    start() {
+        if (this.ready) {
+            return this.ready;
+        }
+
+        this.ready = new Promise((resolve, reject) => {
+            const child = spawn(this.python, ['-u', this.script], {
+                cwd: this.cwd,
+                stdio: ['pipe', 'pipe', 'pipe'],
+            });
+            this.process = child;
+            this.buffer = '';
+
+            // The worker announces itself with an id-less "ready" line; exiting before that fails the start
+            this.on_ready = resolve;
+            this.on_start_failed = reject;
+
+            child.stdout.on('data', (data) => this.handle_stdout(data.toString()));
+            child.stderr.on('data', (data) => this.log.error(`[worker stderr] ${data.toString().trim()}`));
+
+            child.on('error', (err) => {
+                this.log.error(`Worker spawn error: ${err}`);
+                this.reset(err);
+            });
+
+            child.on('close', (code) => {
+                this.log.info(`Worker exited with code ${code}`);
+                this.reset(new Error(`Python worker exited with code ${code}`));
+            });
+        });
+
+        return this.ready;
+    }
+
+    reset(err) {
+        this.process = null;
+        this.ready = null;
+        for (const { reject } of this.pending.values()) {
+            reject(err);
+        }
+        this.pending.clear();
+        if (this.on_start_failed) {
+            this.on_start_failed(err);
+        }
+        this.on_ready = null;
+        this.on_start_failed = null;
+    }
+
+    handle_stdout(chunk) {
+        this.buffer += chunk;
+        let newline;
+        while ((newline = this.buffer.indexOf('\n')) !== -1) {
+            const line = this.buffer.slice(0, newline).trim();
+            this.buffer = this.buffer.slice(newline + 1);
+            if (line.length === 0) {
+                continue;
+            }
+
+            let response;
+            try {
+                response = JSON.parse(line);
+            } catch (err) {
+                this.log.error(`Unparseable worker output: ${line}`);
+                continue;
+            }
+
+            if (response.id === null || response.id === undefined) {
+                if (response.ok && response.result && response.result.ready && this.on_ready) {
+                    this.on_ready();
+                    this.on_ready = null;
+                    this.on_start_failed = null;
+                } else if (!response.ok) {
+                    this.log.error(`Worker error: ${response.error}`);
+                }
+                continue;
+            }
+
+            const request = this.pending.get(response.id);
+            if (!request) {
+                continue;
+            }
+            this.pending.delete(response.id);
+
+            if (request.output_cb && response.output) {
+                request.output_cb(response.output);
+            }
+
+            if (response.ok) {
+                request.resolve(response.result);
+            } else {
+                const err = new Error(response.error);
+                err.traceback = response.traceback;
+                err.output = response.output;
+                request.reject(err);
+            }
+        }
+    }
+
+    // Run an operation (render_slice, render_mesh, postprocess, compare, predict, ...)
+    async call(op, args = {}, output_cb = null) {
+        await this.start();
+
+        const id = this.next_id++;
+        this.log.debug(`Worker request ${id}: ${op}`);
+
+        return new Promise((resolve, reject) => {
+            this.pending.set(id, { resolve, reject, output_cb });
+            this.process.stdin.write(JSON.stringify({ id, op, args }) + '\n');
+        });
+    }
+
+    stop() {
+        if (this.process) {
+            this.process.stdin.write(JSON.stringify({ op: 'shutdown' }) + '\n');
+            this.process.stdin.end();
+        }
+    }
+}
+
+module.exports = PythonWorker;
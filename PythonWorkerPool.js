@@ -0,0 +1,74 @@
+const PythonWorker = require('./PythonWorker');
+
+// Several PythonWorkers for work that runs side by side. Each scheduler task holds
+// one for its whole run, so the renders and result ingestion of concurrent tasks do
+// not queue behind each other in a single serial worker. Workers are spawned on
+// first use, up to `size`, and stay warm once idle.
+class PythonWorkerPool {
+    constructor(options={}) {
+        this.size = options.size || 1;
+        this.worker_options = options.worker_options || {};
+
+        this.workers = [];
+        this.idle = [];
+        this.waiting = []; // resolve callbacks of acquire() calls waiting for a free worker
+    }
+
+    // Start one worker ahead of the first task so it does not pay for imports
+    start() {
+        if (this.workers.length === 0) {
+            this.idle.push(this.spawn());
+        }
+        return this.workers[0].start();
+    }
+
+    spawn() {
+        const worker = new PythonWorker(this.worker_options);
+        this.workers.push(worker);
+        return worker;
+    }
+
+    // A worker for the caller alone until release(); waits when all `size` are busy
+    acquire() {
+        if (this.idle.length > 0) {
+            // Most recently used first: its meshes and caches are the warmest
+            return Promise.resolve(this.idle.pop());
+        }
+        if (this.workers.length < this.size) {
+            return Promise.resolve(this.spawn());
+        }
+        return new Promise((resolve) => this.waiting.push(resolve));
+    }
+
+    release(worker) {
+        const next = this.waiting.shift();
+        if (next) {
+            next(worker);
+        } else {
+            this.idle.push(worker);
+        }
+    }
+
+    // Run fn(worker) with a worker of its own
+    async run(fn) {
+        const worker = await this.acquire();
+        try {
+            return await fn(worker);
+        } finally {
+            this.release(worker);
+        }
+    }
+
+    // One operation on any free worker
+    call(op, args = {}, output_cb = null) {
+        return this.run((worker) => worker.call(op, args, output_cb));
+    }
+
+    stop() {
+        for (const worker of this.workers) {
+            worker.stop();
+        }
+    }
+}
+
+module.exports = PythonWorkerPool;
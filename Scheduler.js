@@ -0,0 +1,200 @@
+const os = require('os');
+
+// Packs AoA tasks from every queued job onto the host's cores. Each task gets a
+// rank count from its case's cell count (cells_per_rank cells per MPI rank, capped
+// by the job's processors), its own set of core ids and its own run directory, so
+// several small cases run side by side instead of one after another. Cell counts
+// are learned from the first mesh of each model; until then default_cells is assumed.
+//
+// Tasks start in submission order. When the next task needs more cores than are
+// free it still starts on what is free if that is at least half its ranks;
+// otherwise it waits, and nothing behind it overtakes it.
+class Scheduler {
+    constructor(options={}) {
+        this.cores = options.cores || os.cpus().length;
+        this.cells_per_rank = options.cells_per_rank || 50000;
+        this.default_cells = options.default_cells || 200000;
+        this.bind_cores = options.bind_cores ?? true;
+        this.run_task = options.run_task;                       // async (task) => void
+        this.on_job_done = options.on_job_done || (() => {});  // (job, error) after a job's last task
+
+        this.free_cores = Array.from({ length: this.cores }, (_, i) => i);
+        this.queue = [];
+        this.running = new Map();
+        this.jobs = new Map();            // job id -> { job, remaining, error }
+        this.cells_by_model = new Map();
+        this.task_counter = 0;
+        this.completed_tasks = 0;
+        this.failed_tasks = 0;
+
+        // Core-milliseconds spent busy, for average utilization
+        this.started_at = Date.now();
+        this.last_tick = this.started_at;
+        this.busy_core_ms = 0;
+    }
+
+    // Queue a job's AoAs: one task per AoA, or one task for all of them when `grouped`
+    // (the rotate-inflow mode meshes once and must run its AoAs in one case)
+    submit(job, { aoas, max_ranks = this.cores, grouped = false }) {
+        const groups = grouped ? [aoas] : aoas.map((aoa) => [aoa]);
+        this.jobs.set(job.id, { job, remaining: groups.length, error: null });
+        for (const group of groups) {
+            const id = ++this.task_counter;
+            this.queue.push({
+                id: id,
+                job: job,
+                aoas: group,
+                max_ranks: max_ranks,
+                run_directory: `run/${job.name}-${job.id}-${id}`,
+                status: 'queued',
+                queued_at: Date.now(),
+                started_at: null,
+                ranks: null,
+                cores: null,
+                fraction: 0,
+                simulation: null,
+            });
+        }
+        this.schedule();
+    }
+
+    record_cells(model_path, n_cells) {
+        this.cells_by_model.set(model_path, n_cells);
+    }
+
+    estimated_cells(task) {
+        return this.cells_by_model.get(task.job.modelPath) ?? this.default_cells;
+    }
+
+    ranks_for(task) {
+        const ideal = Math.round(this.estimated_cells(task) / this.cells_per_rank);
+        return Math.max(1, Math.min(ideal, task.max_ranks, this.cores));
+    }
+
+    mpirun_args(task) {
+        return this.bind_cores ? `--cpu-set ${task.cores.join(',')} --bind-to core` : '';
+    }
+
+    schedule() {
+        this.tick();
+        while (this.queue.length > 0 && this.free_cores.length > 0) {
+            const task = this.queue[0];
+            const ranks = this.ranks_for(task);
+            if (this.free_cores.length < Math.ceil(ranks / 2)) {
+                break;
+            }
+            this.queue.shift();
+            task.ranks = Math.min(ranks, this.free_cores.length);
+            task.cores = this.free_cores.splice(0, task.ranks);
+            task.status = 'running';
+            task.started_at = Date.now();
+            this.running.set(task.id, task);
+            this.start(task);
+        }
+    }
+
+    async start(task) {
+        const entry = this.jobs.get(task.job.id);
+        try {
+            await this.run_task(task);
+            task.status = 'completed';
+            this.completed_tasks++;
+        } catch (error) {
+            task.status = 'failed';
+            task.error = error.message;
+            this.failed_tasks++;
+            if (entry && !entry.error) {
+                entry.error = error;
+                this.drop_queued(task.job.id);
+            }
+        } finally {
+            this.tick();
+            this.running.delete(task.id);
+            this.free_cores.push(...task.cores);
+            this.free_cores.sort((a, b) => a - b);
+            task.simulation = null;
+            if (entry) {
+                entry.remaining--;
+                this.finish_if_done(entry);
+            }
+            this.schedule();
+        }
+    }
+
+    drop_queued(job_id) {
+        const entry = this.jobs.get(job_id);
+        const kept = this.queue.filter((task) => task.job.id !== job_id);
+        if (entry) {
+            entry.remaining -= this.queue.length - kept.length;
+        }
+        this.queue = kept;
+    }
+
+    finish_if_done(entry) {
+        if (entry.remaining === 0 && this.jobs.get(entry.job.id) === entry) {
+            this.jobs.delete(entry.job.id);
+            this.on_job_done(entry.job, entry.error);
+        }
+    }
+
+    // Drop a job's queued tasks and terminate its running ones; false if it has none
+    cancel(job_id, reason='Job terminated by user') {
+        const entry = this.jobs.get(job_id);
+        if (!entry) {
+            return false;
+        }
+        entry.error = entry.error || new Error(reason);
+        this.drop_queued(job_id);
+        for (const task of this.running.values()) {
+            if (task.job.id === job_id && task.simulation) {
+                task.simulation.terminate();
+            }
+        }
+        this.finish_if_done(entry);
+        return true;
+    }
+
+    tasks_for(job_id) {
+        return Array.from(this.running.values()).filter((task) => task.job.id === job_id);
+    }
+
+    tick() {
+        const now = Date.now();
+        this.busy_core_ms += (now - this.last_tick) * (this.cores - this.free_cores.length);
+        this.last_tick = now;
+    }
+
+    status() {
+        this.tick();
+        const describe = (task) => ({
+            id: task.id,
+            jobId: task.job.id,
+            jobName: task.job.name,
+            aoas: task.aoas,
+            status: task.status,
+            ranks: task.ranks ?? this.ranks_for(task),
+            cores: task.cores,
+            estimatedCells: this.estimated_cells(task),
+            runDirectory: task.run_directory,
+            queuedAt: new Date(task.queued_at).toISOString(),
+            startedAt: task.started_at ? new Date(task.started_at).toISOString() : null,
+            progress: task.fraction,
+        });
+        const busy = this.cores - this.free_cores.length;
+        const elapsed = Math.max(Date.now() - this.started_at, 1);
+        return {
+            cores: this.cores,
+            busyCores: busy,
+            freeCores: this.free_cores.length,
+            utilization: busy / this.cores,
+            averageUtilization: this.busy_core_ms / (this.cores * elapsed),
+            cellsPerRank: this.cells_per_rank,
+            running: Array.from(this.running.values()).map(describe),
+            queued: this.queue.map(describe),
+            completedTasks: this.completed_tasks,
+            failedTasks: this.failed_tasks,
+        };
+    }
+}
+
+module.exports = Scheduler;
@@ -1,7 +1,9 @@
 const {exec, spawn} = require('child_process');
 const fs = require('fs');
+const path = require('path');
 const { Logger } = require("yalls");
 const shellQuote = require('shell-quote');
+const ConvergenceMonitor = require('./ConvergenceMonitor');
 
 class Simulation {
     constructor(name, model_path, angle_of_attacks=[10.0], options={}) {
@@ -11,7 +13,9 @@ class Simulation {
         this.log = Logger.console(`Simulation(${name})`);
         this.log.set_log_level("info");
 
-        this.run_directory = `run/${name}`;
+        // The scheduler gives every concurrent task its own run directory
+        this.run_directory = options.run_directory || `run/${name}`;
+        this.mpirun_args = options.mpirun_args || ''; // e.g. core binding from the scheduler
         
         // Callback functions for progress tracking
         this.onProgress = options.onProgress || null;
@@ -19,7 +23,24 @@ class Simulation {
         this.onAoAComplete = options.onAoAComplete || null;
         this.onTimeUpdate = options.onTimeUpdate || null;
         this.onLogMessage = options.onLogMessage || null;
+        this.onMeshReady = options.onMeshReady || null; // Called with the cell count after meshing
         this.simulation_max_time = options.simulation_max_time || 1200; // Default max time
+        this.worker = options.worker || null; // Optional PythonWorker for warm renders
+        // Worker that serves the solver telemetry endpoint: it owns the logs' ring buffers and history chunks
+        this.telemetry_worker = options.telemetry_worker || this.worker;
+        // Start each AoA from the converged fields of the nearest finished one
+        this.warm_start = options.warm_start || false;
+        // Early stopping on residuals or settled Cl/Cd; `convergence: false` always runs to endTime
+        this.convergence = options.convergence === false ? null : new ConvergenceMonitor(options.convergence || {});
+        // Without reconstructPar, results, renders and snapshots are read from processor*/ (scripts/decomposed.py)
+        this.reconstruct = options.reconstruct ?? true;
+        // 'rotate-geometry' remeshes the rotated disc for every AoA; 'rotate-inflow' meshes
+        // the level disc once and rotates the freestream and force directions instead
+        this.aoa_mode = options.aoa_mode || 'rotate-geometry';
+        if (!Simulation.AOA_MODES.includes(this.aoa_mode)) {
+            throw new Error(`Unknown AoA mode: ${this.aoa_mode}`);
+        }
+        this.mesh_ready = false;
 
         // Constants for progress calculation
         this.current_aoa_index = 0;
@@ -32,6 +53,9 @@ class Simulation {
         this.log.info(`\tAngle of attacks: ${this.angle_of_attacks}`);
         this.log.info(`\tRun directory: ${this.run_directory}`);
         this.log.info(`\tUsing ${n_processors} processors`);
+        this.log.info(`\tAoA mode: ${this.aoa_mode}`);
+        this.log.info(`\tReconstruct: ${this.reconstruct}`);
+        this.mesh_ready = false;
 
         // Make output/name/ directory
         await this.run_command(`mkdir -p output/${this.name}`);
@@ -46,7 +70,15 @@ class Simulation {
             }
             
             this.log.info(`\n=== Simulating angle of attack: ${aoa} degrees ===`);
-            await this.simulate(n_processors, aoa);
+
+            // Raw solver output is kept with the AoA's results for telemetry (scripts/solver_log.py)
+            fs.mkdirSync(`output/${this.name}/${aoa}`, { recursive: true });
+            this.solver_log_path = `output/${this.name}/${aoa}/log.simpleFoam`;
+            if (this.aoa_mode === 'rotate-inflow') {
+                await this.simulate_on_mesh(n_processors, aoa);
+            } else {
+                await this.simulate(n_processors, aoa);
+            }
             this.log.info(`=== Completed angle of attack: ${aoa} degrees ===\n`);
 
             // Reset working directory
@@ -56,25 +88,77 @@ class Simulation {
             const aoa_dir = `output/${this.name}/${aoa}`;
             await this.run_command(`mkdir -p ${aoa_dir}`);
             
-            // Parse functionObjectProperties from this.current_time directory
-            let results = this.parse_function_object_properties(this.current_time);
-            
-            // Save results to JSON file
-            const results_json = JSON.stringify(results, null, 2);
+            // Final forceCoeffs results, with tail means and stds from the per-iteration history
+            let results;
+            if (this.worker) {
+                results = await this.worker.call('ingest_results', {
+                    case_dir: this.run_directory,
+                    time: this.current_time.toString(),
+                    aoa_dir: aoa_dir,
+                }, (data) => { this.log.info(data); });
+            } else {
+                await this.run_command(`./venv/bin/python3 -u ./scripts/force_history.py ingest ${this.run_directory} ${this.current_time} ${aoa_dir}`,
+                    (data) => { this.log.info(data); },
+                    (data) => { this.log.error(`[results stderr] ${data}`); }
+                );
+                results = JSON.parse(fs.readFileSync(`${aoa_dir}/results.json`, 'utf8'));
+            }
 
-            fs.writeFileSync(`${aoa_dir}/results.json`, results_json);
-            this.log.info(`Saved results to ${aoa_dir}/results.json`);
+            // Write the AoA's complete solver telemetry history next to its log and free its buffers
+            if (this.telemetry_worker) {
+                await this.telemetry_worker.call('solver_telemetry', { log_file: this.solver_log_path, points: 0, close: true });
+            }
+
+            // Record why the solver stopped where it did
+            if (this.convergence) {
+                const convergence = this.convergence.finish(this.simulation_max_time);
+                fs.writeFileSync(`${aoa_dir}/convergence.json`, JSON.stringify(convergence, null, 2));
+                this.log.info(`Saved convergence decisions to ${aoa_dir}/convergence.json`);
+            }
+
+            // Add this AoA to the job's columnar coefficient store
+            if (this.worker) {
+                await this.worker.call('record_results', { job_dir: `output/${this.name}`, folder: `${aoa}`, results });
+            } else {
+                await this.run_command(`./venv/bin/python3 -u ./scripts/results_store.py add output/${this.name} ${aoa} ${aoa_dir}/results.json`,
+                    (data) => { this.log.info(data); },
+                    (data) => { this.log.error(`[results store stderr] ${data}`); }
+                );
+            }
+
+            // Keep the converged fields so later AoAs can start from them
+            if (this.warm_start) {
+                await this.save_fields(aoa_dir);
+            }
 
             // Render final time step
             this.log.info(`Rendering simulation at time: ${this.current_time}`);
 
-            // Run python script with venv active
-            await this.run_command(`./venv/bin/python3 -u ./scripts/render_slice.py ${this.run_directory} ${aoa_dir}/render.png --time=${this.current_time} --notes="AoA: ${aoa} degrees"`,
-                (data) => { this.log.info(data); },
-                (data) => { this.log.error(`[render stderr] ${data}`); }
-            );
+            if (this.worker) {
+                // Render in the resident worker so imports and cached weights stay warm
+                await this.worker.call('render_slice', {
+                    sol_dir: this.run_directory,
+                    output_file: `${aoa_dir}/render.png`,
+                    time: this.current_time.toString(),
+                    notes: `AoA: ${aoa} degrees`,
+                }, (data) => { this.log.info(data); });
+            } else {
+                // Run python script with venv active
+                await this.run_command(`./venv/bin/python3 -u ./scripts/render_slice.py ${this.run_directory} ${aoa_dir}/render.png --time=${this.current_time} --notes="AoA: ${aoa} degrees"`,
+                    (data) => { this.log.info(data); },
+                    (data) => { this.log.error(`[render stderr] ${data}`); }
+                );
+            }
 
             this.log.info(`Saved render to ${aoa_dir}/render.png`);
+
+            // Record where this AoA's fields live, so scripts/render_batch.py can re-render the AoA folder
+            const case_directory = this.aoa_mode === 'rotate-inflow' ? this.keep_aoa_case(aoa) : this.run_directory;
+            fs.writeFileSync(`${aoa_dir}/case.json`, JSON.stringify({
+                aoa: aoa,
+                case: path.relative(aoa_dir, case_directory),
+                time: this.current_time.toString(),
+            }, null, 2));
             
             // Notify AoA completion
             if (this.onAoAComplete) {
@@ -90,29 +174,117 @@ class Simulation {
 
     }
 
-    parse_function_object_properties(time) {
-        const time_dir = process.cwd() + '/' + this.run_directory + "/" + time.toString();
-        const props_path = `${time_dir}/uniform/functionObjects/functionObjectProperties`;
+    async simulate(n_processors, aoa) {
+        await this.prepare_case(n_processors);
 
-        if (!fs.existsSync(props_path)) {
-            this.log.error(`functionObjectProperties file not found at ${props_path}`);
-            return {};
+        this.log.info(`Rotating and translating STL model for angle of attack: ${aoa} degrees`);
+        await this.run_command(`surfaceTransformPoints -rotate-z '${-aoa}' ./constant/triSurface/model.stl ./constant/triSurface/model_rotated.stl`);
+        await this.run_command(`surfaceTransformPoints -translate '(1.05 0 0)' ./constant/triSurface/model_rotated.stl ./constant/triSurface/model_transformed.stl`);
+        await this.run_command(`mv ./constant/triSurface/model_transformed.stl ./constant/triSurface/model.stl`);
+
+        await this.generate_mesh(n_processors);
+        await this.apply_warm_start(aoa);
+        await this.solve(n_processors);
+    }
+
+    async simulate_on_mesh(n_processors, aoa) {
+        // Mesh the level disc on the first AoA only; later AoAs reuse constant/polyMesh
+        if (!this.mesh_ready) {
+            await this.prepare_case(n_processors);
+
+            this.log.info(`Translating STL model; angle of attack is applied to the inflow`);
+            await this.run_command(`surfaceTransformPoints -translate '(1.05 0 0)' ./constant/triSurface/model.stl ./constant/triSurface/model_transformed.stl`);
+            await this.run_command(`mv ./constant/triSurface/model_transformed.stl ./constant/triSurface/model.stl`);
+
+            await this.generate_mesh(n_processors);
+            this.mesh_ready = true;
+        }
+
+        // Rotate U, liftDir and dragDir and clear the previous AoA's results
+        this.working_directory = process.cwd();
+        this.log.info(`Setting freestream for angle of attack: ${aoa} degrees`);
+        if (this.worker) {
+            await this.worker.call('aoa_case', {
+                case_dir: this.run_directory,
+                aoa: aoa,
+                template_dir: 'base-case',
+            }, (data) => { this.log.info(data); });
+        } else {
+            await this.run_command(`./venv/bin/python3 -u ./scripts/aoa_case.py ${this.run_directory} ${aoa} --template base-case`,
+                (data) => { this.log.info(data); },
+                (data) => { this.log.error(`[aoa case stderr] ${data}`); }
+            );
         }
 
-        const content = fs.readFileSync(props_path, 'utf8');
-        let lines = content.split('\n');
+        await this.apply_warm_start(aoa);
+        this.working_directory = process.cwd() + '/' + this.run_directory + "/";
+        await this.solve(n_processors);
+    }
 
-        lines = lines.slice(25, 72).map(line => line.trim()).filter(line => line.length > 0 && !line.startsWith('//'));
+    // The next AoA of a grouped rotate-inflow case clears this one's results, so its final time
+    // (or, unreconstructed, its processor directories) moves to run/<task>/aoa/<aoa>/: a case of
+    // its own that links to the shared constant/ and system/
+    keep_aoa_case(aoa) {
+        const root = process.cwd() + '/' + this.run_directory;
+        const target = `${this.run_directory}/aoa/${aoa}`;
+        const target_path = process.cwd() + '/' + target;
+        fs.rmSync(target_path, { recursive: true, force: true });
+        fs.mkdirSync(target_path, { recursive: true });
+        for (const name of ['constant', 'system']) {
+            fs.symlinkSync(`../../${name}`, `${target_path}/${name}`);
+        }
+        if (this.reconstruct) {
+            const time = this.current_time.toString();
+            fs.renameSync(`${root}/${time}`, `${target_path}/${time}`);
+        } else {
+            for (const name of fs.readdirSync(root).filter((name) => /^processor\d+$/.test(name))) {
+                fs.renameSync(`${root}/${name}`, `${target_path}/${name}`);
+            }
+        }
+        this.log.info(`Kept AoA ${aoa} results in ${target}`);
+        return target;
+    }
 
-        let results = lines.map(line => {
-            const parts = line.split(/\s+/);
-            return [parts[0], parseFloat(parts[1].slice(0, -1))] // Remove trailing semicolon
-        });
+    async apply_warm_start(aoa) {
+        if (!this.warm_start) {
+            return;
+        }
 
-        return Object.fromEntries(results);
+        // Map the nearest finished AoA's snapshot into 0/ (copied directly when the mesh is shared)
+        const case_directory = this.working_directory;
+        this.working_directory = process.cwd();
+        if (this.worker) {
+            await this.worker.call('warm_start', {
+                case_dir: this.run_directory,
+                job_dir: `output/${this.name}`,
+                aoa: aoa,
+            }, (data) => { this.log.info(data); });
+        } else {
+            await this.run_command(`./venv/bin/python3 -u ./scripts/map_fields.py warm-start ${this.run_directory} output/${this.name} ${aoa}`,
+                (data) => { this.log.info(data); },
+                (data) => { this.log.error(`[warm start stderr] ${data}`); }
+            );
+        }
+        this.working_directory = case_directory;
     }
 
-    async simulate(n_processors, aoa) {
+    async save_fields(aoa_dir) {
+        this.log.info(`Saving converged fields to ${aoa_dir}/fields.npz`);
+        if (this.worker) {
+            await this.worker.call('snapshot_fields', {
+                case_dir: this.run_directory,
+                time: this.current_time.toString(),
+                output_file: `${aoa_dir}/fields.npz`,
+            }, (data) => { this.log.info(data); });
+        } else {
+            await this.run_command(`./venv/bin/python3 -u ./scripts/map_fields.py snapshot ${this.run_directory} ${this.current_time} ${aoa_dir}/fields.npz`,
+                (data) => { this.log.info(data); },
+                (data) => { this.log.error(`[snapshot stderr] ${data}`); }
+            );
+        }
+    }
+
+    async prepare_case(n_processors) {
         this.working_directory = process.cwd();
 
         // Make sure run directory exists
@@ -136,13 +308,9 @@ class Simulation {
 
         // Update endTime in controlDict
         await this.run_command(`sed -i 's/endTime[ \t][ \t]*[0-9.eE+-]\+/endTime ${this.simulation_max_time}/' ./system/controlDict`);
+    }
 
-
-        this.log.info(`Rotating and translating STL model for angle of attack: ${aoa} degrees`);
-        await this.run_command(`surfaceTransformPoints -rotate-z '${-aoa}' ./constant/triSurface/model.stl ./constant/triSurface/model_rotated.stl`);
-        await this.run_command(`surfaceTransformPoints -translate '(1.05 0 0)' ./constant/triSurface/model_rotated.stl ./constant/triSurface/model_transformed.stl`);
-        await this.run_command(`mv ./constant/triSurface/model_transformed.stl ./constant/triSurface/model.stl`);
-
+    async generate_mesh(n_processors) {
         // Generate mesh
         this.log.info(`Running surfaceFeatureExtract`);
         await this.run_command('surfaceFeatureExtract');
@@ -155,7 +323,7 @@ class Simulation {
         await this.run_command('decomposePar');
 
         this.log.info(`Running snappyHexMesh`);
-        await this.run_command('mpirun -np ' + n_processors + ' snappyHexMesh -parallel -overwrite',
+        await this.run_command(`mpirun -np ${n_processors} ${this.mpirun_args} snappyHexMesh -parallel -overwrite`,
             null,
             (data) => { this.log.error(`[snappyHexMesh stderr] ${data}`); }
         );
@@ -166,6 +334,19 @@ class Simulation {
             (data) => { this.log.error(`[reconstructParMesh stderr] ${data}`); }
         );
 
+        this.n_cells = this.read_cell_count();
+        if (this.n_cells && this.onMeshReady) {
+            this.onMeshReady(this.n_cells);
+        }
+    }
+
+    async solve(n_processors) {
+        // A reused case may still say stopAt writeNow from an early stop
+        await this.run_command(`sed -i 's/^stopAt[ \t].*/stopAt          endTime;/' ./system/controlDict`);
+        if (this.convergence) {
+            this.convergence.reset();
+        }
+
         // Decompose for parallel run
         this.log.info(`Decomposing case for parallel run`);
         await this.run_command('decomposePar -force', 
@@ -175,34 +356,91 @@ class Simulation {
 
         // Run the simulation in parallel
         this.log.info(`Running simpleFoam in parallel`);
-        await this.run_command(`mpirun -np ${n_processors} simpleFoam -parallel`, 
-            (data) => this.parse_solver_output(data),
-            (data) => { this.log.error(`[simpleFoam stderr] ${data}`); }
-        );
+        this.solver_log = this.solver_log_path ? fs.createWriteStream(process.cwd() + '/' + this.solver_log_path) : null;
+        try {
+            await this.run_command(`mpirun -np ${n_processors} ${this.mpirun_args} simpleFoam -parallel`, 
+                (data) => this.parse_solver_output(data),
+                (data) => { this.log.error(`[simpleFoam stderr] ${data}`); }
+            );
+        } finally {
+            if (this.solver_log) {
+                await new Promise((resolve) => this.solver_log.end(resolve));
+                this.solver_log = null;
+            }
+        }
 
         // Reconstruct the case
-        this.log.info(`Reconstructing case`);
-        await this.run_command('reconstructPar', 
-            null,
-            (data) => { this.log.error(`[reconstructPar stderr] ${data}`); }
-        );
+        if (this.reconstruct) {
+            this.log.info(`Reconstructing case`);
+            await this.run_command('reconstructPar', 
+                null,
+                (data) => { this.log.error(`[reconstructPar stderr] ${data}`); }
+            );
+        } else {
+            this.log.info(`Skipping reconstructPar; reading results from the processor directories`);
+        }
+
+        // Results are read from the last written time, wherever the run stopped
+        this.current_time = this.latest_time() ?? this.current_time;
+    }
+
+    // Cell count from the note in the polyMesh owner header ("nPoints:... nCells:...")
+    read_cell_count() {
+        try {
+            const fd = fs.openSync(process.cwd() + '/' + this.run_directory + '/constant/polyMesh/owner', 'r');
+            const header = Buffer.alloc(4096);
+            fs.readSync(fd, header, 0, header.length, 0);
+            fs.closeSync(fd);
+            const match = header.toString('latin1').match(/nCells:\s*(\d+)/);
+            return match ? parseInt(match[1]) : null;
+        } catch (error) {
+            return null;
+        }
+    }
+
+    latest_time() {
+        // Unreconstructed time directories only exist in the processor directories
+        const directory = this.run_directory + (this.reconstruct ? '' : '/processor0');
+        const times = fs.readdirSync(process.cwd() + '/' + directory)
+            .filter((name) => /^[0-9.eE+-]+$/.test(name))
+            .map(parseFloat)
+            .filter((time) => Number.isFinite(time) && time > 0);
+        return times.length > 0 ? Math.max(...times) : null;
+    }
 
+    // Ask the running solver to write the current iteration and exit (runTimeModifiable picks this up)
+    request_stop(decision) {
+        const control_path = process.cwd() + '/' + this.run_directory + '/system/controlDict';
+        const control = fs.readFileSync(control_path, 'utf8');
+        fs.writeFileSync(control_path, control.replace(/^stopAt[ \t].*$/m, 'stopAt          writeNow;'));
+        this.log.info(`Converged at iteration ${decision.iteration}: ${decision.reason}; stopping simpleFoam`);
     }
 
 
     async parse_solver_output(data) {
+        if (this.solver_log) {
+            this.solver_log.write(data);
+        }
+
         // Log all output if callback exists
         if (this.onLogMessage) {
             this.onLogMessage(data.toString().trim());
         }
 
-        // Example line: Time = 0.1
-        let time_line = data.split('\n').find((line) => line.startsWith('Time = '));
-        const time_match = (time_line || "").match(/^Time = ([0-9.eE+-]+)/);
-        if (time_match) {
-            const time = parseFloat(time_match[1]);
+        if (this.convergence) {
+            const decision = this.convergence.update(data);
+            if (decision) {
+                this.request_stop(decision);
+            }
+        }
+
+        // Residuals and timings are parsed from the log file by scripts/solver_log.py;
+        // here only the latest "Time = " of the chunk drives progress
+        const time_matches = data.match(/^Time = [0-9.eE+-]+$/gm);
+        if (time_matches) {
+            const time = parseFloat(time_matches[time_matches.length - 1].slice('Time = '.length));
             this.current_time = time;
-            this.log.info(`Simulation time: ${time}`);
+            this.log.debug(`Simulation time: ${time}`);
             
             // Calculate fine-grained progress based on simulation time
             if (this.onTimeUpdate) {
@@ -222,20 +460,25 @@ class Simulation {
                 this.onProgress(overallProgress, this.angle_of_attacks[this.current_aoa_index], time);
             }
         }
-
-        // Example line: Solving for Ux, Initial residual = 0.001234, Final residual = 1.234e-05, No Iterations 2
-        const residual_match = data.match(/Solving for ([A-Za-z0-9_]+), Initial residual = ([0-9.eE+-]+), Final residual = ([0-9.eE+-]+), No Iterations ([0-9]+)/);
-        if (residual_match) {
-            const field = residual_match[1];
-            const initial_residual = parseFloat(residual_match[2]);
-            const final_residual = parseFloat(residual_match[3]);
-            const iterations = parseInt(residual_match[4]);
-            this.log.info(`Field: ${field}, Initial Residual: ${initial_residual}, Final Residual: ${final_residual}, Iterations: ${iterations}`);
-        }
     }
 
 
 
+    // Stop the running command (SIGTERM, then SIGKILL after 5 s); the run then fails
+    terminate() {
+        const child = this.current_process;
+        if (!child) {
+            return;
+        }
+        this.log.info(`Terminating process ${child.pid}`);
+        child.kill('SIGTERM');
+        setTimeout(() => {
+            if (child.exitCode === null && child.signalCode === null) {
+                child.kill('SIGKILL');
+            }
+        }, 5000);
+    }
+
 async run_command(command, stdout_cb = null, stderr_cb = null) {
     this.log.debug(`Executing command: ${command}`);
 
@@ -297,4 +540,6 @@ async run_command(command, stdout_cb = null, stderr_cb = null) {
         
 }
 
+Simulation.AOA_MODES = ['rotate-geometry', 'rotate-inflow'];
+
 module.exports = Simulation;
\ No newline at end of file
@@ -1,48 +1,22 @@
 import os
-import json
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
-from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from animation import write_animation
+import results_store
 
 # Define the base directory containing AoA folders
 base_dir = "output/test-sim"
 
-# Initialize lists to store data
-data_list = []
-
-# Loop through each AoA folder
-for aoa_folder in os.listdir(base_dir):
-    aoa_path = os.path.join(base_dir, aoa_folder)
-    if os.path.isdir(aoa_path):
-        try:
-            # Try to convert folder name to float (AoA value)
-            aoa = float(aoa_folder)
-            json_file = os.path.join(aoa_path, "results.json")
-            png_file = os.path.join(aoa_path, "render.png")
-            if os.path.exists(json_file):
-                with open(json_file, 'r') as f:
-                    data = json.load(f)
-                    # Store data with AoA and PNG path
-                    data_list.append({
-                        'aoa': aoa,
-                        'cl': data["Cl"],
-                        'cd': data["CdPressure"] + data["CdViscous"],
-                        'cmpitch': data["CmPitch"],
-                        'png': png_file if os.path.exists(png_file) else None
-                    })
-        except ValueError:
-            # Skip folders that aren't valid numbers
-            continue
-
-# Sort data by AoA for ascending order
-data_list.sort(key=lambda x: x['aoa'])
-
-# Extract sorted data
-aoa_values = [d['aoa'] for d in data_list]
-cl_values = [d['cl'] for d in data_list]
-cd_values = [d['cd'] for d in data_list]
-cmpitch_values = [d['cmpitch'] for d in data_list]
-png_files = [d['png'] for d in data_list if d['png'] is not None]
+# Load the job's coefficient table (sorted by AoA) in one read
+table = results_store.load_or_build(base_dir)
+aoa_values = table['aoa'].tolist()
+cl_values = table['Cl'].tolist()
+cd_values = results_store.total_drag(table).tolist()
+cmpitch_values = table['CmPitch'].tolist()
+png_files = [p for p in (os.path.join(base_dir, folder, "render.png") for folder in table['folder']) if os.path.exists(p)]
 
 # Perform polynomial fits (degree 3, cubic fit)
 if len(aoa_values) > 3:  # Need at least 4 points for degree 3 fit
@@ -101,23 +75,9 @@ plt.tight_layout()
 plt.savefig("output/test-sim/coefficients_plot.png")
 plt.show()
 
-# Create GIF from PNG files in ascending AoA order
+# Stream the PNG files into a GIF in ascending AoA order
 if png_files:
-    images = []
-    for file in png_files:
-        img = Image.open(file)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        images.append(img)
-    
-    # Save GIF
-    images[0].save(
-        "output/test-sim/output.gif",
-        save_all=True,
-        append_images=images[1:],
-        duration=300,  # Duration in milliseconds per frame
-        loop=0  # Loop forever
-    )
+    write_animation(png_files, "output/test-sim/output.gif", duration=300)
     print("GIF created successfully: output/test-sim/output.gif")
 else:
-    print("No PNG files found for GIF creation.")
\ No newline at end of file
+    print("No PNG files found for GIF creation.")
@@ -0,0 +1,187 @@
+"""Propose the next angles of attack to simulate for a job.
+
+Every candidate AoA on a fine grid is scored by how poorly the current
+samples pin the Cl, Cd and CmPitch curves down there:
+
+- curvature: the gap between the PCHIP fit and straight-line interpolation,
+  which is about h^2 |f''| / 8 inside an interval of width h;
+- interpolant disagreement: the gap between PCHIP and a natural cubic spline
+  and an Akima spline through the same samples;
+- stall: scores between the neighbours of the highest Cl sample are weighted
+  up, since the curves bend sharply there;
+- range: parts of the requested AoA range outside the sampled one rank first.
+
+With fewer than three samples the fit is a straight line and none of the
+gaps above can be measured, so the widest gaps between runs are bisected
+instead.
+
+Gaps are measured relative to each coefficient's sampled range, so the three
+coefficients are comparable. Proposals are taken one at a time from the
+highest score, keeping min_spacing from every other run; each is assumed to
+land on the current fit before the next is scored. With a tolerance,
+nothing is proposed once every score is below it.
+"""
+
+import argparse
+import json
+import sys
+
+import numpy as np
+from scipy.interpolate import Akima1DInterpolator, CubicSpline
+
+import results_store
+from pchip_batch import PchipBatch
+
+COEFFICIENTS = ('Cl', 'Cd', 'CmPitch')
+
+
+def _samples(table):
+    """Sorted unique AoAs and their (k, 3) Cl, Cd, CmPitch rows, dropping incomplete rows."""
+    values = np.column_stack([table['Cl'], results_store.total_drag(table), table['CmPitch']])
+    ok = np.isfinite(values).all(axis=1)
+    aoa, index = np.unique(table['aoa'][ok], return_index=True)
+    return aoa, values[ok][index]
+
+
+def score_candidates(aoa, values, grid, stall_weight=2.0, weights=(1.0, 1.0, 1.0), bisect=False):
+    """Score and dominant reason for each grid AoA, from samples aoa (k,) and values (k, 3).
+
+    With `bisect`, grid AoAs inside the sampled range are scored by their
+    distance to the nearest sample (as a fraction of the sampled span)
+    instead of by the curves.
+    """
+    span = max(aoa[-1] - aoa[0], 1e-9)
+    if bisect:
+        score = np.abs(grid[:, None] - aoa[None, :]).min(axis=1) / span
+        reason = np.full(len(grid), 'too few samples to fit', dtype=object)
+    else:
+        scale = np.ptp(values, axis=0)
+        scale = np.where(scale > 0, scale, 1.0)
+        weights = np.asarray(weights, dtype=np.float64)
+
+        # Inside the sampled range only; outside is scored separately below
+        inner = np.clip(grid, aoa[0], aoa[-1])
+        pchip = PchipBatch.fit([aoa], [values])(inner)[0]
+        linear = np.column_stack([np.interp(inner, aoa, values[:, j]) for j in range(values.shape[1])])
+        gaps = {'curvature': np.abs(linear - pchip)}
+        if len(aoa) >= 3:
+            gaps['interpolant disagreement'] = np.maximum(
+                np.abs(CubicSpline(aoa, values, bc_type='natural')(inner) - pchip),
+                np.abs(Akima1DInterpolator(aoa, values)(inner) - pchip))
+
+        reasons = list(gaps)
+        per_reason = np.stack([(gaps[reason] / scale * weights).max(axis=1) for reason in reasons])
+        score = per_reason.max(axis=0)
+        reason = np.array(reasons, dtype=object)[per_reason.argmax(axis=0)]
+
+    # Neighbourhood of the highest Cl sample, when it is not at either end
+    peak = int(np.argmax(values[:, 0]))
+    if 0 < peak < len(aoa) - 1:
+        near = (grid >= aoa[peak - 1]) & (grid <= aoa[peak + 1])
+        score[near] *= stall_weight
+        reason[near] = [f"{r}, near stall" for r in reason[near]]
+
+    # Outside the sampled range nothing is known: rank by distance, above anything inside
+    outside = (grid < aoa[0]) | (grid > aoa[-1])
+    distance = np.maximum(aoa[0] - grid, grid - aoa[-1])
+    score[outside] = max(score.max(initial=0.0), 1.0) + distance[outside] / span
+    reason[outside] = 'unsampled range'
+    return score, reason
+
+
+def propose_aoas(aoa, values, count=3, aoa_range=None, min_spacing=1.0, resolution=0.25, tolerance=0.0,
+                 stall_weight=2.0):
+    """Pick up to count new AoAs (multiples of resolution) where the curves are least resolved.
+
+    aoa_range defaults to the sampled range. Returns a list of
+    {'aoa', 'score', 'reason'}, best first.
+    """
+    aoa = np.asarray(aoa, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if aoa_range is None:
+        if len(aoa) < 2:
+            raise ValueError("Need at least two sampled AoAs, or an AoA range to start from.")
+        aoa_range = (aoa[0], aoa[-1])
+    low, high = sorted(aoa_range)
+    grid = np.arange(np.ceil(low / resolution), np.floor(high / resolution) + 1) * resolution
+
+    if len(aoa) < 2:
+        # Nothing to fit yet: spread the first runs evenly over the range
+        targets = np.unique(np.round(np.linspace(low, high, count) / resolution) * resolution)
+        return [{'aoa': round(float(a), 6), 'score': 1.0, 'reason': 'initial coverage'}
+                for a in targets if np.all(np.abs(aoa - a) >= min_spacing)]
+
+    # Each pick is assumed to land on the current fit before the next is scored, so a
+    # batch spreads over the poorly resolved regions instead of crowding the worst one.
+    # Two samples only give a straight line, which would make every such guess agree.
+    bisect = len(aoa) < 3
+    knots, known = aoa, values
+    proposals = []
+    while len(proposals) < count:
+        score, reason = score_candidates(knots, known, grid, stall_weight, bisect=bisect)
+        allowed = np.all(np.abs(grid[:, None] - knots[None, :]) >= min_spacing, axis=1)
+        if not allowed.any():
+            break
+        i = int(np.flatnonzero(allowed)[np.argmax(score[allowed])])
+        if score[i] <= tolerance:
+            break
+        proposals.append({'aoa': round(float(grid[i]), 6), 'score': float(score[i]), 'reason': str(reason[i])})
+        guess = PchipBatch.fit([knots], [known])([grid[i]])[0]
+        order = np.argsort(np.append(knots, grid[i]), kind='stable')
+        knots, known = np.append(knots, grid[i])[order], np.vstack([known, guess])[order]
+    return proposals
+
+
+def plan_job(job_dir, count=3, aoa_range=None, min_spacing=1.0, resolution=0.25, tolerance=0.0,
+             stall_weight=2.0):
+    """Propose the next AoAs for a job directory from its completed results."""
+    aoa, values = _samples(results_store.load_or_build(job_dir, save=False))
+    proposals = propose_aoas(aoa, values, count, aoa_range, min_spacing, resolution, tolerance, stall_weight)
+    return {'sampled': aoa.tolist(), 'proposals': proposals}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Propose the next angles of attack to simulate where the fitted curves are least certain',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python adaptive_aoa.py output/my_job
+  python adaptive_aoa.py output/my_job --count 4 --range -10 30
+  python adaptive_aoa.py output/my_job --tolerance 0.02 --json
+        """
+    )
+    parser.add_argument('job_dir', help='Job output directory with completed AoA results')
+    parser.add_argument('--count', '-n', type=int, default=3, help='Number of AoAs to propose (default: 3)')
+    parser.add_argument('--range', type=float, nargs=2, metavar=('MIN', 'MAX'), default=None,
+                        help='AoA range the sweep should cover (default: the sampled range)')
+    parser.add_argument('--min-spacing', type=float, default=1.0,
+                        help='Minimum distance in degrees from any other run (default: 1.0)')
+    parser.add_argument('--resolution', type=float, default=0.25,
+                        help='Proposed AoAs are multiples of this (default: 0.25)')
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='Propose nothing where scores (fractions of a coefficient range) are below this')
+    parser.add_argument('--stall-weight', type=float, default=2.0,
+                        help='Score multiplier around the highest Cl sample (default: 2.0)')
+    parser.add_argument('--json', action='store_true', help='Print the plan as JSON')
+    args = parser.parse_args(argv)
+
+    try:
+        plan = plan_job(args.job_dir, args.count, args.range, args.min_spacing, args.resolution,
+                        args.tolerance, args.stall_weight)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(plan, indent=2))
+        return
+    print(f"Sampled AoAs: {', '.join(f'{a:g}' for a in plan['sampled'])}")
+    if not plan['proposals']:
+        print("Curves are resolved to the requested tolerance; nothing to add.")
+    for proposal in plan['proposals']:
+        print(f"  {proposal['aoa']:g} deg  score {proposal['score']:.4f}  ({proposal['reason']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""Streaming animation writers for render sequences.
+
+Frames are read, resized and encoded one at a time, so peak memory is about
+one frame however long the sweep is. GIFs are assembled block by block: a
+shared palette is built once from a sample of the frames and written as the
+global colour table, each frame is quantized to it and encoded by PIL into a
+small in-memory GIF, and only that frame's image block is copied out.
+MP4/WebM output pipes raw frames into a local ffmpeg when one is installed.
+"""
+
+import io
+import os
+import shutil
+import struct
+import subprocess
+
+from PIL import Image
+
+# Frames sampled to build the shared GIF palette
+PALETTE_SAMPLES = 8
+PALETTE_THUMB = 320
+
+VIDEO_CODECS = {
+    '.mp4': ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-crf', '23', '-movflags', '+faststart'],
+    '.webm': ['-c:v', 'libvpx-vp9', '-pix_fmt', 'yuv420p', '-crf', '32', '-b:v', '0'],
+}
+
+
+def ffmpeg_available():
+    return shutil.which('ffmpeg') is not None
+
+
+def frame_size(path, scale=1.0, max_width=None, even=False):
+    """Output (width, height) for a frame file after scaling, without decoding it."""
+    with Image.open(path) as img:
+        width, height = img.size
+    if max_width and width * scale > max_width:
+        scale = max_width / width
+    width, height = max(1, round(width * scale)), max(1, round(height * scale))
+    if even:
+        # yuv420p needs even dimensions
+        width, height = width + width % 2, height + height % 2
+    return width, height
+
+
+def load_frame(path, size):
+    """Decode one frame as RGB at the given size."""
+    with Image.open(path) as img:
+        img = img.convert('RGB')
+        if img.size != size:
+            img = img.resize(size, Image.Resampling.LANCZOS)
+        return img
+
+
+def shared_palette(paths, colors=256, samples=PALETTE_SAMPLES):
+    """A "P" mode palette image quantized from thumbnails of evenly spaced frames."""
+    picks = sorted({round(i * (len(paths) - 1) / max(samples - 1, 1)) for i in range(min(samples, len(paths)))})
+    thumbs = []
+    for i in picks:
+        with Image.open(paths[i]) as img:
+            img = img.convert('RGB')
+            img.thumbnail((PALETTE_THUMB, PALETTE_THUMB))
+            thumbs.append(img)
+    strip = Image.new('RGB', (sum(t.width for t in thumbs), max(t.height for t in thumbs)))
+    x = 0
+    for thumb in thumbs:
+        strip.paste(thumb, (x, 0))
+        x += thumb.width
+    return strip.quantize(colors, method=Image.Quantize.MEDIANCUT)
+
+
+def _skip_sub_blocks(data, pos):
+    while data[pos]:
+        pos += data[pos] + 1
+    return pos + 1
+
+
+def _gif_parts(data):
+    """Split an encoded single-frame GIF into (global colour table, image block)."""
+    flags = data[10]
+    pos = 13
+    table = b''
+    if flags & 0x80:
+        size = 3 << ((flags & 0x07) + 1)
+        table = data[pos:pos + size]
+        pos += size
+    while data[pos] == 0x21:  # Extension blocks
+        pos = _skip_sub_blocks(data, pos + 2)
+    if data[pos] != 0x2C:
+        raise ValueError("No image descriptor in encoded GIF frame.")
+    start = pos
+    pos += 10
+    if data[start + 9] & 0x80:  # Local colour table
+        pos += 3 << ((data[start + 9] & 0x07) + 1)
+    pos = _skip_sub_blocks(data, pos + 1)  # LZW minimum code size, then data
+    return table, data[start:pos]
+
+
+class GifWriter:
+    """Write an animated GIF one frame at a time with one global palette."""
+
+    def __init__(self, path, size, palette, duration=300, loop=0, dither=False):
+        self.path = path
+        self.size = size
+        self.palette = palette
+        self.duration = duration
+        self.dither = Image.Dither.FLOYDSTEINBERG if dither else Image.Dither.NONE
+        self.n_frames = 0
+
+        raw = bytes(palette.getpalette()[:768]).ljust(768, b'\0')
+        self._table = raw
+        self._file = open(path, 'wb')
+        width, height = size
+        self._file.write(b'GIF89a')
+        # Logical screen: global colour table of 256 entries (size field 7)
+        self._file.write(struct.pack('<HHBBB', width, height, 0xF7, 0, 0))
+        self._file.write(raw)
+        # NETSCAPE2.0 application extension: loop count
+        self._file.write(b'\x21\xFF\x0BNETSCAPE2.0\x03\x01' + struct.pack('<H', loop) + b'\x00')
+
+    def add(self, img):
+        frame = img.quantize(palette=self.palette, dither=self.dither)
+        buf = io.BytesIO()
+        frame.save(buf, 'GIF', optimize=False)
+        table, block = _gif_parts(buf.getvalue())
+
+        # Graphic control extension: frame delay in 1/100 s
+        self._file.write(b'\x21\xF9\x04\x00' + struct.pack('<H', round(self.duration / 10)) + b'\x00\x00')
+        if not block[9] & 0x80 and table and table.ljust(768, b'\0') != self._table:
+            # PIL wrote a different table for this frame: attach it as a local colour table
+            bits = (len(table) // 3).bit_length() - 2
+            block = block[:9] + bytes([0x80 | bits]) + table + block[10:]
+        self._file.write(block)
+        self.n_frames += 1
+
+    def close(self):
+        if self._file:
+            self._file.write(b'\x3B')
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class VideoWriter:
+    """Pipe raw RGB frames into ffmpeg to write MP4 or WebM."""
+
+    def __init__(self, path, size, duration=300):
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in VIDEO_CODECS:
+            raise ValueError(f"Unsupported video format '{ext}'; use {', '.join(VIDEO_CODECS)}.")
+        if not ffmpeg_available():
+            raise RuntimeError("ffmpeg was not found on PATH.")
+        self.path = path
+        self.size = size
+        self.n_frames = 0
+        fps = 1000.0 / duration
+        command = ['ffmpeg', '-y', '-loglevel', 'error',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{size[0]}x{size[1]}', '-r', f'{fps:g}',
+                   '-i', '-'] + VIDEO_CODECS[ext] + [path]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def add(self, img):
+        self._process.stdin.write(img.tobytes())
+        self.n_frames += 1
+
+    def close(self):
+        if self._process:
+            self._process.stdin.close()
+            stderr = self._process.stderr.read().decode(errors='replace')
+            code = self._process.wait()
+            self._process = None
+            if code != 0:
+                raise RuntimeError(f"ffmpeg failed ({code}): {stderr.strip()}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_animation(paths, output_path, duration=300, scale=1.0, max_width=None, loop=0, dither=False):
+    """Stream the frame files into an animation; the format follows output_path's extension.
+
+    Returns a dict with the output path, frame count and frame size.
+    """
+    if not paths:
+        raise ValueError("No frames to animate.")
+
+    ext = os.path.splitext(output_path)[1].lower()
+    size = frame_size(paths[0], scale, max_width, even=ext in VIDEO_CODECS)
+    if ext == '.gif':
+        writer = GifWriter(output_path, size, shared_palette(paths), duration, loop, dither)
+    else:
+        writer = VideoWriter(output_path, size, duration)
+
+    with writer:
+        for path in paths:
+            writer.add(load_frame(path, size))
+    return {'output_file': output_path, 'frames': writer.n_frames, 'size': list(size)}
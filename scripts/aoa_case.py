@@ -0,0 +1,178 @@
+"""Set a meshed case up for one angle of attack by rotating the inflow.
+
+The disc stays level in one mesh, and the AoA is applied to the flow instead:
+the freestream velocity becomes U (cos a, sin a, 0) and forceCoeffs' dragDir
+and liftDir rotate with it, so the coefficients come out in the same wind
+axes as a run with the geometry rotated by -a (surfaceTransformPoints
+-rotate-z). Flow then crosses the yMin/yMax boundaries, so the inlet, outlet
+and side patches all get freestream conditions (freestreamVelocity,
+freestreamPressure, inletOutlet for k and omega).
+
+The 0/ fields are regenerated from the template case each time and the
+previous AoA's time, processor and postProcessing directories are removed,
+so one mesh serves a whole sweep.
+"""
+
+import argparse
+import math
+import os
+import re
+import shutil
+import sys
+
+FARFIELD_PATCHES = ('inlet', 'outlet', 'yMin', 'yMax')
+FIELDS = ('U', 'p', 'k', 'omega', 'nut')
+
+
+def freestream(aoa, speed):
+    a = math.radians(aoa)
+    return (speed * math.cos(a), speed * math.sin(a), 0.0)
+
+
+def force_directions(aoa):
+    """(liftDir, dragDir) for a freestream rotated by aoa degrees about z."""
+    a = math.radians(aoa)
+    return (-math.sin(a), math.cos(a), 0.0), (math.cos(a), math.sin(a), 0.0)
+
+
+def _vector(v):
+    return '(' + ' '.join(f"{c:.9g}" if abs(c) > 1e-12 else '0' for c in v) + ')'
+
+
+def set_keyword(text, key, value):
+    """Replace the value of the first `key value;` entry."""
+    pattern = re.compile(rf'^(\s*{re.escape(key)}\s+)[^;\n]*;', re.M)
+    text, n = pattern.subn(lambda m: f"{m.group(1)}{value};", text, count=1)
+    if n == 0:
+        raise ValueError(f"No '{key}' entry found.")
+    return text
+
+
+def patch_body(text, patch):
+    match = re.search(rf'^\s*{re.escape(patch)}\s*\{{([^{{}}]*)\}}', text, re.M)
+    if not match:
+        raise ValueError(f"No boundaryField entry for patch '{patch}'.")
+    return match.group(1)
+
+
+def set_patch(text, patch, entries):
+    """Replace the body of a boundaryField patch entry."""
+    body = ''.join(f"        {key:<16}{value};\n" for key, value in entries.items())
+    pattern = re.compile(rf'^(\s*{re.escape(patch)}\s*\{{)[^{{}}]*(\}})', re.M)
+    text, n = pattern.subn(lambda m: f"{m.group(1)}\n{body}    {m.group(2)}", text, count=1)
+    if n == 0:
+        raise ValueError(f"No boundaryField entry for patch '{patch}'.")
+    return text
+
+
+def inlet_value(text):
+    """The `value` of the inlet patch, e.g. 'uniform 0.001' or 'uniform (26.9 0 0)'."""
+    match = re.search(r'\bvalue\s+([^;]*);', patch_body(text, 'inlet'))
+    if not match:
+        raise ValueError("The inlet patch has no value.")
+    return match.group(1).strip()
+
+
+def inlet_speed(u_text):
+    components = re.findall(r'[-+0-9.eE]+', inlet_value(u_text))
+    return math.sqrt(sum(float(c) ** 2 for c in components))
+
+
+def farfield_entries(field, aoa, speed, template_text):
+    if field == 'U':
+        return {'type': 'freestreamVelocity', 'freestreamValue': f"uniform {_vector(freestream(aoa, speed))}",
+                'value': f"uniform {_vector(freestream(aoa, speed))}"}
+    if field == 'p':
+        return {'type': 'freestreamPressure', 'freestreamValue': 'uniform 0', 'value': 'uniform 0'}
+    if field == 'nut':
+        return {'type': 'calculated', 'value': 'uniform 0'}
+    value = inlet_value(template_text)
+    return {'type': 'inletOutlet', 'inletValue': value, 'value': value}
+
+
+def reset_case(case_dir):
+    """Remove results of a previous AoA: time directories after 0, processor* and postProcessing."""
+    removed = []
+    for name in os.listdir(case_dir):
+        path = os.path.join(case_dir, name)
+        if not os.path.isdir(path):
+            continue
+        try:
+            is_result = float(name) > 0
+        except ValueError:
+            is_result = name.startswith('processor') or name == 'postProcessing'
+        if is_result:
+            shutil.rmtree(path)
+            removed.append(name)
+    return sorted(removed)
+
+
+def write_aoa_case(case_dir, aoa, template_dir='base-case', speed=None, reset=True):
+    """Write 0/ and the forceCoeffs directions of case_dir for one AoA (degrees)."""
+    removed = reset_case(case_dir) if reset else []
+
+    with open(os.path.join(template_dir, '0', 'U'), 'r') as f:
+        u_template = f.read()
+    if speed is None:
+        speed = inlet_speed(u_template)
+
+    os.makedirs(os.path.join(case_dir, '0'), exist_ok=True)
+    for field in FIELDS:
+        template_path = os.path.join(template_dir, '0', field)
+        if not os.path.exists(template_path):
+            continue
+        with open(template_path, 'r') as f:
+            text = f.read()
+        template_text = text
+        for patch in FARFIELD_PATCHES:
+            text = set_patch(text, patch, farfield_entries(field, aoa, speed, template_text))
+        with open(os.path.join(case_dir, '0', field), 'w') as f:
+            f.write(text)
+
+    control_path = os.path.join(case_dir, 'system', 'controlDict')
+    with open(control_path, 'r') as f:
+        control = f.read()
+    lift_dir, drag_dir = force_directions(aoa)
+    control = set_keyword(control, 'liftDir', _vector(lift_dir))
+    control = set_keyword(control, 'dragDir', _vector(drag_dir))
+    control = set_keyword(control, 'magUInf', f"{speed:g}")
+    with open(control_path, 'w') as f:
+        f.write(control)
+
+    print(f"Case {case_dir} set to AoA {aoa:g} deg: U = {_vector(freestream(aoa, speed))}, "
+          f"liftDir = {_vector(lift_dir)}, dragDir = {_vector(drag_dir)}")
+    if removed:
+        print(f"Removed previous results: {', '.join(removed)}")
+    return {'aoa': aoa, 'U': freestream(aoa, speed), 'liftDir': lift_dir, 'dragDir': drag_dir, 'removed': removed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Set a meshed OpenFOAM case up for one angle of attack by rotating the freestream',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python aoa_case.py run/my_job 5.0
+  python aoa_case.py run/my_job -2.5 --template base-case --speed 30
+  python aoa_case.py run/my_job 10 --no-reset
+        """
+    )
+    parser.add_argument('case_dir', help='Meshed case directory (with system/controlDict)')
+    parser.add_argument('aoa', type=float, help='Angle of attack in degrees')
+    parser.add_argument('--template', default='base-case',
+                        help='Case whose 0/ fields are the starting point (default: base-case)')
+    parser.add_argument('--speed', type=float, default=None,
+                        help='Freestream speed in m/s (default: the template inlet speed)')
+    parser.add_argument('--no-reset', dest='reset', action='store_false',
+                        help='Keep time, processor and postProcessing directories of a previous run')
+    args = parser.parse_args(argv)
+
+    try:
+        write_aoa_case(args.case_dir, args.aoa, args.template, args.speed, args.reset)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from coeff_model import CoefficientModel
+from flight import launch_grid, load_job_model, simulate
+
+# Parse command line arguments
+parser = argparse.ArgumentParser(
+    description='Benchmark batched disc flight simulation (throws per second)',
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="""
+Examples:
+  python bench_flight.py
+  python bench_flight.py output/my_job --batch 100 1000 10000
+  python bench_flight.py --batch 5000 --dt 0.005 --loop 20
+    """
+)
+parser.add_argument('model', nargs='?', default=None,
+                    help='Job directory or coefficient model (default: a synthetic disc model)')
+parser.add_argument('--batch', type=int, nargs='+', default=[1, 100, 1000, 10000],
+                    help='Batch sizes to time (default: 1 100 1000 10000)')
+parser.add_argument('--dt', type=float, default=0.01, help='Time step in s (default: 0.01)')
+parser.add_argument('--loop', type=int, default=10,
+                    help='Throws to time one at a time for comparison (default: 10, 0 to skip)')
+args = parser.parse_args()
+
+if args.model:
+    try:
+        model = load_job_model(args.model)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+else:
+    # Linear-lift, quadratic-drag disc over the usual sweep range
+    aoa = np.arange(-10.0, 30.1, 2.5)
+    alpha = np.radians(aoa)
+    model = CoefficientModel.fit(aoa, {'Cl': 0.15 + 1.4 * alpha, 'Cd': 0.08 + 2.72 * (alpha + 0.05) ** 2,
+                                       'CmPitch': -0.01 + 0.057 * alpha})
+
+rng = np.random.default_rng(0)
+
+
+def random_launch(n):
+    return {
+        'speed': rng.uniform(15, 30, n),
+        'spin': rng.uniform(600, 1400, n),
+        'hyzer': rng.uniform(-20, 20, n),
+        'nose': rng.uniform(-5, 5, n),
+        'launch_angle': rng.uniform(0, 15, n),
+    }
+
+
+throws_per_second = {}
+for n in args.batch:
+    launch = random_launch(n)
+    start = time.perf_counter()
+    result = simulate(model, launch, dt=args.dt)
+    elapsed = time.perf_counter() - start
+    throws_per_second[n] = n / elapsed
+    print(f"Batch of {n:>6}: {elapsed * 1000:9.1f} ms, {n / elapsed:10.0f} throws/s, "
+          f"mean distance {np.nanmean(result['distance']):.1f} m, "
+          f"mean flight {np.nanmean(result['flight_time']):.2f} s")
+
+if args.loop:
+    launch = random_launch(args.loop)
+    start = time.perf_counter()
+    for i in range(args.loop):
+        simulate(model, {name: values[i] for name, values in launch.items()}, dt=args.dt)
+    elapsed = time.perf_counter() - start
+    print(f"One at a time: {args.loop / elapsed:.0f} throws/s")
+    best = max(throws_per_second.values())
+    print(f"Batched speedup: {best / (args.loop / elapsed):.0f}x")
+
+grid = launch_grid(speed=np.linspace(18, 30, 7), hyzer=np.linspace(-15, 15, 7), nose=np.linspace(-4, 4, 5))
+start = time.perf_counter()
+simulate(model, grid, dt=args.dt)
+elapsed = time.perf_counter() - start
+n_grid = len(grid['speed'])
+print(f"Launch grid of {n_grid} throws (speed x hyzer x nose): {elapsed * 1000:.1f} ms")
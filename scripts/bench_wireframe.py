@@ -0,0 +1,101 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from polymesh import read_points, read_faces
+from wireframe import plane_edges, draw_edges
+
+# Parse command line arguments
+parser = argparse.ArgumentParser(
+    description='Benchmark the vectorized wireframe engine against the per-edge Python path',
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="""
+Examples:
+  python bench_wireframe.py ./run/
+  python bench_wireframe.py ./run/ --tolerance 0.05 --repeat 5
+    """
+)
+parser.add_argument('sol_dir', help='Path to OpenFOAM case containing constant/polyMesh')
+parser.add_argument('--tolerance', type=float, default=0.02, help='Z-tolerance for near-plane edges (default: 0.02)')
+parser.add_argument('--width', '-w', type=int, default=1920, help='Image width in pixels (default: 1920)')
+parser.add_argument('--height', type=int, default=1080, help='Image height in pixels (default: 1080)')
+parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions of the vectorized path (default: 3)')
+parser.add_argument('--skip-legacy', action='store_true', help='Only time the vectorized path (for very large meshes)')
+args = parser.parse_args()
+
+polyMesh_dir = os.path.join(args.sol_dir, 'constant', 'polyMesh')
+if not os.path.isdir(polyMesh_dir):
+    print(f"Error: polyMesh directory '{polyMesh_dir}' does not exist.")
+    sys.exit(1)
+
+points = read_points(polyMesh_dir)
+face_offsets, face_labels = read_faces(polyMesh_dir)
+n_faces = len(face_offsets) - 1
+tol = args.tolerance
+w, h = args.width, args.height
+print(f"Mesh: {len(points)} points, {n_faces} faces, {len(face_labels)} face labels")
+
+# Frame the whole near-plane region of the mesh
+near = np.abs(points[:, 2]) < tol
+xy = points[near, :2] if near.any() else points[:, :2]
+bounds = (xy[:, 0].min(), xy[:, 0].max(), xy[:, 1].min(), xy[:, 1].max())
+
+
+# The original render_mesh.py path: per-face Python loops, set() dedup, one cv2.line per edge
+def legacy_render():
+    edges = []
+    for fi in range(n_faces):
+        face = face_labels[face_offsets[fi]:face_offsets[fi + 1]]
+        for k in range(len(face)):
+            v1 = face[k]
+            v2 = face[(k + 1) % len(face)]
+            if v1 > v2:
+                v1, v2 = v2, v1
+            if abs((points[v1][2] + points[v2][2]) / 2) < tol:
+                edges.append((v1, v2))
+    edges = list(set(edges))
+
+    x_min, x_max, y_min, y_max = bounds
+    img = np.ones((h, w, 3), dtype=np.uint8) * 255
+    for v1, v2 in edges:
+        p1 = points[v1][:2]
+        p2 = points[v2][:2]
+        if (x_min <= p1[0] <= x_max and y_min <= p1[1] <= y_max) or \
+           (x_min <= p2[0] <= x_max and y_min <= p2[1] <= y_max):
+            px1 = int((p1[0] - x_min) / (x_max - x_min) * (w - 1))
+            py1 = int((y_max - p1[1]) / (y_max - y_min) * (h - 1))
+            px2 = int((p2[0] - x_min) / (x_max - x_min) * (w - 1))
+            py2 = int((y_max - p2[1]) / (y_max - y_min) * (h - 1))
+            cv2.line(img, (px1, py1), (px2, py2), (0, 0, 0), 1)
+    return img, len(edges)
+
+
+def vectorized_render():
+    edges = plane_edges(points, face_offsets, face_labels, tol)
+    img = np.ones((h, w, 3), dtype=np.uint8) * 255
+    draw_edges(img, points, edges, bounds)
+    return img, len(edges)
+
+
+timings = []
+for _ in range(max(args.repeat, 1)):
+    start = time.perf_counter()
+    fast_img, fast_edges = vectorized_render()
+    timings.append(time.perf_counter() - start)
+fast_time = min(timings)
+print(f"Vectorized: {fast_edges} edges in {fast_time * 1000:.1f} ms "
+      f"({len(face_labels) / fast_time / 1e6:.1f} M face labels/s)")
+
+if not args.skip_legacy:
+    start = time.perf_counter()
+    slow_img, slow_edges = legacy_render()
+    slow_time = time.perf_counter() - start
+    print(f"Legacy:     {slow_edges} edges in {slow_time * 1000:.1f} ms "
+          f"({len(face_labels) / slow_time / 1e6:.2f} M face labels/s)")
+    print(f"Speedup: {slow_time / fast_time:.1f}x")
+    if slow_edges != fast_edges or not np.array_equal(slow_img, fast_img):
+        print("Warning: legacy and vectorized renders differ.")
@@ -0,0 +1,222 @@
+"""Content-addressed cache of solved AoAs.
+
+Every AoA is keyed by a SHA-256 over the bytes of the STL, the case files
+that decide the flow (`CASE_FILES` of the template case: controlDict,
+fvSchemes, fvSolution, snappyHexMeshDict, blockMeshDict, the initial and
+boundary conditions and the physical properties), the run settings (AoA
+mode, end time, convergence settings) and the AoA itself. The job name plays
+no part, so resubmitting a model under another name still hits.
+
+An entry is a copy of the AoA's output folder (results.json, renders,
+coefficient history, solver log, ...) in cache/<key[:2]>/<key>/, with
+entry.json describing what it was computed from. Entries are written to a
+temporary folder and renamed into place, so a half-written entry is never
+served. `lookup` tells which AoAs of a request are cached, `restore` copies
+an entry into a new job's AoA folder and `entries` lists the whole index.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+CACHE_DIR = "cache"
+ENTRY_NAME = "entry.json"
+TEMPLATE_DIR = "base-case"
+
+# Template files whose contents change the solution (not decomposeParDict: rank count only)
+CASE_FILES = (
+    'system/controlDict',
+    'system/fvSchemes',
+    'system/fvSolution',
+    'system/snappyHexMeshDict',
+    'system/blockMeshDict',
+    'system/surfaceFeatureExtractDict',
+    'constant/transportProperties',
+    'constant/turbulenceProperties',
+    '0/U',
+    '0/p',
+    '0/k',
+    '0/omega',
+    '0/nut',
+)
+
+_HASH_CHUNK = 1 << 20
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def case_settings(aoa_mode='rotate-geometry', end_time=1200, convergence=None):
+    """Run settings that are part of the key, in a canonical form."""
+    return {'aoa_mode': aoa_mode, 'end_time': float(end_time),
+            'convergence': {} if convergence is None else convergence}
+
+
+def case_digest(model_path, template_dir=TEMPLATE_DIR, settings=None, model_sha256=None):
+    """Hash of everything but the AoA: STL bytes, template case files and run settings."""
+    digest = hashlib.sha256()
+    digest.update(b'stl\0' + (model_sha256 or file_sha256(model_path)).encode())
+    for name in CASE_FILES:
+        path = os.path.join(template_dir, name)
+        # A missing file hashes differently from an empty one
+        content = file_sha256(path).encode() if os.path.exists(path) else b'-'
+        digest.update(b'\0' + name.encode() + b'\0' + content)
+    settings = case_settings() if settings is None else settings
+    digest.update(b'\0settings\0' + json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def aoa_key(digest, aoa):
+    """Cache key of one AoA of a case; 5, 5.0 and "5" give the same key."""
+    return hashlib.sha256(f"{digest}\0aoa={float(aoa)!r}".encode()).hexdigest()
+
+
+def entry_dir(key, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, key[:2], key)
+
+
+def lookup(model_path, aoas, template_dir=TEMPLATE_DIR, settings=None, cache_dir=CACHE_DIR):
+    """{'case', 'model_sha256', 'entries': [{'aoa', 'key', 'cached'}]} with entries in the order of aoas."""
+    model_sha256 = file_sha256(model_path)
+    digest = case_digest(model_path, template_dir, settings, model_sha256)
+    entries = []
+    for aoa in aoas:
+        key = aoa_key(digest, aoa)
+        cached = os.path.exists(os.path.join(entry_dir(key, cache_dir), ENTRY_NAME))
+        entries.append({'aoa': aoa, 'key': key, 'cached': cached})
+    return {'case': digest, 'model_sha256': model_sha256, 'entries': entries}
+
+
+def store(key, aoa_dir, meta=None, cache_dir=CACHE_DIR):
+    """Copy a finished AoA folder into the cache; an existing entry is kept. Returns the entry."""
+    target = entry_dir(key, cache_dir)
+    if os.path.exists(os.path.join(target, ENTRY_NAME)):
+        return read_entry(target)
+    if not os.path.exists(os.path.join(aoa_dir, 'results.json')):
+        raise FileNotFoundError(f"No results.json in {aoa_dir}")
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = f"{target}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    shutil.copytree(aoa_dir, tmp)
+    entry = dict(meta or {})
+    entry.update({
+        'key': key,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'source': aoa_dir,
+        'files': sorted(os.path.relpath(os.path.join(root, name), tmp)
+                        for root, _, names in os.walk(tmp) for name in names),
+    })
+    with open(os.path.join(tmp, ENTRY_NAME), 'w') as f:
+        json.dump(entry, f, indent=2)
+    try:
+        os.rename(tmp, target)
+    except OSError:
+        # Another process stored the same key first
+        shutil.rmtree(tmp, ignore_errors=True)
+    return read_entry(target)
+
+
+def read_entry(path):
+    with open(os.path.join(path, ENTRY_NAME), 'r') as f:
+        return json.load(f)
+
+
+def restore(key, aoa_dir, cache_dir=CACHE_DIR):
+    """Copy a cached entry into aoa_dir and return its results.json contents."""
+    source = entry_dir(key, cache_dir)
+    if not os.path.exists(os.path.join(source, ENTRY_NAME)):
+        raise FileNotFoundError(f"No cache entry {key}")
+    shutil.copytree(source, aoa_dir, dirs_exist_ok=True, ignore=shutil.ignore_patterns(ENTRY_NAME))
+    with open(os.path.join(aoa_dir, 'results.json'), 'r') as f:
+        return json.load(f)
+
+
+def entries(cache_dir=CACHE_DIR, model_path=None):
+    """Every cache entry, optionally only those of one STL's contents, oldest first."""
+    model_sha = file_sha256(model_path) if model_path else None
+    found = []
+    for path in glob.glob(os.path.join(cache_dir, '*', '*', ENTRY_NAME)):
+        entry = read_entry(os.path.dirname(path))
+        if model_sha is None or entry.get('model_sha256') == model_sha:
+            found.append(entry)
+    return sorted(found, key=lambda entry: (entry.get('created', ''), entry.get('aoa', 0)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Look up, list, store and restore cached AoA results',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python case_cache.py lookup models/driver.stl 0 5 10
+  python case_cache.py lookup models/driver.stl 0 5 10 --aoa-mode rotate-inflow --end-time 2000
+  python case_cache.py list
+  python case_cache.py list --model models/driver.stl
+  python case_cache.py store models/driver.stl 5 output/my_job/5
+  python case_cache.py restore models/driver.stl 5 output/other_job/5
+        """
+    )
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    lookup_parser = sub.add_parser('lookup', help='Show which AoAs of a model are already computed')
+    lookup_parser.add_argument('model_path')
+    lookup_parser.add_argument('aoas', nargs='+', type=float)
+
+    list_parser = sub.add_parser('list', help='List every cache entry')
+    list_parser.add_argument('--model', default=None, help='Only entries of this STL')
+
+    store_parser = sub.add_parser('store', help='Add a finished AoA folder to the cache')
+    restore_parser = sub.add_parser('restore', help='Copy a cached AoA into an output folder')
+    for p in (store_parser, restore_parser):
+        p.add_argument('model_path')
+        p.add_argument('aoa', type=float)
+        p.add_argument('aoa_dir')
+
+    for p in (lookup_parser, store_parser, restore_parser):
+        p.add_argument('--template-dir', default=TEMPLATE_DIR, help=f'Template case (default: {TEMPLATE_DIR})')
+        p.add_argument('--aoa-mode', default='rotate-geometry', help='AoA mode (default: rotate-geometry)')
+        p.add_argument('--end-time', type=float, default=1200, help='Solver end time (default: 1200)')
+        p.add_argument('--convergence', default='{}',
+                       help='Convergence settings as JSON, false when disabled (default: {})')
+    for p in (lookup_parser, list_parser, store_parser, restore_parser):
+        p.add_argument('--cache-dir', default=CACHE_DIR, help=f'Cache directory (default: {CACHE_DIR})')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'list':
+            for entry in entries(args.cache_dir, args.model):
+                print(f"{entry['key'][:12]}  {entry.get('model', '?'):<30} AoA {entry.get('aoa', '?'):>6}  "
+                      f"{entry.get('created', '')}  from {entry.get('source', '?')}")
+            return
+        settings = case_settings(args.aoa_mode, args.end_time, json.loads(args.convergence))
+        if args.command == 'lookup':
+            result = lookup(args.model_path, args.aoas, args.template_dir, settings, args.cache_dir)
+            for entry in result['entries']:
+                print(f"AoA {entry['aoa']:>6g}  {'cached ' if entry['cached'] else 'missing'}  {entry['key'][:12]}")
+            return
+        key = aoa_key(case_digest(args.model_path, args.template_dir, settings), args.aoa)
+        if args.command == 'store':
+            entry = store(key, args.aoa_dir, {'model': args.model_path, 'model_sha256': file_sha256(args.model_path),
+                                              'aoa': args.aoa, 'settings': settings}, args.cache_dir)
+            print(f"Stored {args.aoa_dir} as {entry['key']}")
+        else:
+            restore(key, args.aoa_dir, args.cache_dir)
+            print(f"Restored {key} to {args.aoa_dir}")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
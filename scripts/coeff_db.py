@@ -0,0 +1,332 @@
+"""Cross-job coefficient database.
+
+An SQLite file (default `output/coefficients.db`) indexes every job under
+`output/`: its AoA samples and, per coefficient, the fitted PCHIP curve as
+piecewise-cubic breakpoints and coefficients. `sync` only re-reads jobs whose
+coefficient store changed. Queries evaluate the stored curves of all jobs at
+once with `pchip_batch.PchipBatch`, producing a whole (n_jobs, n_points)
+table per coefficient.
+"""
+
+import argparse
+import json
+import operator
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+import results_store
+from pchip_batch import PchipBatch
+
+DEFAULT_DB = os.path.join('output', 'coefficients.db')
+COEFFICIENTS = ('Cl', 'Cd', 'CmPitch')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    path TEXT NOT NULL,
+    store_mtime_ns INTEGER NOT NULL,
+    store_size INTEGER NOT NULL,
+    n_aoa INTEGER NOT NULL,
+    aoa_min REAL,
+    aoa_max REAL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    aoa REAL NOT NULL,
+    cl REAL,
+    cd REAL,
+    cd_pressure REAL,
+    cd_viscous REAL,
+    cm_pitch REAL,
+    extra TEXT,
+    PRIMARY KEY (job_id, aoa)
+);
+CREATE INDEX IF NOT EXISTS samples_aoa ON samples (aoa);
+CREATE TABLE IF NOT EXISTS curves (
+    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    coefficient TEXT NOT NULL,
+    breakpoints BLOB NOT NULL,
+    coefficients BLOB NOT NULL,
+    PRIMARY KEY (job_id, coefficient)
+);
+"""
+
+OPERATORS = {'<=': operator.le, '>=': operator.ge, '<': operator.lt, '>': operator.gt,
+             '==': operator.eq, '=': operator.eq, '!=': operator.ne}
+JOB_COLUMNS = ('n_aoa', 'aoa_min', 'aoa_max')
+
+
+class CoefficientDB:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _store_job(self, name, job_dir, st, table):
+        cd = results_store.total_drag(table)
+        aoa = table['aoa']
+        self.conn.execute('DELETE FROM jobs WHERE name = ?', (name,))
+        cur = self.conn.execute(
+            'INSERT INTO jobs (name, path, store_mtime_ns, store_size, n_aoa, aoa_min, aoa_max, updated) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (name, job_dir, st.st_mtime_ns, st.st_size, len(aoa),
+             float(aoa.min()) if len(aoa) else None, float(aoa.max()) if len(aoa) else None, time.time()))
+        job_id = cur.lastrowid
+
+        keys = [k for k in results_store.value_keys(table) if k not in results_store.COEFFICIENTS]
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(job_id, float(aoa[i]), float(table['Cl'][i]), float(cd[i]), float(table['CdPressure'][i]),
+              float(table['CdViscous'][i]), float(table['CmPitch'][i]),
+              json.dumps({k: float(table[k][i]) for k in keys}))
+             for i in range(len(aoa))])
+
+        # Fit only where the values are known and the AoA points are distinct
+        for coefficient, values in (('Cl', table['Cl']), ('Cd', cd), ('CmPitch', table['CmPitch'])):
+            ok = np.isfinite(values)
+            x, keep = np.unique(aoa[ok], return_index=True)
+            if len(x) < 2:
+                continue
+            bp, c = PchipBatch.fit([x], [values[ok][keep]]).curve(0)
+            self.conn.execute('INSERT INTO curves VALUES (?, ?, ?, ?)',
+                              (job_id, coefficient, bp.astype(np.float64).tobytes(),
+                               np.ascontiguousarray(c, dtype=np.float64).tobytes()))
+
+    def sync(self, output_dir='output'):
+        """Index new or changed jobs under output_dir and drop vanished ones; returns counts."""
+        known = {name: (mtime, size) for name, mtime, size in
+                 self.conn.execute('SELECT name, store_mtime_ns, store_size FROM jobs')}
+        seen, updated = set(), 0
+        for name in sorted(os.listdir(output_dir)):
+            job_dir = os.path.join(output_dir, name)
+            if not os.path.isdir(job_dir):
+                continue
+            store = results_store.store_path(job_dir)
+            if not os.path.exists(store):
+                # Convert jobs that predate the store; skip folders without any results
+                table = results_store.build_results(job_dir, save=False)
+                if table['aoa'].size == 0:
+                    continue
+                results_store.save_results(job_dir, table)
+            seen.add(name)
+            st = os.stat(store)
+            if known.get(name) == (st.st_mtime_ns, st.st_size):
+                continue
+            self._store_job(name, job_dir, st, results_store.load_results(job_dir))
+            updated += 1
+
+        removed = [name for name in known if name not in seen]
+        self.conn.executemany('DELETE FROM jobs WHERE name = ?', [(name,) for name in removed])
+        self.conn.commit()
+        return {'jobs': len(seen), 'updated': updated, 'removed': len(removed)}
+
+    def jobs(self, pattern=None):
+        """Job rows (dicts), optionally filtered by a shell-style name pattern."""
+        query = 'SELECT id, name, path, n_aoa, aoa_min, aoa_max FROM jobs'
+        params = ()
+        if pattern:
+            query += ' WHERE name GLOB ?'
+            params = (pattern,)
+        columns = ('id', 'name', 'path', 'n_aoa', 'aoa_min', 'aoa_max')
+        return [dict(zip(columns, row)) for row in self.conn.execute(query + ' ORDER BY name', params)]
+
+    def curves(self, coefficient, job_ids):
+        """Breakpoints and coefficients of one coefficient's curve for each job id (None if unfitted)."""
+        rows = {}
+        for start in range(0, len(job_ids), 500):
+            chunk = job_ids[start:start + 500]
+            marks = ','.join('?' * len(chunk))
+            for job_id, bp, c in self.conn.execute(
+                    f'SELECT job_id, breakpoints, coefficients FROM curves '
+                    f'WHERE coefficient = ? AND job_id IN ({marks})', (coefficient, *chunk)):
+                bp = np.frombuffer(bp, dtype=np.float64)
+                rows[job_id] = (bp, np.frombuffer(c, dtype=np.float64).reshape(4, len(bp) - 1))
+        return [rows.get(job_id) for job_id in job_ids]
+
+    def evaluate(self, aoa, coefficients=COEFFICIENTS, pattern=None, extrapolate=False):
+        """Fitted values of every matching job: (jobs, {coefficient: (n_jobs, n_points)})."""
+        jobs = self.jobs(pattern)
+        ids = [job['id'] for job in jobs]
+        n_points = len(np.atleast_1d(aoa))
+        values = {}
+        for coefficient in coefficients:
+            curves = self.curves(coefficient, ids)
+            fitted = [i for i, curve in enumerate(curves) if curve is not None]
+            table = np.full((len(jobs), n_points), np.nan)
+            if fitted:
+                batch = PchipBatch.from_ppoly([curves[i][0] for i in fitted], [curves[i][1] for i in fitted])
+                table[fitted] = batch(aoa, extrapolate)
+            values[coefficient] = table
+        return jobs, values
+
+    def metric(self, expression, aoa, pattern=None, extrapolate=False):
+        """Evaluate 'Cl', 'Cd', 'CmPitch' or a ratio like 'Cl/Cd'; returns (jobs, (n_jobs, n_points))."""
+        names = expression.split('/')
+        if len(names) > 2 or any(name not in COEFFICIENTS for name in names):
+            raise ValueError(f"Unknown metric '{expression}'; use one of {', '.join(COEFFICIENTS)} or A/B.")
+        jobs, values = self.evaluate(aoa, tuple(dict.fromkeys(names)), pattern, extrapolate)
+        result = values[names[0]]
+        if len(names) == 2:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = result / values[names[1]]
+        return jobs, result
+
+    def rank(self, expression, aoa, top=10, where=(), pattern=None, ascending=False, extrapolate=False):
+        """Jobs ordered by a metric at one AoA, after applying filters like 'Cd<0.2' or 'n_aoa>=5'."""
+        filters = [parse_filter(text) for text in where]
+        coefficients = tuple(dict.fromkeys(name for name, _, _ in filters if name in COEFFICIENTS))
+        jobs, score = self.metric(expression, [aoa], pattern, extrapolate)
+        score = score[:, 0]
+        keep = np.isfinite(score)
+        if coefficients:
+            _, values = self.evaluate([aoa], coefficients, pattern, extrapolate)
+        for name, op, threshold in filters:
+            if name in COEFFICIENTS:
+                column = values[name][:, 0]
+            else:
+                column = np.array([np.nan if job[name] is None else job[name] for job in jobs], dtype=float)
+            with np.errstate(invalid='ignore'):
+                keep &= OPERATORS[op](column, threshold)
+        order = np.flatnonzero(keep)
+        order = order[np.argsort(score[order] if ascending else -score[order], kind='stable')]
+        return [dict(jobs[i], score=float(score[i])) for i in order[:top]]
+
+    def samples(self, aoa=None, tolerance=1e-6, pattern=None):
+        """Stored (not interpolated) samples, optionally only those at a given AoA."""
+        query = ('SELECT jobs.name, samples.aoa, cl, cd, cd_pressure, cd_viscous, cm_pitch '
+                 'FROM samples JOIN jobs ON jobs.id = samples.job_id WHERE 1')
+        params = []
+        if aoa is not None:
+            query += ' AND samples.aoa BETWEEN ? AND ?'
+            params += [aoa - tolerance, aoa + tolerance]
+        if pattern:
+            query += ' AND jobs.name GLOB ?'
+            params.append(pattern)
+        columns = ('name', 'aoa', 'Cl', 'Cd', 'CdPressure', 'CdViscous', 'CmPitch')
+        return [dict(zip(columns, row)) for row in self.conn.execute(query + ' ORDER BY jobs.name, samples.aoa', params)]
+
+
+def parse_filter(text):
+    """Parse 'NAME<op>VALUE', e.g. 'Cd<0.2' or 'aoa_max>=10'."""
+    match = re.fullmatch(r'\s*(\w+)\s*(<=|>=|==|!=|<|>|=)\s*([-+0-9.eE]+)\s*', text)
+    if not match or match.group(1) not in COEFFICIENTS + JOB_COLUMNS:
+        raise ValueError(f"Invalid filter '{text}'; expected NAME<op>VALUE with NAME in "
+                         f"{', '.join(COEFFICIENTS + JOB_COLUMNS)}.")
+    return match.group(1), match.group(2), float(match.group(3))
+
+
+def _print_table(header, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) if rows else len(str(h)) for i, h in enumerate(header)]
+    print('  '.join(str(h).ljust(w) for h, w in zip(header, widths)))
+    for row in rows:
+        print('  '.join(str(v).ljust(w) for v, w in zip(row, widths)))
+
+
+def _fmt(value):
+    return 'nan' if value is None or not np.isfinite(value) else f"{value:.5g}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Index every job\'s coefficients and query them across jobs',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python coeff_db.py sync
+  python coeff_db.py list --name 'putter*'
+  python coeff_db.py rank --metric Cl/Cd --aoa 5 --top 10
+  python coeff_db.py rank --metric Cd --aoa 0 --ascending --where 'Cl>0.1' --where 'n_aoa>=5'
+  python coeff_db.py compare --name 'driver*' --aoa -5 0 5 10 --coefficient Cl
+  python coeff_db.py samples --aoa 5
+        """
+    )
+    parser.add_argument('--db', default=DEFAULT_DB, help=f'Database file (default: {DEFAULT_DB})')
+    parser.add_argument('--output-dir', default='output', help='Jobs directory to sync from (default: output)')
+    parser.add_argument('--no-sync', action='store_true', help='Query without syncing changed jobs first')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('sync', help='Index new and changed jobs')
+
+    list_parser = sub.add_parser('list', help='List indexed jobs')
+    list_parser.add_argument('--name', help='Shell-style job name pattern')
+
+    rank = sub.add_parser('rank', help='Rank jobs by a fitted metric at one AoA')
+    rank.add_argument('--metric', default='Cl/Cd', help='Cl, Cd, CmPitch or a ratio such as Cl/Cd (default: Cl/Cd)')
+    rank.add_argument('--aoa', type=float, required=True, help='Angle of attack in degrees')
+    rank.add_argument('--top', type=int, default=10, help='Number of jobs to show (default: 10)')
+    rank.add_argument('--ascending', action='store_true', help='Lowest first')
+    rank.add_argument('--where', action='append', default=[], help="Filter such as 'Cd<0.2' or 'aoa_max>=10'")
+    rank.add_argument('--name', help='Shell-style job name pattern')
+    rank.add_argument('--extrapolate', action='store_true', help='Allow AoAs outside a job\'s sampled range')
+
+    compare = sub.add_parser('compare', help='Tabulate fitted values of several jobs')
+    compare.add_argument('jobs', nargs='*', help='Job names (default: all, or --name)')
+    compare.add_argument('--name', help='Shell-style job name pattern')
+    compare.add_argument('--aoa', type=float, nargs='+', default=[0.0], help='Angles of attack (default: 0)')
+    compare.add_argument('--coefficient', '-c', default='Cl', help='Coefficient or ratio (default: Cl)')
+    compare.add_argument('--extrapolate', action='store_true', help='Allow AoAs outside a job\'s sampled range')
+
+    samples = sub.add_parser('samples', help='Show stored samples')
+    samples.add_argument('--aoa', type=float, default=None, help='Only samples at this AoA')
+    samples.add_argument('--name', help='Shell-style job name pattern')
+
+    args = parser.parse_args(argv)
+
+    try:
+        with CoefficientDB(args.db) as db:
+            if args.command == 'sync' or not args.no_sync:
+                counts = db.sync(args.output_dir)
+                if args.command == 'sync':
+                    print(f"Indexed {counts['jobs']} jobs ({counts['updated']} updated, {counts['removed']} removed) in {args.db}")
+                    return
+
+            if args.command == 'list':
+                rows = [(job['name'], job['n_aoa'], _fmt(job['aoa_min']), _fmt(job['aoa_max'])) for job in db.jobs(args.name)]
+                _print_table(('job', 'n_aoa', 'aoa_min', 'aoa_max'), rows)
+
+            elif args.command == 'rank':
+                ranked = db.rank(args.metric, args.aoa, args.top, args.where, args.name, args.ascending, args.extrapolate)
+                rows = [(i + 1, job['name'], _fmt(job['score']), job['n_aoa']) for i, job in enumerate(ranked)]
+                _print_table(('#', 'job', f"{args.metric}@{args.aoa:g}", 'n_aoa'), rows)
+
+            elif args.command == 'compare':
+                jobs, values = db.metric(args.coefficient, args.aoa, args.name, args.extrapolate)
+                wanted = set(args.jobs)
+                missing = wanted - {job['name'] for job in jobs}
+                if missing:
+                    raise ValueError(f"Unknown job(s): {', '.join(sorted(missing))}")
+                rows = [[job['name']] + [_fmt(v) for v in values[i]]
+                        for i, job in enumerate(jobs) if not wanted or job['name'] in wanted]
+                _print_table(['job'] + [f"{args.coefficient}@{a:g}" for a in args.aoa], rows)
+
+            elif args.command == 'samples':
+                rows = [(s['name'], _fmt(s['aoa']), _fmt(s['Cl']), _fmt(s['Cd']), _fmt(s['CmPitch']))
+                        for s in db.samples(args.aoa, pattern=args.name)]
+                _print_table(('job', 'aoa', 'Cl', 'Cd', 'CmPitch'), rows)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
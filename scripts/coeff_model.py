@@ -0,0 +1,162 @@
+"""Compact piecewise-cubic coefficient model.
+
+Postprocessing fits each coefficient with PCHIP once and saves the result as
+`output/<job>/coefficient_model.json`: the AoA breakpoints and, per
+coefficient, one row [c0, c1, c2, c3] per interval, so that
+
+    value = c0 + c1*dx + c2*dx**2 + c3*dx**3,   dx = aoa - breakpoints[i]
+
+on interval i. Evaluating is a binary search plus a polynomial, with no SciPy
+import and nothing to rebuild: arrays go through `evaluate` (one
+`np.searchsorted` and a Horner pass over all coefficients at once) and single
+angles through `at`, a pure-Python path for step-by-step simulators.
+CoefficientModel.js reads the same file on the server.
+"""
+
+import argparse
+import bisect
+import json
+import os
+import sys
+
+import numpy as np
+
+from pchip_batch import PchipBatch
+
+MODEL_NAME = "coefficient_model.json"
+MODEL_VERSION = 1
+COEFFICIENTS = ('Cl', 'Cd', 'CmPitch')
+
+# Models loaded from disk, keyed by path and revalidated by mtime
+_model_cache = {}
+
+
+class CoefficientModel:
+    def __init__(self, breakpoints, coefficients):
+        """breakpoints: (k,) AoAs; coefficients: {name: (k - 1, 4) rows of c0..c3}."""
+        self.breakpoints = np.asarray(breakpoints, dtype=np.float64)
+        self.names = tuple(coefficients)
+        # (k - 1, 4, n_names) so one gather fetches every coefficient of an interval
+        self.table = np.stack([np.asarray(coefficients[name], dtype=np.float64) for name in self.names], axis=-1)
+        self._inner = self.breakpoints[1:-1]
+        # (4, n_names, k - 1): one contiguous take per power gathers every coefficient
+        self._powers = np.ascontiguousarray(self.table.transpose(1, 2, 0))
+        self._knots = self.breakpoints.tolist()
+        self._inner_knots = self._knots[1:-1]
+        self._rows = [[self.table[i, :, j].tolist() for j in range(len(self.names))] for i in range(len(self.table))]
+
+    @classmethod
+    def fit(cls, aoa, values):
+        """PCHIP fit of {name: samples} over strictly increasing aoa."""
+        names = tuple(values)
+        y = np.column_stack([np.asarray(values[name], dtype=np.float64) for name in names])
+        x, c = PchipBatch.fit([np.asarray(aoa, dtype=np.float64)], [y]).curve(0)
+        # PPoly order (highest power first) -> c0..c3 rows
+        return cls(x, {name: c[::-1, :, j].T for j, name in enumerate(names)})
+
+    @classmethod
+    def from_pchip_parameters(cls, params):
+        """Fit from the knots/values of a pchip_parameters.json."""
+        knots = params['Cl']['knots']
+        if any(params[name]['knots'] != knots for name in COEFFICIENTS):
+            raise ValueError("pchip_parameters.json coefficients use different knots.")
+        return cls.fit(knots, {name: params[name]['values'] for name in COEFFICIENTS})
+
+    def to_dict(self):
+        return {
+            'version': MODEL_VERSION,
+            'breakpoints': self._knots,
+            'coefficients': {name: self.table[:, :, j].tolist() for j, name in enumerate(self.names)},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != MODEL_VERSION:
+            raise ValueError(f"Unsupported coefficient model version: {data.get('version')}")
+        return cls(data['breakpoints'], data['coefficients'])
+
+    def save(self, path):
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def evaluate(self, aoa, extrapolate=True):
+        """Values at an array of AoAs as {name: array shaped like aoa}.
+
+        Outside the sampled range the end cubics are extended (True), the AoA is
+        clamped to the range ('clamp'), or NaN is returned (False).
+        """
+        aoa = np.asarray(aoa, dtype=np.float64)
+        x = np.clip(aoa, self.breakpoints[0], self.breakpoints[-1]) if extrapolate == 'clamp' else aoa
+        i = np.searchsorted(self._inner, x, side='right')
+        dx = x - self.breakpoints[i]
+        c = np.take(self._powers, i, axis=2)  # (4, n_names, ...)
+        values = ((c[3] * dx + c[2]) * dx + c[1]) * dx + c[0]
+        if extrapolate is False:
+            values[:, (aoa < self.breakpoints[0]) | (aoa > self.breakpoints[-1])] = np.nan
+        return {name: values[j] for j, name in enumerate(self.names)}
+
+    def at(self, aoa, clamp=False):
+        """Values at one AoA as a tuple in `names` order, without NumPy overhead."""
+        knots = self._knots
+        if clamp:
+            aoa = min(max(aoa, knots[0]), knots[-1])
+        i = bisect.bisect_right(self._inner_knots, aoa)
+        dx = aoa - knots[i]
+        return tuple(((c3 * dx + c2) * dx + c1) * dx + c0 for c0, c1, c2, c3 in self._rows[i])
+
+
+def model_path(job_dir):
+    return os.path.join(job_dir, MODEL_NAME)
+
+
+def load_model(path):
+    """Load a coefficient_model.json, or convert a pchip_parameters.json; cached until the file changes."""
+    stamp = os.stat(path).st_mtime_ns
+    cached = _model_cache.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with open(path, 'r') as f:
+        data = json.load(f)
+    model = CoefficientModel.from_dict(data) if 'breakpoints' in data else CoefficientModel.from_pchip_parameters(data)
+    _model_cache[path] = (stamp, model)
+    return model
+
+
+# Function to load a saved model and predict coefficients
+def predict_coefficients(aoa, params_file):
+    values = load_model(params_file).evaluate(aoa)
+    return dict({'aoa': np.asarray(aoa).tolist()}, **{name: value.tolist() for name, value in values.items()})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Evaluate a saved coefficient model',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python coeff_model.py output/my_job/coefficient_model.json 0 5 10
+  python coeff_model.py output/my_job/pchip_parameters.json -2.5 --save output/my_job/coefficient_model.json
+        """
+    )
+    parser.add_argument('model', help='coefficient_model.json (or a legacy pchip_parameters.json)')
+    parser.add_argument('aoa', type=float, nargs='*', default=[0.0], help='Angles of attack (default: 0)')
+    parser.add_argument('--save', default=None, help='Write the model in coefficient_model.json format')
+    args = parser.parse_args(argv)
+
+    try:
+        model = load_model(args.model)
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.save:
+        model.save(args.save)
+        print(f"Coefficient model saved to: {args.save}")
+    print(json.dumps(predict_coefficients(args.aoa, args.model)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,166 +1,168 @@
 import os
-import json
+import sys
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 import numpy as np
-from scipy.interpolate import PchipInterpolator
 import argparse
+import results_store
+from pchip_batch import PchipBatch
 
-# Parse command line arguments
-parser = argparse.ArgumentParser(description='Postprocess and compare simulation data from two directories containing angle of attack (AoA) folders')
-parser.add_argument('folder_path1', help='Path to the first directory containing AoA folders with results.json files')
-parser.add_argument('folder_path2', help='Path to the second directory containing AoA folders with results.json files')
-parser.add_argument('output_path', help='Path to save the output comparison plot (PNG file)')
-args = parser.parse_args()
-
-# Define the base directories and output path
-base_dir1 = args.folder_path1
-base_dir2 = args.folder_path2
-output_path = args.output_path
-
-# Validate directories
-for base_dir in [base_dir1, base_dir2]:
-    if not os.path.exists(base_dir):
-        raise FileNotFoundError(f"The specified directory does not exist: {base_dir}")
-    if not os.path.isdir(base_dir):
-        raise NotADirectoryError(f"The specified path is not a directory: {base_dir}")
-
-# Ensure output directory exists
-output_dir = os.path.dirname(output_path)
-if output_dir and not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-
-print(f"Processing data from: {base_dir1} and {base_dir2}")
-
-# Function to process a single directory
+TITLES = {
+    'Cl': "Lift Coefficient vs Angle of Attack",
+    'Cd': "Drag Coefficient (Cd) vs Angle of Attack",
+    'CmPitch': "Pitching Moment Coefficient vs Angle of Attack",
+}
+
+
+# Function to load a single directory's samples (nothing is written to it)
 def process_directory(base_dir):
-    data_list = []
     label = os.path.basename(os.path.normpath(base_dir))  # Use normalized basename as label
-    # Loop through each AoA folder
-    for aoa_folder in os.listdir(base_dir):
-        aoa_path = os.path.join(base_dir, aoa_folder)
-        if os.path.isdir(aoa_path):
-            try:
-                # Try to convert folder name to float (AoA value)
-                aoa = float(aoa_folder)
-                json_file = os.path.join(aoa_path, "results.json")
-                if os.path.exists(json_file):
-                    with open(json_file, 'r') as f:
-                        data = json.load(f)
-                        # Store data with AoA
-                        data_list.append({
-                            'aoa': aoa,
-                            'cl': data["Cl"],
-                            'cd': data["CdPressure"] + data["CdViscous"],
-                            'cmpitch': data["CmPitch"]
-                        })
-            except ValueError:
-                # Skip folders that aren't valid numbers
-                continue
-    # Sort data by AoA for ascending order
-    data_list.sort(key=lambda x: x['aoa'])
-    # Extract sorted data
-    aoa_values = [d['aoa'] for d in data_list]
-    cl_values = [d['cl'] for d in data_list]
-    cd_values = [d['cd'] for d in data_list]
-    cmpitch_values = [d['cmpitch'] for d in data_list]
-    # Perform PCHIP interpolation if enough points
-    if len(aoa_values) > 1:
-        cl_pchip = PchipInterpolator(aoa_values, cl_values)
-        cd_pchip = PchipInterpolator(aoa_values, cd_values)
-        cmpitch_pchip = PchipInterpolator(aoa_values, cmpitch_values)
-    else:
+    # Load the job's coefficient table (sorted by AoA) in one read
+    table = results_store.load_or_build(base_dir, save=False)
+    if len(table['aoa']) < 2:
         raise ValueError(f"Not enough data points for interpolation in {base_dir}")
-    # Save PCHIP parameters (knots and y-values)
-    pchip_params = {
-        'Cl': {'knots': aoa_values, 'values': cl_values},
-        'Cd': {'knots': aoa_values, 'values': cd_values},
-        'CmPitch': {'knots': aoa_values, 'values': cmpitch_values}
-    }
-    params_file = os.path.join(base_dir, "pchip_parameters.json")
-    with open(params_file, 'w') as f:
-        json.dump(pchip_params, f, indent=4)
-    print(f"PCHIP parameters saved to: {params_file}")
-    return {
-        'label': label,
-        'aoa_values': aoa_values,
-        'cl_values': cl_values,
-        'cd_values': cd_values,
-        'cmpitch_values': cmpitch_values,
-        'cl_pchip': cl_pchip,
-        'cd_pchip': cd_pchip,
-        'cmpitch_pchip': cmpitch_pchip
-    }
-
-# Process both directories
-data1 = process_directory(base_dir1)
-data2 = process_directory(base_dir2)
-
-# Function to load PCHIP parameters and predict coefficients
-def predict_coefficients(aoa, params_file):
-    with open(params_file, 'r') as f:
-        params = json.load(f)
-    
-    # Reconstruct PCHIP interpolators
-    cl_pchip = PchipInterpolator(params['Cl']['knots'], params['Cl']['values'])
-    cd_pchip = PchipInterpolator(params['Cd']['knots'], params['Cd']['values'])
-    cmpitch_pchip = PchipInterpolator(params['CmPitch']['knots'], params['CmPitch']['values'])
-    
-    # Predict coefficients
-    aoa = np.array(aoa)
-    return {
-        'aoa': aoa.tolist(),
-        'Cl': cl_pchip(aoa).tolist(),
-        'Cd': cd_pchip(aoa).tolist(),
-        'CmPitch': cmpitch_pchip(aoa).tolist()
-    }
-
-# Determine overall AoA range for plotting
-all_aoa = data1['aoa_values'] + data2['aoa_values']
-min_aoa = min(all_aoa)
-max_aoa = max(all_aoa)
-aoa_range = np.linspace(min_aoa, max_aoa, 100)
-
-# Create plots
-plt.figure(figsize=(12, 8))
-
-# Plot Lift Coefficient (Cl)
-plt.subplot(3, 1, 1)
-plt.plot(data1['aoa_values'], data1['cl_values'], marker='o', linestyle='', color='b', label=data1['label'])
-plt.plot(aoa_range, data1['cl_pchip'](aoa_range), linestyle='--', color='b')
-plt.plot(data2['aoa_values'], data2['cl_values'], marker='x', linestyle='', color='r', label=data2['label'])
-plt.plot(aoa_range, data2['cl_pchip'](aoa_range), linestyle='--', color='r')
-plt.title("Lift Coefficient vs Angle of Attack")
-plt.xlabel("Angle of Attack (degrees)")
-plt.ylabel("Cl")
-plt.grid(True)
-plt.legend()
-
-# Plot Drag Coefficient (Cd)
-plt.subplot(3, 1, 2)
-plt.plot(data1['aoa_values'], data1['cd_values'], marker='o', linestyle='', color='b', label=data1['label'])
-plt.plot(aoa_range, data1['cd_pchip'](aoa_range), linestyle='--', color='b')
-plt.plot(data2['aoa_values'], data2['cd_values'], marker='x', linestyle='', color='r', label=data2['label'])
-plt.plot(aoa_range, data2['cd_pchip'](aoa_range), linestyle='--', color='r')
-plt.title("Drag Coefficient (Cd) vs Angle of Attack")
-plt.xlabel("Angle of Attack (degrees)")
-plt.ylabel("Cd")
-plt.grid(True)
-plt.legend()
-
-# Plot Pitching Moment Coefficient (CmPitch)
-plt.subplot(3, 1, 3)
-plt.plot(data1['aoa_values'], data1['cmpitch_values'], marker='o', linestyle='', color='b', label=data1['label'])
-plt.plot(aoa_range, data1['cmpitch_pchip'](aoa_range), linestyle='--', color='b')
-plt.plot(data2['aoa_values'], data2['cmpitch_values'], marker='x', linestyle='', color='r', label=data2['label'])
-plt.plot(aoa_range, data2['cmpitch_pchip'](aoa_range), linestyle='--', color='r')
-plt.title("Pitching Moment Coefficient vs Angle of Attack")
-plt.xlabel("Angle of Attack (degrees)")
-plt.ylabel("CmPitch")
-plt.grid(True)
-plt.legend()
-
-# Adjust layout and save/display plot
-plt.tight_layout()
-plt.savefig(output_path)
-print(f"Comparison plot saved to: {output_path}")
-plt.show()
\ No newline at end of file
+    values = np.column_stack([table['Cl'], results_store.total_drag(table), table['CmPitch']])
+    return {'label': label, 'aoa': table['aoa'], 'values': values}
+
+
+def plot_comparison(jobs, aoa_range, curves, output_path, show=False):
+    """Plot samples and fitted curves of every job, one subplot per coefficient."""
+    n = len(jobs)
+    cmap = plt.get_cmap('tab10' if n <= 10 else 'viridis')
+    colors = cmap(np.arange(n) % 10) if n <= 10 else cmap(np.linspace(0, 1, n))
+    sample_aoa = np.concatenate([job['aoa'] for job in jobs])
+    sample_colors = np.repeat(colors, [len(job['aoa']) for job in jobs], axis=0)
+
+    fig, axes = plt.subplots(3, 1, figsize=(12, 8))
+    for k, (ax, (name, title)) in enumerate(zip(axes, TITLES.items())):
+        # One artist each for all curves and all samples, however many jobs there are
+        segments = np.stack([np.broadcast_to(aoa_range, curves[:, :, k].shape), curves[:, :, k]], axis=-1)
+        ax.add_collection(LineCollection(segments, colors=colors, linestyles='--'))
+        sample_values = np.concatenate([job['values'][:, k] for job in jobs])
+        ax.scatter(sample_aoa, sample_values, c=sample_colors, s=20, zorder=3)
+        ax.autoscale_view()
+        ax.set_title(title)
+        ax.set_xlabel("Angle of Attack (degrees)")
+        ax.set_ylabel(name)
+        ax.grid(True)
+
+    handles = [Line2D([], [], color=color, marker='o', linestyle='--') for color in colors]
+    labels = [job['label'] for job in jobs]
+    if n <= 4:
+        for ax in axes:
+            ax.legend(handles, labels)
+        fig.tight_layout()
+    else:
+        # Too many entries to repeat per subplot: one legend beside the plots
+        ncol = (n + 24) // 25
+        fig.legend(handles, labels, loc='center right', fontsize='small', ncol=ncol)
+        fig.tight_layout(rect=(0, 0, 1 - 0.12 * ncol, 1))
+
+    fig.savefig(output_path)
+    print(f"Comparison plot saved to: {output_path}")
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
+def write_table(table_path, jobs, aoa_range, curves):
+    """Write the fitted values as CSV rows (job, aoa, Cl, Cd, CmPitch); '-' writes to stdout."""
+    lines = ['job,aoa,' + ','.join(TITLES)]
+    for job, values in zip(jobs, curves):
+        lines.extend(f"{job['label']},{aoa:g}," + ','.join(f"{v:.6g}" for v in row)
+                     for aoa, row in zip(aoa_range, values))
+    text = '\n'.join(lines) + '\n'
+    if table_path == '-':
+        sys.stdout.write(text)
+    else:
+        with open(table_path, 'w') as f:
+            f.write(text)
+        print(f"Comparison table saved to: {table_path}")
+
+
+def compare(folder_paths, output_path=None, show=False, table_path=None, points=100, aoa_range=None,
+            extrapolate=True):
+    """Compare the coefficient curves of any number of job directories.
+
+    All fits are evaluated on one shared AoA grid (the combined sampled range,
+    or aoa_range=(min, max)). Writes a plot to output_path and/or a CSV table
+    to table_path; neither the job directories nor anything else is modified.
+    """
+    # Validate directories
+    for base_dir in folder_paths:
+        if not os.path.exists(base_dir):
+            raise FileNotFoundError(f"The specified directory does not exist: {base_dir}")
+        if not os.path.isdir(base_dir):
+            raise NotADirectoryError(f"The specified path is not a directory: {base_dir}")
+    if not folder_paths:
+        raise ValueError("No directories to compare.")
+
+    # Ensure output directory exists
+    output_dir = os.path.dirname(output_path) if output_path else ''
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    print(f"Processing data from: {', '.join(folder_paths)}")
+    jobs = [process_directory(base_dir) for base_dir in folder_paths]
+
+    # Fit every job at once and evaluate on the shared grid: (n_jobs, points, 3)
+    if aoa_range is None:
+        all_aoa = np.concatenate([job['aoa'] for job in jobs])
+        aoa_range = (all_aoa.min(), all_aoa.max())
+    grid = np.linspace(aoa_range[0], aoa_range[1], points)
+    curves = PchipBatch.fit([job['aoa'] for job in jobs], [job['values'] for job in jobs])(grid, extrapolate)
+
+    if output_path:
+        plot_comparison(jobs, grid, curves, output_path, show)
+    if table_path:
+        write_table(table_path, jobs, grid, curves)
+
+    return {'output_path': output_path, 'table_path': table_path,
+            'labels': [job['label'] for job in jobs], 'points': points}
+
+
+def main(argv=None):
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(
+        description='Compare simulation data from directories containing angle of attack (AoA) folders',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python compare.py output/job_a output/job_b comparison.png
+  python compare.py output/disc_* -o comparison.png --no-show
+  python compare.py output/disc_* --no-plot --table - --points 41 --aoa-range -10 30
+        """
+    )
+    parser.add_argument('folder_paths', nargs='+',
+                        help='Directories containing AoA folders with results.json files '
+                             '(a trailing image path is taken as --output)')
+    parser.add_argument('--output', '-o', default=None, help='Path to save the comparison plot')
+    parser.add_argument('--table', default=None, help="Save the fitted values as CSV ('-' for stdout)")
+    parser.add_argument('--no-plot', action='store_true', help='Skip plotting; only emit the table')
+    parser.add_argument('--no-show', action='store_true', help='Save the plot without opening a window')
+    parser.add_argument('--points', type=int, default=100, help='Points on the shared AoA grid (default: 100)')
+    parser.add_argument('--aoa-range', type=float, nargs=2, metavar=('MIN', 'MAX'), default=None,
+                        help='AoA grid range (default: the combined sampled range)')
+    parser.add_argument('--no-extrapolate', action='store_true',
+                        help="Leave values outside each job's sampled range empty (NaN)")
+    args = parser.parse_args(argv)
+
+    folder_paths, output_path = args.folder_paths, args.output
+    if output_path is None and os.path.splitext(folder_paths[-1])[1].lower() in ('.png', '.jpg', '.pdf', '.svg'):
+        folder_paths, output_path = folder_paths[:-1], folder_paths[-1]
+    if args.no_plot:
+        output_path = None
+    if output_path is None and not args.table:
+        parser.error('nothing to do: give an output image or --table')
+
+    try:
+        compare(folder_paths, output_path, show=not args.no_show, table_path=args.table, points=args.points,
+                aoa_range=args.aoa_range, extrapolate=not args.no_extrapolate)
+    except (FileNotFoundError, NotADirectoryError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Read decomposed cases (processor*/ directories) without reconstructPar.
+
+A parallel run leaves its mesh and fields split over processor0 ...
+processorN. Instead of reconstructing the whole case, each subdomain is read
+on its own in a process pool: its polyMesh is parsed, the cells cut by the
+z-plane are picked out, and only those cells' field values are sent back.
+`cells[offsets[i]:offsets[i + 1]]` are the local plane cells of processor i.
+Every cell belongs to exactly one subdomain, so nothing is duplicated at the
+processor boundaries.
+
+decomposePar writes each subdomain's cellProcAddressing (local to global
+cell). With it the stitched slice and whole fields are put in reconstructed
+cell order, so results match those of the reconstructed case; without it
+cells stay in processor order.
+"""
+
+import glob
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from plane_slice import PlaneSlice, cached_slice, cell_centres, plane_cells, _mesh_signature
+from polymesh import read_labels, read_mesh_counts, read_polymesh
+
+_PROCESSOR_RE = re.compile(r'processor(\d+)$')
+
+# Per-process cache: (signatures of every processor polyMesh, z) -> PlaneSlice, bounded like plane_slice's
+_slice_cache = {}
+
+
+def processor_dirs(case_dir):
+    """processor0, processor1, ... of a case in numeric order."""
+    dirs = [path for path in glob.glob(os.path.join(case_dir, 'processor*')) if _PROCESSOR_RE.search(path)]
+    return sorted(dirs, key=lambda path: int(_PROCESSOR_RE.search(path).group(1)))
+
+
+def is_decomposed(case_dir, time):
+    """True when `time` was only written to the processor directories."""
+    return (not os.path.isdir(os.path.join(case_dir, str(time)))
+            and os.path.isdir(os.path.join(case_dir, 'processor0', str(time))))
+
+
+def _polymesh_dir(proc_dir):
+    return os.path.join(proc_dir, 'constant', 'polyMesh')
+
+
+def _map(function, args, workers=None):
+    """function(*a) for every a in args, on a process pool when there is more than one."""
+    workers = min(len(args), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        return [function(*a) for a in args]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(function, *zip(*args)))
+
+
+def _addressing(proc_dir):
+    """Global cell index of every local cell, or None when decomposePar's addressing is missing."""
+    try:
+        return read_labels(_polymesh_dir(proc_dir), 'cellProcAddressing')
+    except FileNotFoundError:
+        return None
+
+
+def _processor_slice(proc_dir, z):
+    mesh = read_polymesh(_polymesh_dir(proc_dir))
+    cells = plane_cells(mesh, z)
+    addressing = _addressing(proc_dir)
+    return cells, cell_centres(mesh, cells)[:, :2], None if addressing is None else addressing[cells]
+
+
+def _processor_centres(proc_dir):
+    return cell_centres(read_polymesh(_polymesh_dir(proc_dir))), _addressing(proc_dir)
+
+
+def _processor_field(proc_dir, time, name, cells):
+    from fluidfoam import readfield
+
+    data = np.asarray(readfield(proc_dir, str(time), name, structured=False, verbose=False), dtype=float)
+    if data.shape[-1] == 1:
+        # Uniform fields hold a single value
+        n = len(cells) if cells is not None else read_mesh_counts(_polymesh_dir(proc_dir))['nCells']
+        return np.repeat(data, n, axis=-1), _addressing(proc_dir) if cells is None else None
+    if cells is not None:
+        return data[..., cells], None
+    return data, _addressing(proc_dir)
+
+
+def _stitch(parts):
+    """Concatenate per-processor (values, addressing) along the last axis, in global order when possible."""
+    values = np.concatenate([v for v, _ in parts], axis=-1)
+    if any(addressing is None for _, addressing in parts):
+        return values
+    out = np.empty_like(values)
+    out[..., np.concatenate([addressing for _, addressing in parts])] = values
+    return out
+
+
+def _require_processors(case_dir):
+    procs = processor_dirs(case_dir)
+    if not procs:
+        raise FileNotFoundError(f"No processor directories in {case_dir}")
+    return procs
+
+
+def plane_slice(case_dir, z=0.0, workers=None):
+    """PlaneSlice of the cells cut by the plane at height z over every subdomain.
+
+    `cells` holds each processor's local cell indices, in processor order.
+    The slice also gets `offsets`, delimiting the processors in `cells`, and
+    `order`, which puts values read in that layout into the order of
+    `centres_xy` (reconstructed cell order when the addressing is there).
+    """
+    procs = _require_processors(case_dir)
+    key = (tuple(_mesh_signature(_polymesh_dir(proc)) for proc in procs), z)
+    return cached_slice(_slice_cache, key, lambda: _stitch_slice(procs, z, workers))
+
+
+def _stitch_slice(procs, z, workers):
+    parts = _map(_processor_slice, [(proc, z) for proc in procs], workers)
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum([len(cells) for cells, _, _ in parts], out=offsets[1:])
+    if any(global_cells is None for _, _, global_cells in parts):
+        order = np.arange(offsets[-1])
+    else:
+        order = np.argsort(np.concatenate([global_cells for _, _, global_cells in parts]), kind='stable')
+    centres = np.concatenate([centres for _, centres, _ in parts])
+    plane = PlaneSlice(np.concatenate([cells for cells, _, _ in parts]), centres[order], z)
+    plane.offsets = offsets
+    plane.order = order
+    return plane
+
+
+def read_field(case_dir, time, name, cells=None, offsets=None, order=None, workers=None):
+    """A field stitched from every subdomain, shaped like fluidfoam's: (n,) or (k, n).
+
+    With `cells`, `offsets` and `order` (as from `plane_slice`) only the plane
+    cells are read, in the order of the slice's centres; otherwise the whole
+    internal field.
+    """
+    procs = _require_processors(case_dir)
+    if cells is None:
+        return _stitch(_map(_processor_field, [(proc, time, name, None) for proc in procs], workers))
+    if len(offsets) != len(procs) + 1:
+        raise ValueError(f"Slice has {len(offsets) - 1} subdomains but {case_dir} has {len(procs)}")
+    args = [(proc, time, name, cells[offsets[i]:offsets[i + 1]]) for i, proc in enumerate(procs)]
+    values = np.concatenate([v for v, _ in _map(_processor_field, args, workers)], axis=-1)
+    return values if order is None else values[..., order]
+
+
+def case_centres(case_dir, workers=None):
+    """Centres of every cell of the decomposed mesh, (n_cells, 3)."""
+    procs = _require_processors(case_dir)
+    return _stitch([(centres.T, addressing) for centres, addressing in
+                    _map(_processor_centres, [(proc,) for proc in procs], workers)]).T
@@ -0,0 +1,294 @@
+"""Disc flight trajectories from a job's fitted coefficients.
+
+Each throw is a point mass with a spinning disc normal. At every step the
+angle of attack between the velocity and the disc plane is looked up in the
+job's coefficient model (coeff_model.py) for Cl, Cd and CmPitch; lift and
+drag accelerate the disc, and the pitching moment precesses the normal
+gyroscopically (dn/dt = torque / (I * spin)), which is what turns and fades
+the flight. The forces use the same reference area and length as the CFD
+forceCoeffs (base-case/system/controlDict), with the lift/drag/pitch axes
+mapped onto the velocity frame. Spin is taken as constant.
+
+All throws of a batch advance together with RK4 on (3, n) arrays; throws
+leave the batch as they land, so launch-parameter grids of thousands of
+throws cost a few thousand array operations rather than a Python loop each.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+
+import numpy as np
+
+from coeff_model import load_model, model_path
+
+# Reference values of the CFD coefficients (base-case/system/controlDict)
+RHO = 1.225
+DIAMETER = 0.21
+AREA = 0.0346
+MASS = 0.175
+G = 9.81
+
+LAUNCH_DEFAULTS = {
+    'speed': 24.0,        # m/s
+    'spin': 1000.0,       # rpm, positive clockwise seen from above (right-hand backhand)
+    'hyzer': 0.0,         # degrees, positive tilts the left edge down
+    'nose': 0.0,          # degrees of nose up relative to the launch direction
+    'launch_angle': 5.0,  # degrees above horizontal
+    'height': 1.5,        # m
+}
+
+
+def launch_grid(**values):
+    """Launch conditions for every combination of the given values (others default)."""
+    names = list(LAUNCH_DEFAULTS)
+    axes = [np.atleast_1d(np.asarray(values.get(name, LAUNCH_DEFAULTS[name]), dtype=np.float64)) for name in names]
+    unknown = set(values) - set(names)
+    if unknown:
+        raise ValueError(f"Unknown launch parameter(s): {', '.join(sorted(unknown))}")
+    grid = [np.array(column) for column in zip(*itertools.product(*axes))]
+    return dict(zip(names, grid))
+
+
+def _launch_arrays(launch):
+    """Broadcast a launch dict (scalars or arrays, missing keys defaulted) to equal-length arrays."""
+    unknown = set(launch) - set(LAUNCH_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown launch parameter(s): {', '.join(sorted(unknown))}")
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(launch.get(name, default), dtype=np.float64))
+                                   for name, default in LAUNCH_DEFAULTS.items()])
+    return {name: np.ravel(array) for name, array in zip(LAUNCH_DEFAULTS, arrays)}
+
+
+def initial_state(launch):
+    """Position, velocity and disc normal as (3, n) arrays, and the signed spin in rad/s."""
+    launch = _launch_arrays(launch)
+    gamma = np.radians(launch['launch_angle'])
+    theta = gamma + np.radians(launch['nose'])  # Disc plane pitch
+    phi = np.radians(launch['hyzer'])
+    n = len(gamma)
+
+    pos = np.zeros((3, n))
+    pos[2] = launch['height']
+    vel = launch['speed'] * np.array([np.cos(gamma), np.zeros(n), np.sin(gamma)])
+    normal = np.array([-np.sin(theta), np.sin(phi) * np.cos(theta), np.cos(phi) * np.cos(theta)])
+    # Clockwise seen from above is a negative spin about the (upward) normal
+    omega = -launch['spin'] * 2 * np.pi / 60
+    return pos, vel, normal, omega
+
+
+def _norm(v):
+    return np.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+
+
+def _cross(a, b):
+    return np.array([a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]])
+
+
+def derivatives(vel, normal, omega, model, disc, extrapolate='clamp'):
+    """Acceleration and normal rate for (3, n) velocity and normal arrays; also returns the AoA."""
+    speed = np.maximum(_norm(vel), 1e-9)
+    vhat = vel / speed
+    vn = (vhat * normal).sum(axis=0)
+    aoa = np.degrees(np.arcsin(np.clip(-vn, -1.0, 1.0)))
+    coefficients = model.evaluate(aoa, extrapolate)
+
+    # Lift is normal to the velocity in the plane of velocity and disc normal
+    lift = normal - vn * vhat
+    lift /= np.maximum(_norm(lift), 1e-12)
+    pitch = _cross(vhat, lift)  # dragDir x liftDir, as pitchAxis is in the CFD case
+
+    q = 0.5 * disc['rho'] * speed * speed * disc['area']
+    acc = (q / disc['mass']) * (coefficients['Cl'] * lift - coefficients['Cd'] * vhat)
+    acc[2] -= G
+    # Torque about the pitch axis precesses the angular momentum I * omega * normal
+    normal_rate = (q * disc['diameter'] * coefficients['CmPitch'] / (disc['inertia'] * omega)) * pitch
+    return acc, normal_rate, aoa
+
+
+def simulate(model, launch, dt=0.01, t_max=20.0, mass=MASS, diameter=DIAMETER, area=AREA, inertia=None,
+             rho=RHO, extrapolate='clamp', record=False):
+    """Fly every throw in launch until it reaches the ground (z = 0) or t_max.
+
+    model is a CoefficientModel; launch maps LAUNCH_DEFAULTS names to scalars
+    or equal-length arrays. AoAs outside the model's sampled range are clamped
+    to it by default (see CoefficientModel.evaluate). Returns per-throw arrays:
+    landing (n, 3), distance, lateral, flight_time, max_height, landed, and
+    with record=True also times and trajectories (n, n_steps + 1, 3, NaN after
+    landing).
+    """
+    disc = {'mass': mass, 'diameter': diameter, 'area': area, 'rho': rho,
+            'inertia': inertia if inertia is not None else 0.5 * mass * (diameter / 2) ** 2}
+    pos, vel, normal, omega = initial_state(launch)
+    if np.any(omega == 0):
+        raise ValueError("Spin must be non-zero; the disc normal is only defined for a spinning disc.")
+    n = pos.shape[1]
+    n_steps = int(np.ceil(t_max / dt))
+
+    landing = np.full((n, 3), np.nan)
+    flight_time = np.full(n, np.nan)
+    max_height = pos[2].copy()
+    trajectories = None
+    if record:
+        trajectories = np.full((n, n_steps + 1, 3), np.nan, dtype=np.float32)
+        trajectories[:, 0] = pos.T
+
+    def rates(v, nrm, w):
+        acc, nrate, _ = derivatives(v, nrm, w, model, disc, extrapolate)
+        return v, acc, nrate
+
+    active = np.arange(n)
+    for step in range(1, n_steps + 1):
+        if len(active) == 0:
+            break
+        # Classic RK4 on (position, velocity, normal)
+        k1 = rates(vel, normal, omega)
+        k2 = rates(vel + 0.5 * dt * k1[1], normal + 0.5 * dt * k1[2], omega)
+        k3 = rates(vel + 0.5 * dt * k2[1], normal + 0.5 * dt * k2[2], omega)
+        k4 = rates(vel + dt * k3[1], normal + dt * k3[2], omega)
+        new = [x + (dt / 6) * (a + 2 * b + 2 * c + d)
+               for x, a, b, c, d in zip((pos, vel, normal), k1, k2, k3, k4)]
+        new_pos, vel, normal = new
+        normal /= _norm(normal)
+
+        max_height[active] = np.maximum(max_height[active], new_pos[2])
+        if record:
+            trajectories[active, step] = new_pos.T
+
+        # Throws that crossed the ground this step: interpolate the touchdown and drop them
+        down = new_pos[2] <= 0.0
+        if down.any():
+            f = pos[2, down] / (pos[2, down] - new_pos[2, down])
+            hit = active[down]
+            landing[hit] = (pos[:, down] + f * (new_pos[:, down] - pos[:, down])).T
+            flight_time[hit] = (step - 1 + f) * dt
+            if record:
+                trajectories[hit, step] = landing[hit]
+            keep = ~down
+            active, vel, normal, omega = active[keep], vel[:, keep], normal[:, keep], omega[keep]
+            new_pos = new_pos[:, keep]
+        pos = new_pos
+
+    # Throws still airborne at t_max report their final position
+    landed = ~np.isnan(flight_time)
+    if len(active):
+        landing[active] = pos.T
+        flight_time[active] = n_steps * dt
+
+    result = {
+        'landing': landing,
+        'distance': landing[:, 0],
+        'lateral': landing[:, 1],
+        'flight_time': flight_time,
+        'max_height': max_height,
+        'landed': landed,
+    }
+    if record:
+        result['times'] = np.arange(n_steps + 1) * dt
+        result['trajectories'] = trajectories
+    return result
+
+
+def load_job_model(path):
+    """The coefficient model of a job directory, or of a model/pchip_parameters.json file."""
+    if os.path.isdir(path):
+        path = model_path(path)
+    return load_model(path)
+
+
+def plot_trajectories(output_path, result, labels, limit=50):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, (top, side) = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+    for i, label in enumerate(labels[:limit]):
+        path = result['trajectories'][i]
+        top.plot(path[:, 0], path[:, 1], label=label)
+        side.plot(path[:, 0], path[:, 2])
+    top.set_title("Top view")
+    top.set_ylabel("Lateral (m, left positive)")
+    top.set_aspect('equal', adjustable='datalim')
+    top.grid(True)
+    side.set_title("Side view")
+    side.set_xlabel("Downrange (m)")
+    side.set_ylabel("Height (m)")
+    side.grid(True)
+    if len(labels) <= 10:
+        top.legend(fontsize='small')
+    fig.tight_layout()
+    fig.savefig(output_path)
+    plt.close(fig)
+    print(f"Trajectory plot saved to: {output_path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Simulate disc flights from a job\'s fitted aerodynamic coefficients',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python flight.py output/my_job
+  python flight.py output/my_job --speed 20 24 28 --hyzer -10 0 10 --plot flights.png
+  python flight.py output/my_job/coefficient_model.json --nose -5 0 5 --spin 800 1200 --csv flights.csv
+
+Every combination of the given launch values is thrown.
+        """
+    )
+    parser.add_argument('model', help='Job directory, coefficient_model.json or pchip_parameters.json')
+    parser.add_argument('--speed', type=float, nargs='+', default=[LAUNCH_DEFAULTS['speed']],
+                        help=f"Launch speed in m/s (default: {LAUNCH_DEFAULTS['speed']:g})")
+    parser.add_argument('--spin', type=float, nargs='+', default=[LAUNCH_DEFAULTS['spin']],
+                        help=f"Spin in rpm, positive clockwise from above (default: {LAUNCH_DEFAULTS['spin']:g})")
+    parser.add_argument('--hyzer', type=float, nargs='+', default=[LAUNCH_DEFAULTS['hyzer']],
+                        help='Hyzer angle in degrees, negative for anhyzer (default: 0)')
+    parser.add_argument('--nose', type=float, nargs='+', default=[LAUNCH_DEFAULTS['nose']],
+                        help='Nose angle in degrees (default: 0)')
+    parser.add_argument('--launch-angle', type=float, nargs='+', default=[LAUNCH_DEFAULTS['launch_angle']],
+                        help=f"Launch angle above horizontal in degrees (default: {LAUNCH_DEFAULTS['launch_angle']:g})")
+    parser.add_argument('--height', type=float, nargs='+', default=[LAUNCH_DEFAULTS['height']],
+                        help=f"Release height in m (default: {LAUNCH_DEFAULTS['height']:g})")
+    parser.add_argument('--mass', type=float, default=MASS, help=f'Disc mass in kg (default: {MASS})')
+    parser.add_argument('--dt', type=float, default=0.01, help='Time step in s (default: 0.01)')
+    parser.add_argument('--t-max', type=float, default=20.0, help='Longest flight in s (default: 20)')
+    parser.add_argument('--extrapolate', action='store_true',
+                        help='Extend the end cubics beyond the sampled AoAs instead of clamping')
+    parser.add_argument('--csv', default=None, help='Save launch conditions and results as CSV')
+    parser.add_argument('--plot', default=None, help='Save top and side views of the flights (PNG)')
+    args = parser.parse_args(argv)
+
+    try:
+        model = load_job_model(args.model)
+        launch = launch_grid(speed=args.speed, spin=args.spin, hyzer=args.hyzer, nose=args.nose,
+                             launch_angle=args.launch_angle, height=args.height)
+        result = simulate(model, launch, dt=args.dt, t_max=args.t_max, mass=args.mass,
+                          extrapolate=True if args.extrapolate else 'clamp', record=bool(args.plot))
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    names = list(LAUNCH_DEFAULTS)
+    columns = ['distance', 'lateral', 'flight_time', 'max_height']
+    rows = [[launch[name][i] for name in names] + [result[column][i] for column in columns]
+            for i in range(len(result['distance']))]
+    header = names + columns
+    print(' '.join(f"{h:>12}" for h in header))
+    for row in rows:
+        print(' '.join(f"{v:>12.4g}" for v in row))
+    if not result['landed'].all():
+        print(f"Warning: {int((~result['landed']).sum())} throw(s) still airborne after {args.t_max:g}s.")
+
+    if args.csv:
+        with open(args.csv, 'w') as f:
+            f.write(','.join(header + ['landed']) + '\n')
+            for row, landed in zip(rows, result['landed']):
+                f.write(','.join(f"{v:.6g}" for v in row) + f",{int(landed)}\n")
+        print(f"Results saved to: {args.csv}")
+    if args.plot:
+        labels = [', '.join(f"{name}={launch[name][i]:g}" for name in names) for i in range(len(rows))]
+        plot_trajectories(args.plot, result, labels)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Parser for OpenFOAM dictionary files.
+
+Turns a dictionary such as controlDict or functionObjectProperties into
+nested Python dicts. An entry `key value;` becomes a number or string and a
+multi-token value a list. `( ... )` lists (a leading OpenFOAM size, as in
+`3(1 2 3)`, is dropped), `[ ... ]` dimension sets and `N{value}` uniform
+lists become lists, and `key { ... }` becomes a dict. Keywords keep attached
+parentheses (`div(phi,U)`, `Cd(f)`). Comments are skipped and directives
+such as `#include "file"` are kept as entries with their argument.
+Large field and mesh lists are better read with polymesh or fluidfoam.
+"""
+
+import re
+
+_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}()\[\];]|[^\s{}()\[\];"]+')
+_COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+_CLOSING = {'(': ')', '[': ']'}
+
+
+def _convert(token):
+    if token.startswith('"'):
+        return token[1:-1]
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+
+def tokenize(text):
+    """Tokens of a dictionary; words keep attached parentheses, as in `Cd(f)` or `div(phi,U)`."""
+    matches = list(_TOKEN_RE.finditer(_COMMENT_RE.sub(' ', text)))
+    tokens = []
+    i = 0
+    while i < len(matches):
+        token, end = matches[i].group(), matches[i].end()
+        i += 1
+        if token in '{}()[];' or token.startswith('"') or isinstance(_convert(token), int):
+            # Punctuation, strings and list sizes such as the 0 in 0() stand alone
+            tokens.append(token)
+            continue
+        # Absorb a following balanced group that touches the word with no whitespace inside
+        depth, j = 0, i
+        while j < len(matches) and matches[j].start() == end:
+            part = matches[j].group()
+            if part in '{}[];' or part.startswith('"') or (depth == 0 and part != '('):
+                break
+            depth += {'(': 1, ')': -1}.get(part, 0)
+            end = matches[j].end()
+            j += 1
+            if depth == 0:
+                token = ''.join(m.group() for m in matches[i - 1:j])
+                i = j
+        tokens.append(token)
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def error(self, message):
+        raise ValueError(f"{message} (token {self.pos} of {len(self.tokens)})")
+
+    def next(self):
+        if self.pos >= len(self.tokens):
+            self.error("Unexpected end of dictionary")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def dictionary(self, closing=None):
+        result = {}
+        while self.pos < len(self.tokens):
+            token = self.next()
+            if token == closing:
+                return result
+            if token in '{}()[];':
+                if token == ';':
+                    continue
+                self.error(f"Unexpected '{token}'")
+            key = _convert(token) if token.startswith('"') else token
+            if key.startswith('#'):
+                # Directives take a single argument and no semicolon
+                result[key] = _convert(self.next()) if not key.startswith('#end') else None
+                continue
+            if self.pos < len(self.tokens) and self.tokens[self.pos] == '{':
+                self.pos += 1
+                result[key] = self.dictionary('}')
+            else:
+                result[key] = self.value()
+        if closing is not None:
+            self.error(f"Missing '{closing}'")
+        return result
+
+    def items(self, closing):
+        items = []
+        while True:
+            token = self.next()
+            if token == closing:
+                return items
+            if token == '{' and items and isinstance(items[-1], int) and self.tokens[self.pos + 1:self.pos + 2] == ['}']:
+                # Uniform list shorthand N{value}
+                items[-1] = [_convert(self.next())] * items[-1]
+                self.next()
+                continue
+            items.append(self.item(token))
+            # N(...) lists: the size prefix is redundant
+            if len(items) >= 2 and isinstance(items[-1], list) and isinstance(items[-2], int) \
+                    and items[-2] == len(items[-1]) and self.tokens[self.pos - 1] in ')]':
+                del items[-2]
+
+    def item(self, token):
+        if token in _CLOSING:
+            return self.items(_CLOSING[token])
+        if token == '{':
+            return self.dictionary('}')
+        if token in ')]};':
+            self.error(f"Unexpected '{token}'")
+        return _convert(token)
+
+    def value(self):
+        items = self.items(';')
+        if not items:
+            return None
+        return items[0] if len(items) == 1 else items
+
+
+def parse(text):
+    """Parse dictionary text into nested dicts."""
+    return _Parser(tokenize(text)).dictionary()
+
+
+def load(path):
+    with open(path, 'r') as f:
+        return parse(f.read())
+
+
+def numeric_entries(d):
+    """Flat {key: float} of every numeric entry in d and its sub-dictionaries (innermost key wins)."""
+    values = {}
+    for key, value in d.items():
+        if isinstance(value, dict):
+            values.update(numeric_entries(value))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[key] = float(value)
+    return values
@@ -0,0 +1,202 @@
+"""Force coefficient history and results of one solved AoA.
+
+`ingest` replaces scraping functionObjectProperties by line number. It reads
+the final forceCoeffs results with a real dictionary parser, and the whole
+per-iteration history from postProcessing/forceCoeffs/*/coefficient.dat. The
+history is saved as coefficient_history.npz ('time', 'keys', 'values' as an
+(n_iterations, n_keys) array) next to results.json.
+
+In results.json every coefficient with a history is the mean over the last
+`window` iterations, with its standard deviation under `<name>_std`, instead
+of the last iteration's value. `iterations` and `tail_window` record what the
+statistics cover. When the history has Cd but not its pressure/viscous split,
+CdPressure and CdViscous keep their final ratio and are scaled to the Cd mean.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+import foam_dict
+
+HISTORY_NAME = "coefficient_history.npz"
+RESULTS_NAME = "results.json"
+FUNCTION_OBJECT = "forceCoeffs"
+DEFAULT_WINDOW = 100
+
+_COMMENT_LINE_RE = re.compile(rb'^#[^\n]*\n?', re.M)
+
+
+def read_coefficient_dat(path):
+    """Column names and (n_rows, n_columns) values of a coefficient.dat file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    names = None
+    for line in data.splitlines():
+        if not line.startswith(b'#'):
+            break
+        if line[1:].split():
+            names = line[1:].decode().split()  # The last comment line holds the column names
+    if names is None:
+        raise ValueError(f"No column header in {path}")
+    values = np.array(_COMMENT_LINE_RE.sub(b'', data).split(), dtype=np.float64)
+    # A file still being written can end in a partial row
+    n_rows = len(values) // len(names)
+    return names, values[:n_rows * len(names)].reshape(n_rows, len(names))
+
+
+def read_history(case_dir, function_object=FUNCTION_OBJECT):
+    """{'time': (n,), name: (n,) ...} from every coefficient*.dat of the function object, or None.
+
+    Files from restarts are concatenated in start-time order; where times
+    overlap the later file wins.
+    """
+    paths = glob.glob(os.path.join(case_dir, 'postProcessing', function_object, '*', 'coefficient*.dat'))
+    if not paths:
+        return None
+
+    def start_time(path):
+        try:
+            return float(os.path.basename(os.path.dirname(path)))
+        except ValueError:
+            return float('inf')
+
+    parts = [read_coefficient_dat(path) for path in sorted(paths, key=lambda p: (start_time(p), p))]
+    names = parts[0][0]
+    values = np.concatenate([v for n, v in parts if n == names])
+    # Keep the last row written for every time
+    _, last = np.unique(values[::-1, 0], return_index=True)
+    values = values[len(values) - 1 - last]
+    history = {'time': values[:, 0]}
+    for j, name in enumerate(names[1:], start=1):
+        history[name] = values[:, j]
+    return history
+
+
+def save_history(path, history):
+    keys = [key for key in history if key != 'time']
+    tmp = path[:-4] + '.tmp.npz'
+    np.savez(tmp, time=history['time'], keys=np.asarray(keys, dtype=str),
+             values=np.column_stack([history[key] for key in keys]))
+    os.replace(tmp, path)
+
+
+def load_history(path):
+    with np.load(path, allow_pickle=False) as data:
+        history = {'time': data['time']}
+        for j, key in enumerate(data['keys']):
+            history[str(key)] = data['values'][:, j]
+    return history
+
+
+def tail_statistics(history, window=DEFAULT_WINDOW):
+    """{name: (mean, std)} over the last `window` iterations of the history."""
+    tail = slice(-window, None) if window else slice(None)
+    return {name: (float(np.mean(values[tail])), float(np.std(values[tail])))
+            for name, values in history.items() if name != 'time'}
+
+
+def final_properties(case_dir, time, function_object=FUNCTION_OBJECT):
+    """Numeric results of the function object in <time>/uniform/functionObjects/functionObjectProperties.
+
+    A case that was not reconstructed has them in processor0/<time>/uniform instead.
+    """
+    path = os.path.join(case_dir, str(time), 'uniform', 'functionObjects', 'functionObjectProperties')
+    if not os.path.exists(path):
+        path = os.path.join(case_dir, 'processor0', str(time), 'uniform', 'functionObjects', 'functionObjectProperties')
+    properties = foam_dict.load(path)
+    if function_object in properties:
+        properties = properties[function_object]
+    return foam_dict.numeric_entries(properties)
+
+
+def ingest(case_dir, time, aoa_dir, window=DEFAULT_WINDOW, function_object=FUNCTION_OBJECT):
+    """Write results.json (tail means and stds) and coefficient_history.npz for one solved AoA."""
+    os.makedirs(aoa_dir, exist_ok=True)
+    try:
+        results = final_properties(case_dir, time, function_object)
+    except FileNotFoundError as e:
+        print(f"functionObjectProperties not found: {e.filename}")
+        results = {}
+
+    history = read_history(case_dir, function_object)
+    if history is None or len(history['time']) == 0:
+        print(f"No {function_object} history found; results are final-iteration values.")
+    else:
+        history_path = os.path.join(aoa_dir, HISTORY_NAME)
+        save_history(history_path, history)
+        n = len(history['time'])
+        stats = tail_statistics(history, window)
+        final_cd = results.get('CdPressure', 0.0) + results.get('CdViscous', 0.0)
+        for name, (mean, std) in stats.items():
+            results[name] = mean
+            results[f"{name}_std"] = std
+        if 'Cd' in stats and 'CdPressure' not in stats and final_cd != 0.0:
+            scale = stats['Cd'][0] / final_cd
+            for name in ('CdPressure', 'CdViscous'):
+                if name in results:
+                    results[name] *= scale
+        results['iterations'] = float(history['time'][-1])
+        results['tail_window'] = float(min(window, n) if window else n)
+        print(f"Saved {n} iterations of {', '.join(stats)} to {history_path}")
+
+    results_path = os.path.join(aoa_dir, RESULTS_NAME)
+    with open(results_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved results to {results_path}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Ingest forceCoeffs results and per-iteration history of a solved case',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python force_history.py ingest run/my_job 1200 output/my_job/5.0
+  python force_history.py ingest run/my_job 1200 output/my_job/5.0 --window 200
+  python force_history.py show output/my_job/5.0
+  python force_history.py show run/my_job --window 50
+        """
+    )
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = sub.add_parser('ingest', help='Write results.json and coefficient_history.npz')
+    ingest_parser.add_argument('case_dir')
+    ingest_parser.add_argument('time', help='Final time directory')
+    ingest_parser.add_argument('aoa_dir', help='Output directory of the AoA')
+
+    show = sub.add_parser('show', help='Print tail statistics of a saved history or a case')
+    show.add_argument('path', help='AoA output directory or case directory')
+
+    for p in (ingest_parser, show):
+        p.add_argument('--window', type=int, default=DEFAULT_WINDOW,
+                       help=f'Iterations averaged at the end of the run (default: {DEFAULT_WINDOW}, 0 for all)')
+        p.add_argument('--function-object', default=FUNCTION_OBJECT,
+                       help=f'forceCoeffs function object name (default: {FUNCTION_OBJECT})')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'ingest':
+            ingest(args.case_dir, args.time, args.aoa_dir, args.window, args.function_object)
+            return
+        saved = os.path.join(args.path, HISTORY_NAME)
+        history = load_history(saved) if os.path.exists(saved) else read_history(args.path, args.function_object)
+        if history is None:
+            raise FileNotFoundError(f"No coefficient history in {args.path}")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"{len(history['time'])} iterations, last {history['time'][-1]:g}")
+    for name, (mean, std) in tail_statistics(history, args.window).items():
+        print(f"  {name:<10} mean {mean: .6f}  std {std:.2e}")
+
+
+if __name__ == '__main__':
+    main()
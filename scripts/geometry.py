@@ -0,0 +1,115 @@
+"""Model STL projection, view bounds and pixel mapping shared by the render scripts.
+
+Triangles near the slice plane are selected with one boolean mask over the
+STL's (n, 3, 3) vertex array and converted to pixels in one array operation.
+Projections are cached in-process per STL content hash, so repeated renders
+of the same model (e.g. in the worker) skip parsing the file again.
+"""
+
+import hashlib
+import os
+
+import cv2
+import numpy as np
+
+HASH_BLOCK = 8 * 1024 * 1024
+
+_digest_cache = {}
+_projection_cache = {}
+
+
+def stl_digest(stl_path):
+    """Content digest of an STL file, rehashed only when its mtime or size changes."""
+    path = os.path.realpath(stl_path)
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key not in _digest_cache:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b''):
+                digest.update(block)
+        _digest_cache[key] = digest.hexdigest()
+    return _digest_cache[key]
+
+
+def plane_triangles(vectors, z=0.0, tol=0.001):
+    """XY projection of the (n, 3, 3) triangles whose mean z lies within 10 * tol of z."""
+    near = np.abs(vectors[:, :, 2].mean(axis=1) - z) < tol * 10
+    return np.ascontiguousarray(vectors[near, :, :2], dtype=np.float64)
+
+
+def load_and_project_stl(stl_path, tol=0.001, z=0.0):
+    """Projected (n, 3, 2) triangles of an STL near the z plane, cached per STL hash."""
+    key = (stl_digest(stl_path), tol, z)
+    if key not in _projection_cache:
+        from stl import mesh  # Requires: pip install numpy-stl
+        model = mesh.Mesh.from_file(stl_path)
+        _projection_cache[key] = plane_triangles(model.vectors, z, tol)
+    return _projection_cache[key]
+
+
+def view_bounds(triangles_xy, width, height, padding=0.05):
+    """(x_min, x_max, y_min, y_max) centred on the model, matching the image aspect, with padding."""
+    if len(triangles_xy) == 0:
+        raise ValueError("No STL triangles found near the slice plane.")
+
+    aspect = width / height
+
+    tri_mean = triangles_xy.mean(axis=(0, 1))
+    print(f"STL projected mean position: x={tri_mean[0]:.3f}, y={tri_mean[1]:.3f}")
+
+    tri_max_dist = np.linalg.norm(triangles_xy.reshape(-1, 2) - tri_mean, axis=1).max()
+    print(f"STL projected max distance from mean: {tri_max_dist:.3f}")
+
+    # Fix aspect ratio to image
+    x_half_range = tri_max_dist
+    y_half_range = tri_max_dist
+
+    if (x_half_range / y_half_range) > aspect:
+        # Width is limiting factor
+        y_half_range = x_half_range / aspect
+    else:
+        # Height is limiting factor
+        x_half_range = y_half_range * aspect
+
+    x_min = tri_mean[0] - x_half_range
+    x_max = tri_mean[0] + x_half_range
+    y_min = tri_mean[1] - y_half_range
+    y_max = tri_mean[1] + y_half_range
+
+    # Expand viewing area slightly (padding on each side)
+    pad_x = padding * (x_max - x_min)
+    pad_y = padding * (y_max - y_min)
+    return x_min - pad_x, x_max + pad_x, y_min - pad_y, y_max + pad_y
+
+
+def world_to_pixels(xy, x_min, x_max, y_min, y_max, width, height):
+    """Map an (..., 2) array of world coordinates to int32 pixel coordinates."""
+    px = (xy[..., 0] - x_min) / (x_max - x_min) * (width - 1)
+    py = (y_max - xy[..., 1]) / (y_max - y_min) * (height - 1)
+    return np.stack((px, py), axis=-1).astype(np.int32)
+
+
+def profile_mask(triangles_xy, bounds, width, height):
+    """uint8 mask of the model profile: the filled outer contour of the projected triangles."""
+    mask = np.zeros((height, width), dtype=np.uint8)
+    if len(triangles_xy) == 0:
+        return mask
+
+    polygons = world_to_pixels(triangles_xy, *bounds, width, height)  # (n, 3, 2)
+
+    # fillPoly fills several polygons even-odd, so overlapping triangles leave
+    # holes; outlining every triangle as well keeps the outer boundary intact,
+    # and only the outer contour is used below.
+    tri_mask = np.zeros((height, width), dtype=np.uint8)
+    cv2.fillPoly(tri_mask, polygons, 255)
+    cv2.polylines(tri_mask, polygons, True, 255)
+
+    # Find external contours (boundaries) of the filled mask
+    contours, _ = cv2.findContours(tri_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    if len(contours) > 0:
+        # Select the largest contour by area (the main profile boundary)
+        largest_contour = max(contours, key=cv2.contourArea)
+        cv2.fillPoly(mask, [largest_contour], 255)
+    return mask
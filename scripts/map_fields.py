@@ -0,0 +1,222 @@
+"""Warm-start OpenFOAM cases from the converged fields of a nearby AoA.
+
+After an AoA finishes, `snapshot` stores its cell centres and the internal
+U, p, k, omega and nut fields in output/<job>/<aoa>/fields.npz. Before the
+next AoA is solved, `warm_start` picks the snapshot whose AoA is closest and
+writes its values into the new case's 0/ fields as the internalField; the
+boundaryField entries of the case are kept as they are.
+
+When the snapshot was taken on the same mesh (the rotate-inflow sweep mode)
+the values are copied cell for cell. Otherwise they are interpolated onto
+the new cell centres by inverse-distance weighting of the nearest source
+cells (cKDTree), which is what mapFields does for inconsistent meshes.
+"""
+
+import argparse
+import os
+import re
+import sys
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+import decomposed
+from plane_slice import cell_centres
+from polymesh import read_polymesh
+
+SNAPSHOT_NAME = "fields.npz"
+FIELDS = {'U': 'vector', 'p': 'scalar', 'k': 'scalar', 'omega': 'scalar', 'nut': 'scalar'}
+
+
+def case_centres(case_dir):
+    return cell_centres(read_polymesh(os.path.join(case_dir, 'constant', 'polyMesh')))
+
+
+def read_fields(case_dir, time, n_cells, fields=FIELDS):
+    """Internal values of the given fields as (n_cells,) or (n_cells, 3) arrays; missing fields are skipped."""
+    from fluidfoam import readscalar, readvector
+
+    values = {}
+    for name, kind in fields.items():
+        if not os.path.exists(os.path.join(case_dir, str(time), name)):
+            continue
+        if kind == 'vector':
+            data = readvector(case_dir, str(time), name, structured=False, verbose=False).T
+            values[name] = np.broadcast_to(data, (n_cells, 3))
+        else:
+            data = readscalar(case_dir, str(time), name, structured=False, verbose=False)
+            values[name] = np.broadcast_to(data, (n_cells,))
+    return values
+
+
+def read_decomposed_fields(case_dir, time, fields=FIELDS):
+    """Like read_fields, stitched from the processor directories of a case that was not reconstructed."""
+    values = {}
+    for name in fields:
+        if os.path.exists(os.path.join(case_dir, 'processor0', str(time), name)):
+            values[name] = decomposed.read_field(case_dir, time, name).T
+    return values
+
+
+def snapshot(case_dir, time, output_file, fields=FIELDS):
+    """Save the cell centres and internal fields of case_dir at `time` to output_file (.npz)."""
+    if decomposed.is_decomposed(case_dir, time):
+        centres = decomposed.case_centres(case_dir)
+        values = read_decomposed_fields(case_dir, time, fields)
+    else:
+        centres = case_centres(case_dir)
+        values = read_fields(case_dir, time, len(centres), fields)
+    if not values:
+        raise FileNotFoundError(f"No fields found in {os.path.join(case_dir, str(time))}")
+    tmp = output_file + '.tmp.npz'
+    np.savez(tmp, centres=centres.astype(np.float32),
+             **{name: data.astype(np.float32) for name, data in values.items()})
+    os.replace(tmp, output_file)
+    print(f"Saved {', '.join(values)} for {len(centres)} cells to {output_file}")
+    return {'output_file': output_file, 'n_cells': len(centres), 'fields': list(values)}
+
+
+def load_snapshot(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def nearest_snapshot(job_dir, aoa):
+    """(path, aoa) of the snapshot in job_dir whose AoA is closest to aoa, or (None, None)."""
+    best = (None, None)
+    if not os.path.isdir(job_dir):
+        return best
+    for folder in os.listdir(job_dir):
+        path = os.path.join(job_dir, folder, SNAPSHOT_NAME)
+        try:
+            folder_aoa = float(folder)
+        except ValueError:
+            continue
+        if os.path.exists(path) and (best[1] is None or abs(folder_aoa - aoa) < abs(best[1] - aoa)):
+            best = (path, folder_aoa)
+    return best
+
+
+def map_values(source_centres, target_centres, values, neighbours=4):
+    """Map per-cell source values onto target cells; returns (values, 'copy' | 'interpolate')."""
+    if source_centres.shape == target_centres.shape and np.array_equal(
+            source_centres, target_centres.astype(source_centres.dtype)):
+        return values, 'copy'
+
+    distance, index = cKDTree(source_centres).query(target_centres, k=neighbours)
+    distance, index = distance.reshape(len(target_centres), -1), index.reshape(len(target_centres), -1)
+    weights = 1.0 / np.maximum(distance, 1e-12) ** 2
+    weights /= weights.sum(axis=1, keepdims=True)
+    mapped = {}
+    for name, data in values.items():
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim == 1:
+            mapped[name] = np.einsum('ij,ij->i', weights, data[index])
+        else:
+            mapped[name] = np.einsum('ij,ijk->ik', weights, data[index])
+    return mapped, 'interpolate'
+
+
+def _format_list(data):
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim == 1:
+        return 'scalar', '\n'.join(map('{:.8g}'.format, data))
+    return 'vector', '\n'.join(map('({:.8g} {:.8g} {:.8g})'.format, *data.T))
+
+
+def write_internal_field(field_path, data):
+    """Replace the internalField of an OpenFOAM field file with a nonuniform list."""
+    with open(field_path, 'r') as f:
+        text = f.read()
+    kind, body = _format_list(data)
+    entry = f"internalField   nonuniform List<{kind}> \n{len(data)}\n(\n{body}\n)\n;"
+    text, n = re.subn(r'^internalField\s[^;]*;', lambda m: entry, text, count=1, flags=re.M)
+    if n == 0:
+        raise ValueError(f"No internalField entry in {field_path}")
+    with open(field_path, 'w') as f:
+        f.write(text)
+
+
+def map_fields(source, target_case, time='0', neighbours=4, source_time=None):
+    """Write the fields of source (a snapshot .npz, or a case at source_time) into target_case/<time>/."""
+    if source.endswith('.npz'):
+        snap = load_snapshot(source)
+        source_centres = snap.pop('centres')
+    else:
+        if source_time is None:
+            raise ValueError("A source time is needed to map from a case directory.")
+        source_centres = case_centres(source)
+        snap = read_fields(source, source_time, len(source_centres))
+
+    target_centres = case_centres(target_case)
+    targets = {name: os.path.join(target_case, str(time), name) for name in snap}
+    snap = {name: data for name, data in snap.items() if os.path.exists(targets[name])}
+    if not snap:
+        raise FileNotFoundError(f"No matching fields in {os.path.join(target_case, str(time))}")
+
+    mapped, method = map_values(source_centres, target_centres, snap, neighbours)
+    for name, data in mapped.items():
+        write_internal_field(targets[name], data)
+    print(f"Mapped {', '.join(mapped)} onto {len(target_centres)} cells of {target_case} ({method})")
+    return {'method': method, 'fields': list(mapped), 'n_cells': len(target_centres)}
+
+
+def warm_start(case_dir, job_dir, aoa, time='0', neighbours=4):
+    """Initialise case_dir/<time>/ from the snapshot in job_dir closest to aoa, if there is one."""
+    source, source_aoa = nearest_snapshot(job_dir, aoa)
+    if source is None:
+        print(f"No finished AoA to warm-start {aoa:g} deg from; using uniform initial fields.")
+        return {'source': None, 'source_aoa': None}
+    print(f"Warm-starting AoA {aoa:g} deg from {source_aoa:g} deg")
+    result = map_fields(source, case_dir, time, neighbours)
+    return {'source': source, 'source_aoa': source_aoa, **result}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Save converged OpenFOAM fields and map them onto a new case as initial conditions',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python map_fields.py snapshot run/my_job 1200 output/my_job/5.0/fields.npz
+  python map_fields.py warm-start run/my_job output/my_job 7.5
+  python map_fields.py map output/my_job/5.0/fields.npz run/other_job
+  python map_fields.py map run/old_case run/new_case --source-time 1200
+        """
+    )
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    snap = sub.add_parser('snapshot', help='Save cell centres and internal fields of a solved case')
+    snap.add_argument('case_dir')
+    snap.add_argument('time', help='Time directory to read')
+    snap.add_argument('output_file', help='Snapshot file (.npz)')
+
+    warm = sub.add_parser('warm-start', help='Initialise a case from the nearest AoA snapshot of a job')
+    warm.add_argument('case_dir')
+    warm.add_argument('job_dir', help='Job output directory with <aoa>/fields.npz snapshots')
+    warm.add_argument('aoa', type=float)
+    warm.add_argument('--time', default='0', help='Time directory to initialise (default: 0)')
+
+    mapping = sub.add_parser('map', help='Map a snapshot or solved case onto another case')
+    mapping.add_argument('source', help='Snapshot (.npz) or case directory')
+    mapping.add_argument('target_case')
+    mapping.add_argument('--time', default='0', help='Time directory of the target to write (default: 0)')
+    mapping.add_argument('--source-time', default=None, help='Time directory of a source case')
+    mapping.add_argument('--neighbours', type=int, default=4,
+                         help='Source cells averaged per target cell when the meshes differ (default: 4)')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'snapshot':
+            snapshot(args.case_dir, args.time, args.output_file)
+        elif args.command == 'warm-start':
+            warm_start(args.case_dir, args.job_dir, args.aoa, args.time)
+        else:
+            map_fields(args.source, args.target_case, args.time, args.neighbours, args.source_time)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Batched PCHIP fitting and evaluation.
+
+Many monotone cubic (PCHIP) curves of different lengths are stored flat: all
+breakpoints in one array and all interval coefficients in another, in scipy
+PPoly order. Fitting computes the Fritsch-Carlson slopes of every curve at
+once with the same rules as `scipy.interpolate.PchipInterpolator`, and
+evaluation at a shared set of points returns an (n_curves, n_points) array
+from one `np.searchsorted` and one Horner pass, so cost grows with the total
+number of values rather than with a Python loop over curves.
+"""
+
+import numpy as np
+
+
+def _edge_slope(h0, h1, m0, m1):
+    """One-sided three-point end slope, limited to keep the curve shape-preserving."""
+    d = ((2 * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+    d = np.where(np.sign(d) != np.sign(m0), 0.0, d)
+    return np.where((np.sign(m0) != np.sign(m1)) & (np.abs(d) > 3 * np.abs(m0)), 3 * m0, d)
+
+
+class PchipBatch:
+    """A set of PCHIP curves evaluated together.
+
+    x is the concatenated breakpoints, sizes the number of breakpoints of each
+    curve and c the (4, total intervals, ...) interval coefficients; trailing
+    dimensions hold several values per breakpoint (e.g. Cl, Cd and CmPitch).
+    """
+
+    def __init__(self, x, c, sizes):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.c = np.asarray(c, dtype=np.float64)
+        self.sizes = np.asarray(sizes, dtype=np.intp)
+        self.ends = np.cumsum(self.sizes)
+        self.starts = self.ends - self.sizes
+
+    def __len__(self):
+        return len(self.sizes)
+
+    @classmethod
+    def fit(cls, xs, ys):
+        """Fit one curve per (x, y) pair; each y is (k,) or (k, m) and each x strictly increasing."""
+        sizes = np.fromiter(map(len, xs), np.intp, len(xs))
+        if np.any(sizes < 2):
+            raise ValueError("Each curve needs at least two points.")
+        x = np.concatenate(xs).astype(np.float64)
+        y = np.concatenate(ys).astype(np.float64)
+        ends = np.cumsum(sizes)
+        starts = ends - sizes
+
+        # Differences across curve boundaries are computed too but never used
+        h = np.diff(x)
+        last = ends - 1
+        valid = np.ones(len(h), dtype=bool)
+        valid[last[:-1]] = False
+        if np.any(h[valid] <= 0):
+            raise ValueError("Breakpoints must be strictly increasing within each curve.")
+        h = np.where(valid, h, 1.0)
+        shape = (-1,) + (1,) * (y.ndim - 1)
+        m = np.diff(y, axis=0) / h.reshape(shape)
+
+        d = np.zeros_like(y)
+        interior = np.ones(len(x), dtype=bool)
+        interior[starts] = False
+        interior[last] = False
+        i = np.flatnonzero(interior)
+        if len(i):
+            hl, hr = h[i - 1].reshape(shape), h[i].reshape(shape)
+            ml, mr = m[i - 1], m[i]
+            w1, w2 = 2 * hr + hl, hr + 2 * hl
+            flat = (np.sign(ml) != np.sign(mr)) | (ml == 0) | (mr == 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                d[i] = np.where(flat, 0.0, (w1 + w2) / (w1 / ml + w2 / mr))
+
+        # Two-point curves are straight lines; longer ones use the limited end slopes
+        two = sizes == 2
+        d[starts[two]] = m[starts[two]]
+        d[last[two]] = m[starts[two]]
+        s, e = starts[~two], last[~two]
+        if len(s):
+            d[s] = _edge_slope(h[s].reshape(shape), h[s + 1].reshape(shape), m[s], m[s + 1])
+            d[e] = _edge_slope(h[e - 1].reshape(shape), h[e - 2].reshape(shape), m[e - 1], m[e - 2])
+
+        # Hermite coefficients of every interval, dropping the cross-curve ones
+        keep = np.flatnonzero(valid)
+        hk = h[keep].reshape(shape)
+        d0, d1, mk = d[keep], d[keep + 1], m[keep]
+        t = (d0 + d1 - 2 * mk) / hk
+        c = np.stack([t / hk, (mk - d0) / hk - t, d0, y[keep]])
+        return cls(x, c, sizes)
+
+    @classmethod
+    def from_ppoly(cls, breakpoints, coefficients):
+        """Wrap existing PPoly curves: breakpoints[i] is (k,), coefficients[i] is (4, k - 1, ...)."""
+        sizes = np.fromiter(map(len, breakpoints), np.intp, len(breakpoints))
+        return cls(np.concatenate(breakpoints), np.concatenate(coefficients, axis=1), sizes)
+
+    def curve(self, i):
+        """Breakpoints and coefficients of curve i."""
+        start, end = self.starts[i], self.ends[i]
+        return self.x[start:end], self.c[:, start - i:end - i - 1]
+
+    def __call__(self, points, extrapolate=True):
+        """Values at points for every curve: (n_curves, n_points, ...).
+
+        Outside a curve's breakpoints the end cubic is extended, or NaN is
+        returned when extrapolate is False.
+        """
+        points = np.atleast_1d(np.asarray(points, dtype=np.float64))
+        n, n_points = len(self), len(points)
+        if n == 0 or n_points == 0:
+            return np.full((n, n_points) + self.c.shape[2:], np.nan)
+
+        # Interval i of curve j is c[:, c_start[j] + i] and starts at x[c_start[j] + i + j]
+        c_start = self.starts - np.arange(n)
+
+        # Every curve shares the points, so place each interior breakpoint among the
+        # sorted points once; a running count along each row is then the interval index
+        order = np.argsort(points, kind='stable')
+        p = points[order]
+        interior = np.ones(len(self.x), dtype=bool)
+        interior[self.starts] = False
+        interior[self.ends - 1] = False
+        curve = np.repeat(np.arange(n), self.sizes)[interior]
+        first = np.searchsorted(p, self.x[interior], side='left')
+        counts = np.bincount(curve * (n_points + 1) + first, minlength=n * (n_points + 1))
+        local = np.cumsum(counts.reshape(n, n_points + 1)[:, :n_points], axis=1)
+
+        column = c_start[:, None] + local
+        dx = p[None, :] - self.x[column + np.arange(n)[:, None]]
+        dx = dx.reshape(dx.shape + (1,) * (self.c.ndim - 2))
+        c = self.c[:, column]  # (4, n, n_points, ...)
+        values = ((c[0] * dx + c[1]) * dx + c[2]) * dx + c[3]
+
+        if not extrapolate:
+            outside = (p[None, :] < self.x[self.starts][:, None]) | (p[None, :] > self.x[self.ends - 1][:, None])
+            values[outside] = np.nan
+        out = np.empty_like(values)
+        out[:, order] = values
+        return out
@@ -0,0 +1,247 @@
+"""Cutting-plane slice extraction and reusable interpolation weights.
+
+Instead of keeping every cell whose centre lies within a z-tolerance, the
+slice is made of the cells the plane actually cuts, found from each cell's
+vertex z-range via the owner/neighbour topology. One Delaunay triangulation
+of those cells' projected centres is built per mesh, and the barycentric
+weights onto a target grid are computed once and reused for every field and
+time step.
+"""
+
+import os
+
+import numpy as np
+
+from polymesh import read_polymesh, next_vertex_index
+
+MESH_FILES = ('points', 'faces', 'owner', 'neighbour')
+
+# Per-process caches: (polyMesh signature, z) -> PlaneSlice. Computed slices are kept
+# least recently used first and bounded, since the resident worker outlives many meshes;
+# registered ones are views onto a batch parent's shared memory.
+_slice_cache = {}
+_shared_slices = {}
+MAX_CACHED_SLICES = 4
+
+
+def _face_reduce(ufunc, values, face_offsets):
+    """Reduce per-label values to one value per face."""
+    return ufunc.reduceat(values, face_offsets[:-1], axis=0)
+
+
+def _cell_reduce(ufunc, face_values, mesh, initial):
+    """Reduce per-face values onto the owner and neighbour cells of each face."""
+    out = np.full((mesh.n_cells,) + face_values.shape[1:], initial, dtype=face_values.dtype)
+    ufunc.at(out, mesh.owner, face_values)
+    ufunc.at(out, mesh.neighbour, face_values[:mesh.n_internal_faces])
+    return out
+
+
+def cell_z_range(mesh):
+    """Return (z_min, z_max) over the vertices of every cell."""
+    z = mesh.points[mesh.face_labels, 2]
+    face_min = _face_reduce(np.minimum, z, mesh.face_offsets)
+    face_max = _face_reduce(np.maximum, z, mesh.face_offsets)
+    return (_cell_reduce(np.minimum, face_min, mesh, np.inf),
+            _cell_reduce(np.maximum, face_max, mesh, -np.inf))
+
+
+def _subset_faces(face_offsets, face_labels, faces):
+    """CSR arrays restricted to the given face indices."""
+    starts = face_offsets[faces]
+    sizes = face_offsets[faces + 1] - starts
+    offsets = np.zeros(len(faces) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    index = np.repeat(starts - offsets[:-1], sizes) + np.arange(offsets[-1])
+    return offsets, face_labels[index]
+
+
+def cell_centres(mesh, cells=None):
+    """Area-weighted average of face centres for each cell (or only `cells`)."""
+    if cells is None:
+        cells = np.arange(mesh.n_cells)
+    # Local index of every requested cell, -1 elsewhere
+    local = np.full(mesh.n_cells, -1, dtype=np.int64)
+    local[cells] = np.arange(len(cells))
+    owner = local[mesh.owner]
+    neighbour = np.full(mesh.n_faces, -1, dtype=np.int64)
+    neighbour[:mesh.n_internal_faces] = local[mesh.neighbour]
+    faces = np.nonzero((owner >= 0) | (neighbour >= 0))[0]
+    owner, neighbour = owner[faces], neighbour[faces]
+    offsets, labels = _subset_faces(mesh.face_offsets, mesh.face_labels, faces)
+
+    verts = mesh.points[labels]
+    sizes = np.diff(offsets)
+    face_mid = _face_reduce(np.add, verts, offsets) / sizes[:, None]
+    # Fan-triangulate every face around its vertex average to get its area
+    following = mesh.points[labels[next_vertex_index(offsets)]]
+    mid = np.repeat(face_mid, sizes, axis=0)
+    area = np.linalg.norm(_face_reduce(np.add, np.cross(verts - mid, following - mid), offsets), axis=1) * 0.5
+
+    sides = [(owner >= 0, owner), (neighbour >= 0, neighbour)]
+    weight = sum(np.bincount(cell[on], area[on], len(cells)) for on, cell in sides)
+    centres = np.empty((len(cells), 3))
+    for d in range(3):
+        weighted = area * face_mid[:, d]
+        centres[:, d] = sum(np.bincount(cell[on], weighted[on], len(cells)) for on, cell in sides)
+    return centres / weight[:, None]
+
+
+def plane_cells(mesh, z=0.0):
+    """Indices of the cells cut by the plane at height z.
+
+    Cells whose vertex range is [z_min, z_max) around the plane are selected, so
+    where the plane coincides with cell faces only the layer above it is kept.
+    """
+    z_min, z_max = cell_z_range(mesh)
+    return np.nonzero((z_min <= z) & (z < z_max))[0]
+
+
+class GridWeights:
+    """Barycentric weights of a Delaunay triangulation evaluated at fixed query points."""
+
+    def __init__(self, vertices, weights, inside, shape):
+        self.vertices = vertices  # (n_inside, 3) indices into the slice points
+        self.weights = weights    # (n_inside, 3) barycentric weights
+        self.inside = inside      # (n_query,) bool, False outside the convex hull
+        self.shape = shape
+
+    @classmethod
+    def from_triangulation(cls, tri, query_xy, shape):
+        simplex = tri.find_simplex(query_xy)
+        inside = simplex >= 0
+        simplex = simplex[inside]
+        transform = tri.transform[simplex]
+        delta = query_xy[inside] - transform[:, 2]
+        bary = np.einsum('nij,nj->ni', transform[:, :2], delta)
+        weights = np.column_stack((bary, 1.0 - bary.sum(axis=1)))
+        return cls(tri.simplices[simplex], weights, inside, shape)
+
+    def arrays(self):
+        return {'vertices': self.vertices, 'weights': self.weights,
+                'inside': self.inside, 'shape': np.array(self.shape)}
+
+    @classmethod
+    def from_arrays(cls, vertices, weights, inside, shape):
+        return cls(vertices, weights, inside, tuple(int(n) for n in shape))
+
+    def __call__(self, values):
+        """Interpolate per-point values (shape (n_points,) or (n_points, k)) onto the grid."""
+        values = np.asarray(values, dtype=float)
+        out = np.full((self.inside.size,) + values.shape[1:], np.nan)
+        out[self.inside] = np.einsum('ni,ni...->n...', self.weights, values[self.vertices])
+        return out.reshape(self.shape + values.shape[1:])
+
+
+class BilinearWeights:
+    """Separable bilinear resampling from one rectilinear grid onto another."""
+
+    def __init__(self, ix, fx, iy, fy):
+        self.ix, self.fx = ix, fx
+        self.iy, self.fy = iy, fy
+
+    @staticmethod
+    def _axis(src, dst):
+        index = np.clip(np.searchsorted(src, dst, side='right') - 1, 0, len(src) - 2)
+        frac = (dst - src[index]) / (src[index + 1] - src[index])
+        return index, frac
+
+    @classmethod
+    def from_axes(cls, src_x, src_y, dst_x, dst_y):
+        """Weights taking a grid over meshgrid(src_x, src_y) onto meshgrid(dst_x, dst_y); src axes ascending."""
+        ix, fx = cls._axis(src_x, dst_x)
+        iy, fy = cls._axis(src_y, dst_y)
+        return cls(ix, fx, iy, fy)
+
+    def arrays(self):
+        return {'ix': self.ix, 'fx': self.fx, 'iy': self.iy, 'fy': self.fy}
+
+    @classmethod
+    def from_arrays(cls, ix, fx, iy, fy):
+        return cls(ix, fx, iy, fy)
+
+    def __call__(self, grid):
+        rows0, rows1 = grid[self.iy], grid[self.iy + 1]
+        fx = self.fx
+        top = rows0[:, self.ix] * (1 - fx) + rows0[:, self.ix + 1] * fx
+        bottom = rows1[:, self.ix] * (1 - fx) + rows1[:, self.ix + 1] * fx
+        fy = self.fy[:, None]
+        return top * (1 - fy) + bottom * fy
+
+
+class PlaneSlice:
+    """Cells cut by a z-plane together with their projected centres and triangulation."""
+
+    def __init__(self, cells, centres_xy, z=0.0):
+        self.cells = cells
+        self.centres_xy = centres_xy
+        self.z = z
+        self._triangulation = None
+        self._grid_weights = {}
+
+    @classmethod
+    def from_mesh(cls, mesh, z=0.0):
+        cells = plane_cells(mesh, z)
+        return cls(cells, cell_centres(mesh, cells)[:, :2], z)
+
+    @property
+    def triangulation(self):
+        if self._triangulation is None:
+            from scipy.spatial import Delaunay
+            self._triangulation = Delaunay(self.centres_xy)
+        return self._triangulation
+
+    def select(self, field):
+        """Pick the plane cells from a scalar (n_cells,) or fluidfoam-style (k, n_cells) field.
+
+        Returns (n_plane,) or (n_plane, k) values; uniform fields are broadcast.
+        """
+        field = np.asarray(field, dtype=float)
+        cells = self.cells if field.shape[-1] > 1 else np.zeros(len(self.cells), dtype=int)
+        return field[..., cells].T
+
+    def grid_weights(self, xi, yi):
+        """Weights onto the grid meshgrid(xi, yi), cached per grid."""
+        key = (xi[0], xi[-1], len(xi), yi[0], yi[-1], len(yi))
+        if key not in self._grid_weights:
+            XI, YI = np.meshgrid(xi, yi)
+            query = np.column_stack((XI.ravel(), YI.ravel()))
+            self._grid_weights[key] = GridWeights.from_triangulation(self.triangulation, query, XI.shape)
+        return self._grid_weights[key]
+
+
+def _mesh_signature(polymesh_dir):
+    stats = []
+    for name in MESH_FILES:
+        path = os.path.join(polymesh_dir, name)
+        if not os.path.exists(path):
+            path += '.gz'
+        st = os.stat(path)
+        stats.append((st.st_mtime_ns, st.st_size))
+    return os.path.realpath(polymesh_dir), tuple(stats)
+
+
+def load_plane_slice(sol_dir, z=0.0):
+    """Load (or reuse from this process's cache) the plane slice of a case's mesh."""
+    polymesh_dir = os.path.join(sol_dir, 'constant', 'polyMesh')
+    key = (_mesh_signature(polymesh_dir), z)
+    if key in _shared_slices:
+        return _shared_slices[key]
+    return cached_slice(_slice_cache, key, lambda: PlaneSlice.from_mesh(read_polymesh(polymesh_dir), z))
+
+
+def cached_slice(cache, key, compute):
+    """cache[key], computed on a miss, keeping at most MAX_CACHED_SLICES most recently used entries."""
+    plane = cache.pop(key, None)
+    if plane is None:
+        plane = compute()
+    cache[key] = plane
+    while len(cache) > MAX_CACHED_SLICES:
+        del cache[next(iter(cache))]
+    return plane
+
+
+def register_plane_slice(sol_dir, plane):
+    """Seed this process's cache with a slice computed elsewhere, e.g. shared by a batch parent."""
+    polymesh_dir = os.path.join(sol_dir, 'constant', 'polyMesh')
+    _shared_slices[(_mesh_signature(polymesh_dir), plane.z)] = plane
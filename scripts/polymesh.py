@@ -0,0 +1,253 @@
+"""Fast reader for OpenFOAM polyMesh files.
+
+Parses `points`, `faces`, `owner`, `neighbour` and `boundary` straight into
+NumPy arrays. Files are memory-mapped and ASCII bodies are parsed in chunks,
+so peak memory stays close to the size of the resulting arrays. Both the
+`ascii` and `binary` writeFormat are supported, as are gzip-compressed files
+(`writeCompression on`), which are decompressed into memory instead.
+
+Faces are returned in a compact CSR layout: `face_offsets` has n_faces + 1
+entries and the labels of face i are `face_labels[face_offsets[i]:face_offsets[i + 1]]`.
+"""
+
+import gzip
+import mmap
+import os
+import re
+
+import numpy as np
+
+# Parse ASCII bodies in pieces of roughly this many bytes
+CHUNK_SIZE = 32 * 1024 * 1024
+
+_HEADER_RE = re.compile(rb'FoamFile\s*\{(.*?)\}', re.DOTALL)
+_ENTRY_RE = re.compile(rb'(\w+)\s+("[^"]*"|[^;]*);')
+# Skips comments and whitespace up to the "N (" that opens a list
+_LIST_START_RE = re.compile(rb'(?:\s+|//[^\n]*\n|/\*.*?\*/)*(\d+)\s*\(', re.DOTALL)
+_FACE_SIZE_RE = re.compile(rb'(\d+)\s*\(')
+_PARENS = bytes.maketrans(b'()', b'  ')
+
+
+class PolyMesh:
+    """Arrays describing an OpenFOAM polyMesh."""
+
+    def __init__(self, points, face_offsets, face_labels, owner, neighbour, boundary, n_cells=None):
+        self.points = points
+        self.face_offsets = face_offsets
+        self.face_labels = face_labels
+        self.owner = owner
+        self.neighbour = neighbour
+        self.boundary = boundary
+        if n_cells is None:
+            n_cells = int(owner.max()) + 1 if len(owner) else 0
+        self.n_cells = n_cells
+
+    @property
+    def n_points(self):
+        return len(self.points)
+
+    @property
+    def n_faces(self):
+        return len(self.face_offsets) - 1
+
+    @property
+    def n_internal_faces(self):
+        return len(self.neighbour)
+
+    def face_sizes(self):
+        return np.diff(self.face_offsets)
+
+    def __repr__(self):
+        return (f"PolyMesh(points={self.n_points}, faces={self.n_faces}, "
+                f"internal_faces={self.n_internal_faces}, cells={self.n_cells})")
+
+
+def _open_buffer(path):
+    """Return a read-only buffer over an OpenFOAM file, falling back to `<path>.gz`."""
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if os.path.exists(path + '.gz'):
+        with gzip.open(path + '.gz', 'rb') as f:
+            return f.read()
+    raise FileNotFoundError(f"OpenFOAM file not found: {path}")
+
+
+def _parse_header(buf):
+    """Parse the FoamFile header into a dict and return it with the offset after it."""
+    match = _HEADER_RE.search(buf, 0, 4096)
+    if match is None:
+        return {}, 0
+    header = {}
+    for key, value in _ENTRY_RE.findall(match.group(1)):
+        header[key.decode()] = value.strip().strip(b'"').decode()
+    return header, match.end()
+
+
+def _dtypes(header):
+    """Label and scalar dtypes described by the header `arch` entry."""
+    arch = header.get('arch', 'LSB;label=32;scalar=64')
+    order = '>' if 'MSB' in arch else '<'
+    label = re.search(r'label=(\d+)', arch)
+    scalar = re.search(r'scalar=(\d+)', arch)
+    label_bits = int(label.group(1)) if label else 32
+    scalar_bits = int(scalar.group(1)) if scalar else 64
+    return np.dtype(f'{order}i{label_bits // 8}'), np.dtype(f'{order}f{scalar_bits // 8}')
+
+
+def _list_start(buf, pos):
+    """Locate the next `N (` list opening; return (N, offset just past the parenthesis)."""
+    match = _LIST_START_RE.match(buf, pos)
+    if match is None:
+        raise ValueError("Could not find list data in OpenFOAM file")
+    return int(match.group(1)), match.end()
+
+
+def _chunks(buf, start, end):
+    """Yield (start, stop) ranges of the ASCII body, each ending just after a ')'."""
+    while start < end:
+        stop = min(start + CHUNK_SIZE, end)
+        if stop < end:
+            split = buf.rfind(b')', start, stop)
+            if split <= start:
+                split = buf.find(b')', stop, end)
+                stop = end if split == -1 else split + 1
+            else:
+                stop = split + 1
+        yield start, stop
+        start = stop
+
+
+def _read_ascii_values(buf, start, end, count, dtype):
+    """Parse `count` whitespace separated numbers from buf[start:end], ignoring parentheses."""
+    out = np.empty(count, dtype=dtype)
+    filled = 0
+    for lo, hi in _chunks(buf, start, end):
+        values = np.fromstring(buf[lo:hi].translate(_PARENS), dtype=dtype, sep=' ')
+        n = min(len(values), count - filled)
+        out[filled:filled + n] = values[:n]
+        filled += n
+        if filled >= count:
+            break
+    if filled != count:
+        raise ValueError(f"Expected {count} values but parsed {filled}")
+    return out
+
+
+def _read_list(buf, pos, dtype, width, binary):
+    """Read a list of `width`-component items starting at `pos`; return (array, end offset)."""
+    n, start = _list_start(buf, pos)
+    count = n * width
+    if binary:
+        values = np.frombuffer(buf, dtype=dtype, count=count, offset=start)
+        end = start + count * dtype.itemsize
+    else:
+        # Vector items are parenthesised, so their list closes at the last ')'
+        end = buf.find(b')', start) if width == 1 else buf.rfind(b')')
+        values = _read_ascii_values(buf, start, end, count, dtype)
+    if width > 1:
+        values = values.reshape(n, width)
+    return values, end + 1
+
+
+def read_points(polymesh_dir):
+    """Read `points` as an (n_points, 3) float array."""
+    buf = _open_buffer(os.path.join(polymesh_dir, 'points'))
+    header, pos = _parse_header(buf)
+    _, scalar_dtype = _dtypes(header)
+    binary = header.get('format') == 'binary'
+    points, _ = _read_list(buf, pos, scalar_dtype, 3, binary)
+    return points
+
+
+def read_labels(polymesh_dir, name):
+    """Read a labelList such as `owner` or `neighbour` as an int array."""
+    buf = _open_buffer(os.path.join(polymesh_dir, name))
+    header, pos = _parse_header(buf)
+    label_dtype, _ = _dtypes(header)
+    binary = header.get('format') == 'binary'
+    labels, _ = _read_list(buf, pos, label_dtype, 1, binary)
+    return labels
+
+
+def _read_ascii_faces(buf, start, end, n_faces, label_dtype):
+    """Parse a `N(a b c ...)` faceList body into CSR arrays."""
+    sizes = np.empty(n_faces, dtype=np.int64)
+    label_chunks = []
+    parsed = 0
+    for lo, hi in _chunks(buf, start, end):
+        chunk = buf[lo:hi]
+        chunk_sizes = np.array(_FACE_SIZE_RE.findall(chunk), dtype=np.int64)
+        labels = np.fromstring(_FACE_SIZE_RE.sub(b' ', chunk).translate(_PARENS), dtype=label_dtype, sep=' ')
+        if labels.size != chunk_sizes.sum():
+            raise ValueError("Malformed faces file: face sizes do not match label count")
+        sizes[parsed:parsed + len(chunk_sizes)] = chunk_sizes
+        label_chunks.append(labels)
+        parsed += len(chunk_sizes)
+    if parsed != n_faces:
+        raise ValueError(f"Expected {n_faces} faces but parsed {parsed}")
+    offsets = np.zeros(n_faces + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    labels = np.concatenate(label_chunks) if label_chunks else np.empty(0, dtype=label_dtype)
+    return offsets, labels
+
+
+def read_faces(polymesh_dir):
+    """Read `faces` as CSR arrays (face_offsets, face_labels)."""
+    buf = _open_buffer(os.path.join(polymesh_dir, 'faces'))
+    header, pos = _parse_header(buf)
+    label_dtype, _ = _dtypes(header)
+    binary = header.get('format') == 'binary'
+
+    if header.get('class') == 'faceCompactList':
+        # Two consecutive labelLists: offsets (n_faces + 1) then the flat labels
+        offsets, pos = _read_list(buf, pos, label_dtype, 1, binary)
+        labels, _ = _read_list(buf, pos, label_dtype, 1, binary)
+        return offsets.astype(np.int64), labels
+
+    n_faces, start = _list_start(buf, pos)
+    end = buf.rfind(b')')
+    return _read_ascii_faces(buf, start, end, n_faces, label_dtype)
+
+
+def read_boundary(polymesh_dir):
+    """Read `boundary` as a list of patch dicts (name, type, nFaces, startFace, ...)."""
+    buf = _open_buffer(os.path.join(polymesh_dir, 'boundary'))
+    _, pos = _parse_header(buf)
+    _, start = _list_start(buf, pos)
+    body = bytes(buf[start:])
+    patches = []
+    for name, entries in re.findall(rb'(\w+)\s*\{([^}]*)\}', body):
+        patch = {'name': name.decode()}
+        for key, value in _ENTRY_RE.findall(entries):
+            value = value.strip().decode()
+            patch[key.decode()] = int(value) if key in (b'nFaces', b'startFace') else value
+        patches.append(patch)
+    return patches
+
+
+def read_mesh_counts(polymesh_dir):
+    """Return the nPoints/nCells/nFaces/nInternalFaces counts from the `owner` header note."""
+    buf = _open_buffer(os.path.join(polymesh_dir, 'owner'))
+    header, _ = _parse_header(buf)
+    return {key: int(value) for key, value in re.findall(r'(n\w+):\s*(\d+)', header.get('note', ''))}
+
+
+def next_vertex_index(face_offsets):
+    """For each entry of face_labels, the index of the following vertex around its face."""
+    following = np.arange(1, face_offsets[-1] + 1, dtype=np.int64)
+    following[face_offsets[1:] - 1] = face_offsets[:-1]
+    return following
+
+
+def read_polymesh(polymesh_dir):
+    """Read a complete polyMesh directory into a PolyMesh."""
+    points = read_points(polymesh_dir)
+    face_offsets, face_labels = read_faces(polymesh_dir)
+    owner = read_labels(polymesh_dir, 'owner')
+    neighbour = read_labels(polymesh_dir, 'neighbour')
+    boundary = read_boundary(polymesh_dir)
+    n_cells = read_mesh_counts(polymesh_dir).get('nCells')
+    return PolyMesh(points, face_offsets, face_labels, owner, neighbour, boundary, n_cells)
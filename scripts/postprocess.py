@@ -1,167 +1,280 @@
 import os
 import json
+import hashlib
 import matplotlib.pyplot as plt
 import numpy as np
-from PIL import Image
-from scipy.interpolate import PchipInterpolator
+from animation import ffmpeg_available, write_animation
+import results_store
+from coeff_model import CoefficientModel, model_path, predict_coefficients
 import argparse
 
-# Parse command line arguments
-parser = argparse.ArgumentParser(description='Postprocess simulation data from a directory containing angle of attack (AoA) folders')
-parser.add_argument('folder_path', help='Path to the directory containing AoA folders with results.json files')
-args = parser.parse_args()
 
-# Define the base directory containing AoA folders
-base_dir = args.folder_path
+MANIFEST_NAME = "postprocess_manifest.json"
+MANIFEST_VERSION = 3
+HASH_BLOCK = 8 * 1024 * 1024
 
-# Validate that the directory exists
-if not os.path.exists(base_dir):
-    raise FileNotFoundError(f"The specified directory does not exist: {base_dir}")
 
-if not os.path.isdir(base_dir):
-    raise NotADirectoryError(f"The specified path is not a directory: {base_dir}")
+def _file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
 
-print(f"Processing data from: {base_dir}")
 
-# Initialize lists to store data
-data_list = []
+def _file_entry(path, previous=None):
+    """Stat stamp and content hash of a file, rehashing only when the stamp changed."""
+    st = os.stat(path)
+    stamp = [st.st_mtime_ns, st.st_size]
+    if previous and previous['stamp'] == stamp:
+        return previous
+    return {'stamp': stamp, 'hash': _file_hash(path)}
 
-# Loop through each AoA folder
-for aoa_folder in os.listdir(base_dir):
-    aoa_path = os.path.join(base_dir, aoa_folder)
-    if os.path.isdir(aoa_path):
+
+def _digest(value):
+    return hashlib.blake2b(json.dumps(value, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def load_manifest(base_dir):
+    try:
+        with open(os.path.join(base_dir, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+
+def save_manifest(base_dir, manifest):
+    path = os.path.join(base_dir, MANIFEST_NAME)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp, path)
+
+
+def _results_entries(base_dir, previous):
+    """Stamp and hash of every AoA folder's results.json, keyed by folder."""
+    entries = {}
+    for folder in os.listdir(base_dir):
+        json_file = os.path.join(base_dir, folder, "results.json")
         try:
-            # Try to convert folder name to float (AoA value)
-            aoa = float(aoa_folder)
-            json_file = os.path.join(aoa_path, "results.json")
-            png_file = os.path.join(aoa_path, "render.png")
-            if os.path.exists(json_file):
-                with open(json_file, 'r') as f:
-                    data = json.load(f)
-                    # Store data with AoA and PNG path
-                    data_list.append({
-                        'aoa': aoa,
-                        'cl': data["Cl"],
-                        'cd': data["CdPressure"] + data["CdViscous"],
-                        'cmpitch': data["CmPitch"],
-                        'png': png_file if os.path.exists(png_file) else None
-                    })
+            float(folder)
         except ValueError:
-            # Skip folders that aren't valid numbers
             continue
+        if os.path.exists(json_file):
+            entries[folder] = _file_entry(json_file, previous.get(folder))
+    return entries
+
+
+def scan_results(base_dir, manifest, rebuild=False):
+    """Coefficient records of every AoA from the job's coefficient store.
+
+    The store is read in one go. Only the AoAs whose results.json was added or
+    changed since the manifest was written are read and upserted, and removed
+    AoAs are dropped (results.json files are only rehashed when their stat
+    stamp changed, and likewise the render images). The store is rebuilt from
+    every results.json when `rebuild` is set, when there is no manifest, or
+    when the store does not exist yet. Returns (data_list, inputs, n_read).
+    """
+    previous = manifest['inputs'] if manifest else {}
+    results = _results_entries(base_dir, previous.get('results', {}))
+    if rebuild or not manifest or not os.path.exists(results_store.store_path(base_dir)):
+        table = results_store.build_results(base_dir)
+        n_read = len(table['aoa'])
+    else:
+        known = previous['results']
+        changed = [folder for folder, entry in results.items() if known.get(folder, {}).get('hash') != entry['hash']]
+        removed = [folder for folder in known if folder not in results]
+        if changed or removed:
+            fresh = {}
+            for folder in changed:
+                with open(os.path.join(base_dir, folder, "results.json"), 'r') as f:
+                    fresh[folder] = json.load(f)
+            table = results_store.update_results(base_dir, fresh, removed)
+        else:
+            table = results_store.load_results(base_dir)
+        n_read = len(changed) + 1
+    cd = results_store.total_drag(table)
+
+    data_list = []
+    renders = {}
+    previous_renders = previous.get('renders', {})
+    for i, aoa_folder in enumerate(table['folder'].tolist()):
+        png_file = os.path.join(base_dir, aoa_folder, "render.png")
+        render = _file_entry(png_file, previous_renders.get(aoa_folder)) if os.path.exists(png_file) else None
+        renders[aoa_folder] = render
+
+        # Store data with AoA and PNG path
+        data_list.append({
+            'aoa': float(table['aoa'][i]),
+            'folder': aoa_folder,
+            'cl': float(table['Cl'][i]),
+            'cd': float(cd[i]),
+            'cmpitch': float(table['CmPitch'][i]),
+            'png': png_file if render else None,
+        })
+
+    inputs = {'results': results, 'renders': renders}
+    return data_list, inputs, n_read
+
+
+def plot_coefficients(plot_path, aoa_values, values, model, show=False):
+    # Generate range for plotting fits
+    aoa_range = np.linspace(min(aoa_values), max(aoa_values), 100)
+    fits = model.evaluate(aoa_range)
+
+    # Create plots
+    plt.figure(figsize=(12, 8))
+
+    panels = [
+        ('Cl', 'b', "Lift Coefficient vs Angle of Attack"),
+        ('Cd', 'r', "Drag Coefficient (Cd) vs Angle of Attack"),
+        ('CmPitch', 'g', "Pitching Moment Coefficient vs Angle of Attack"),
+    ]
+    for i, (name, color, title) in enumerate(panels):
+        plt.subplot(3, 1, i + 1)
+        plt.plot(aoa_values, values[name], marker='o', linestyle='', color=color, label='Data')
+        plt.plot(aoa_range, fits[name], linestyle='--', color=color, label='PCHIP Fit')
+        plt.title(title)
+        plt.xlabel("Angle of Attack (degrees)")
+        plt.ylabel(name)
+        plt.grid(True)
+        plt.legend()
+
+    # Adjust layout and save/display plot
+    plt.tight_layout()
+    plt.savefig(plot_path)
+    if show:
+        plt.show()
+    plt.close()
+
+
+def postprocess(folder_path, show=False, incremental=False, gif_max_width=None, video=None):
+    """Fit PCHIP curves, plot coefficients and build the render GIF for one job directory.
+
+    With `incremental`, coefficients come from the job's coefficient store in
+    one read, and a manifest of the results.json files' and render images'
+    mtime, size and content hash is used to rebuild only the artifacts
+    (parameters, plot, GIF) whose inputs changed. A full run rebuilds the
+    store from every results.json. Animations are streamed frame by frame;
+    `gif_max_width` downscales the GIF and `video` ('mp4' or 'webm') also
+    writes output.<video> when ffmpeg is installed.
+    """
+    # Define the base directory containing AoA folders
+    base_dir = folder_path
 
-# Sort data by AoA for ascending order
-data_list.sort(key=lambda x: x['aoa'])
-
-# Extract sorted data
-aoa_values = [d['aoa'] for d in data_list]
-cl_values = [d['cl'] for d in data_list]
-cd_values = [d['cd'] for d in data_list]
-cmpitch_values = [d['cmpitch'] for d in data_list]
-png_files = [d['png'] for d in data_list if d['png'] is not None]
-
-# Perform PCHIP interpolation
-if len(aoa_values) > 1:  # Need at least 2 points for interpolation
-    cl_pchip = PchipInterpolator(aoa_values, cl_values)
-    cd_pchip = PchipInterpolator(aoa_values, cd_values)
-    cmpitch_pchip = PchipInterpolator(aoa_values, cmpitch_values)
-else:
-    raise ValueError("Not enough data points for interpolation.")
-
-# Save PCHIP parameters (knots and y-values)
-pchip_params = {
-    'Cl': {'knots': aoa_values, 'values': cl_values},
-    'Cd': {'knots': aoa_values, 'values': cd_values},
-    'CmPitch': {'knots': aoa_values, 'values': cmpitch_values}
-}
-params_file = os.path.join(base_dir, "pchip_parameters.json")
-with open(params_file, 'w') as f:
-    json.dump(pchip_params, f, indent=4)
-print(f"PCHIP parameters saved to: {params_file}")
-
-# Function to load PCHIP parameters and predict coefficients
-def predict_coefficients(aoa, params_file):
-    with open(params_file, 'r') as f:
-        params = json.load(f)
-    
-    # Reconstruct PCHIP interpolators
-    cl_pchip = PchipInterpolator(params['Cl']['knots'], params['Cl']['values'])
-    cd_pchip = PchipInterpolator(params['Cd']['knots'], params['Cd']['values'])
-    cmpitch_pchip = PchipInterpolator(params['CmPitch']['knots'], params['CmPitch']['values'])
-    
-    # Predict coefficients
-    aoa = np.array(aoa)
-    return {
-        'aoa': aoa.tolist(),
-        'Cl': cl_pchip(aoa).tolist(),
-        'Cd': cd_pchip(aoa).tolist(),
-        'CmPitch': cmpitch_pchip(aoa).tolist()
-    }
-
-# Example prediction
-example_aoa = np.linspace(min(aoa_values), max(aoa_values), 5)
-predictions = predict_coefficients(example_aoa, params_file)
-print("Example predictions for AoA:", predictions)
-
-# Generate range for plotting fits
-aoa_range = np.linspace(min(aoa_values), max(aoa_values), 100)
-
-# Create plots
-plt.figure(figsize=(12, 8))
-
-# Plot Lift Coefficient (Cl)
-plt.subplot(3, 1, 1)
-plt.plot(aoa_values, cl_values, marker='o', linestyle='', color='b', label='Data')
-plt.plot(aoa_range, cl_pchip(aoa_range), linestyle='--', color='b', label='PCHIP Fit')
-plt.title("Lift Coefficient vs Angle of Attack")
-plt.xlabel("Angle of Attack (degrees)")
-plt.ylabel("Cl")
-plt.grid(True)
-plt.legend()
-
-# Plot Drag Coefficient (Cd)
-plt.subplot(3, 1, 2)
-plt.plot(aoa_values, cd_values, marker='o', linestyle='', color='r', label='Data')
-plt.plot(aoa_range, cd_pchip(aoa_range), linestyle='--', color='r', label='PCHIP Fit')
-plt.title("Drag Coefficient (Cd) vs Angle of Attack")
-plt.xlabel("Angle of Attack (degrees)")
-plt.ylabel("Cd")
-plt.grid(True)
-plt.legend()
-
-# Plot Pitching Moment Coefficient (CmPitch)
-plt.subplot(3, 1, 3)
-plt.plot(aoa_values, cmpitch_values, marker='o', linestyle='', color='g', label='Data')
-plt.plot(aoa_range, cmpitch_pchip(aoa_range), linestyle='--', color='g', label='PCHIP Fit')
-plt.title("Pitching Moment Coefficient vs Angle of Attack")
-plt.xlabel("Angle of Attack (degrees)")
-plt.ylabel("CmPitch")
-plt.grid(True)
-plt.legend()
-
-# Adjust layout and save/display plot
-plt.tight_layout()
-plt.savefig(os.path.join(base_dir, "coefficients_plot.png"))
-plt.show()
-
-# Create GIF from PNG files in ascending AoA order
-if png_files:
-    images = []
-    for file in png_files:
-        img = Image.open(file)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        images.append(img)
-    
-    # Save GIF
+    # Validate that the directory exists
+    if not os.path.exists(base_dir):
+        raise FileNotFoundError(f"The specified directory does not exist: {base_dir}")
+
+    if not os.path.isdir(base_dir):
+        raise NotADirectoryError(f"The specified path is not a directory: {base_dir}")
+
+    print(f"Processing data from: {base_dir}")
+
+    manifest = load_manifest(base_dir) if incremental else None
+    outputs = manifest['outputs'] if manifest else {}
+
+    # A full run rebuilds the coefficient store from the per-AoA results.json files
+    data_list, inputs, n_read = scan_results(base_dir, manifest, rebuild=not incremental)
+    print(f"Loaded {len(data_list)} AoA results ({n_read} file read(s)).")
+
+    # Extract sorted data
+    aoa_values = [d['aoa'] for d in data_list]
+    cl_values = [d['cl'] for d in data_list]
+    cd_values = [d['cd'] for d in data_list]
+    cmpitch_values = [d['cmpitch'] for d in data_list]
+    png_files = [d['png'] for d in data_list if d['png'] is not None]
+
+    # Need at least 2 points for interpolation
+    if len(aoa_values) <= 1:
+        raise ValueError("Not enough data points for interpolation.")
+
+    params_file = os.path.join(base_dir, "pchip_parameters.json")
+    model_file = model_path(base_dir)
+    plot_path = os.path.join(base_dir, "coefficients_plot.png")
     gif_path = os.path.join(base_dir, "output.gif")
-    images[0].save(
-        gif_path,
-        save_all=True,
-        append_images=images[1:],
-        duration=300,  # Duration in milliseconds per frame
-        loop=0  # Loop forever
-    )
-    print(f"GIF created successfully: {gif_path}")
-else:
-    print("No PNG files found for GIF creation.")
\ No newline at end of file
+    rebuilt = []
+
+    # Parameters and plot depend only on the coefficient values
+    data_key = _digest([aoa_values, cl_values, cd_values, cmpitch_values])
+    outputs_exist = all(os.path.exists(path) for path in (params_file, model_file, plot_path))
+    if outputs.get('data') != data_key or not outputs_exist:
+        # Perform PCHIP interpolation and save the evaluated piecewise cubics
+        values = {'Cl': cl_values, 'Cd': cd_values, 'CmPitch': cmpitch_values}
+        model = CoefficientModel.fit(aoa_values, values)
+        model.save(model_file)
+        print(f"Coefficient model saved to: {model_file}")
+
+        # Save PCHIP parameters (knots and y-values)
+        pchip_params = {
+            'Cl': {'knots': aoa_values, 'values': cl_values},
+            'Cd': {'knots': aoa_values, 'values': cd_values},
+            'CmPitch': {'knots': aoa_values, 'values': cmpitch_values}
+        }
+        with open(params_file, 'w') as f:
+            json.dump(pchip_params, f, indent=4)
+        print(f"PCHIP parameters saved to: {params_file}")
+
+        # Example prediction
+        example_aoa = np.linspace(min(aoa_values), max(aoa_values), 5)
+        predictions = predict_coefficients(example_aoa, model_file)
+        print("Example predictions for AoA:", predictions)
+
+        plot_coefficients(plot_path, aoa_values, values, model, show)
+        rebuilt += ['params', 'plot']
+    else:
+        print("Coefficients unchanged; keeping PCHIP parameters and plot.")
+
+    # The GIF depends only on the ordered render images
+    render_key = _digest([[d['aoa'], inputs['renders'][d['folder']]['hash']] for d in data_list if d['png']]
+                         + [gif_max_width])
+    video_path = None
+    if not png_files:
+        gif_path = None
+        print("No PNG files found for GIF creation.")
+    elif outputs.get('renders') != render_key or not os.path.exists(gif_path):
+        write_animation(png_files, gif_path, duration=300, max_width=gif_max_width)
+        rebuilt.append('gif')
+        print(f"GIF created successfully: {gif_path}")
+    else:
+        print("Renders unchanged; keeping GIF.")
+
+    if png_files and video:
+        video_path = os.path.join(base_dir, f"output.{video}")
+        if not ffmpeg_available():
+            video_path = None
+            print(f"ffmpeg not found; skipping {video.upper()} creation.")
+        elif outputs.get('video') != render_key or not os.path.exists(video_path):
+            write_animation(png_files, video_path, duration=300)
+            rebuilt.append('video')
+            print(f"Video created successfully: {video_path}")
+
+    save_manifest(base_dir, {
+        'version': MANIFEST_VERSION,
+        'inputs': inputs,
+        'outputs': {'data': data_key, 'renders': render_key, 'video': render_key if video_path else None},
+    })
+
+    return {'params_file': params_file, 'model_file': model_file, 'plot': plot_path, 'gif': gif_path,
+            'n_aoa': len(aoa_values), 'video': video_path, 'read': n_read, 'rebuilt': rebuilt}
+
+
+def main(argv=None):
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description='Postprocess simulation data from a directory containing angle of attack (AoA) folders')
+    parser.add_argument('folder_path', help='Path to the directory containing AoA folders with results.json files')
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help='Only re-read changed results and rebuild outputs whose inputs changed')
+    parser.add_argument('--gif-max-width', type=int, default=None,
+                        help='Downscale GIF frames to at most this width in pixels')
+    parser.add_argument('--video', choices=['mp4', 'webm'], default=None,
+                        help='Also write output.mp4/output.webm (requires ffmpeg)')
+    args = parser.parse_args(argv)
+
+    postprocess(args.folder_path, show=True, incremental=args.incremental,
+                gif_max_width=args.gif_max_width, video=args.video)
+
+
+if __name__ == '__main__':
+    main()
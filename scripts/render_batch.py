@@ -0,0 +1,364 @@
+"""Re-render a whole sweep in parallel.
+
+Every case directory (one containing `constant/polyMesh`) below the given
+roots is rendered for the requested time directories on a process pool sized
+to the available cores. A job's AoA folders (output/<job>/<aoa>/) hold no
+mesh; each has a case.json, written by the simulation, naming the run
+directory case and final time its results came from. Such a folder is
+rendered from that case, into the folder, labelled with its AoA. Cases whose polyMesh is byte-identical share one
+plane slice: the parent computes the cut cells and their centres once and
+hands them to the workers through `multiprocessing.shared_memory`, so no
+worker re-reads or re-slices that mesh.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from render_cache import RenderCache, MESH_FILES, HASH_BLOCK
+
+CASE_RECORD = "case.json"
+
+# Attached shared-memory blocks, kept alive for the lifetime of a worker
+_attached = []
+
+
+def read_case_record(folder):
+    """The case and time an AoA folder's results came from, as a source dict, or None."""
+    with open(os.path.join(folder, CASE_RECORD), 'r') as f:
+        record = json.load(f)
+    case = os.path.normpath(os.path.join(folder, record['case']))
+    if not os.path.isdir(os.path.join(case, 'constant', 'polyMesh')):
+        print(f"Warning: {folder} was solved in {case}, which no longer exists, skipping.")
+        return None
+    return {'folder': folder, 'case': case, 'time': str(record['time']),
+            'notes': f"AoA: {float(record['aoa']):g} degrees"}
+
+
+def find_cases(roots):
+    """Sources to render at or below each root, sorted by folder.
+
+    Each is {'folder', 'case', 'time', 'notes'}: renders go to `folder` and
+    read `case`. A case directory (containing constant/polyMesh) is both;
+    an AoA folder with a case.json reads the recorded case, and `time` is
+    the recorded final time (None for plain cases).
+    """
+    sources = {}
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            if CASE_RECORD in filenames:
+                source = read_case_record(dirpath)
+                if source:
+                    sources[dirpath] = source
+                dirnames[:] = []
+            elif os.path.isdir(os.path.join(dirpath, 'constant', 'polyMesh')):
+                sources[dirpath] = {'folder': dirpath, 'case': dirpath, 'time': None, 'notes': frame_notes(dirpath)}
+                dirnames[:] = []  # Do not descend into a case (processor*, time dirs, ...)
+            else:
+                dirnames.sort()
+    return [sources[folder] for folder in sorted(sources)]
+
+
+def time_dirs(case):
+    """Numeric time directory names of a case, in ascending time order."""
+    names = []
+    for name in os.listdir(case):
+        try:
+            value = float(name)
+        except ValueError:
+            continue
+        if value > 0 and os.path.isdir(os.path.join(case, name)):
+            names.append((value, name))
+    return [name for _, name in sorted(names)]
+
+
+def resolve_times(case, times, latest=None):
+    """Map requested times ('latest' or names) to the time directories present in a case.
+
+    `latest` overrides the case's last time directory, e.g. with the time
+    recorded for an AoA.
+    """
+    available = time_dirs(case)
+    resolved = []
+    for t in times:
+        if t == 'latest':
+            if latest is not None and latest in available:
+                resolved.append(latest)
+            elif latest is not None:
+                print(f"Warning: {case} has no time directory {latest}, skipping.")
+            elif available:
+                resolved.append(available[-1])
+        elif t in available:
+            resolved.append(t)
+        else:
+            print(f"Warning: {case} has no time directory {t}, skipping.")
+    return list(dict.fromkeys(resolved))
+
+
+def mesh_digest(case):
+    """Content digest of a case's polyMesh, used to find cases that share a mesh."""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in MESH_FILES:
+        path = os.path.join(case, 'constant', 'polyMesh', name)
+        if not os.path.exists(path) and os.path.exists(path + '.gz'):
+            path += '.gz'
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def share_arrays(arrays):
+    """Copy arrays into new shared-memory blocks; returns (blocks, descriptors)."""
+    blocks, descriptors = [], {}
+    for key, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        descriptors[key] = (block.name, array.shape, array.dtype.str)
+    return blocks, descriptors
+
+
+def attach_arrays(descriptors):
+    """Read-only array views onto shared-memory blocks created by share_arrays."""
+    arrays = {}
+    for key, (name, shape, dtype) in descriptors.items():
+        # Workers share the parent's resource tracker, and the parent unlinks the block
+        block = shared_memory.SharedMemory(name=name)
+        _attached.append(block)
+        array = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        arrays[key] = array
+    return arrays
+
+
+def _init_worker(shared_slices):
+    from plane_slice import PlaneSlice, register_plane_slice
+
+    for cases, z, descriptors in shared_slices:
+        arrays = attach_arrays(descriptors)
+        plane = PlaneSlice(arrays['cells'], arrays['centres_xy'], z)
+        for case in cases:
+            register_plane_slice(case, plane)
+
+
+def _render_frame(task):
+    from render_slice import render_slice
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    error = None
+    try:
+        with contextlib.redirect_stdout(output):
+            render_slice(**task['render'])
+    except Exception as e:
+        error = str(e)
+    return {
+        'folder': task['folder'],
+        'case': task['case'],
+        'time': task['time'],
+        'output_file': task['render']['output_file'],
+        'elapsed': time.perf_counter() - start,
+        'pid': os.getpid(),
+        'error': error,
+        'log': output.getvalue(),
+    }
+
+
+def frame_notes(case):
+    name = os.path.basename(os.path.normpath(case))
+    try:
+        return f"AoA: {float(name):g} degrees"
+    except ValueError:
+        return name
+
+
+def plan_frames(sources, times, output_dir, output_name, render_args):
+    """One render task per (source, time)."""
+    stem, ext = os.path.splitext(output_name)
+    # Mirror folder paths relative to their common parent when writing elsewhere
+    folders = [source['folder'] for source in sources]
+    base = os.path.commonpath(folders) if len(folders) > 1 else os.path.dirname(os.path.normpath(folders[0]))
+    tasks = []
+    for source in sources:
+        case, folder = source['case'], source['folder']
+        case_times = resolve_times(case, times, source['time'])
+        for t in case_times:
+            name = output_name if len(case_times) == 1 else f"{stem}_{t}{ext}"
+            target_dir = folder
+            if output_dir:
+                target_dir = os.path.join(output_dir, os.path.relpath(folder, base))
+                os.makedirs(target_dir, exist_ok=True)
+            render = dict(render_args, sol_dir=case, output_file=os.path.join(target_dir, name),
+                          time=t, notes=render_args.get('notes') or source['notes'])
+            tasks.append({'folder': folder, 'case': case, 'time': t, 'render': render})
+    return tasks
+
+
+def _needs_slice(case, render_args):
+    """Whether rendering a case will need its plane slice (no cached geometry)."""
+    from render_slice import GRID_SIZE
+
+    if render_args.get('no_cache'):
+        return True
+    cache = RenderCache(render_args.get('cache_dir') or os.path.join(case, 'renderCache'))
+    key = cache.case_key(case, render_args['width'], render_args['height'], render_args['padding'], GRID_SIZE)
+    return not cache.has(key, 'geometry')
+
+
+def prepare_shared_slices(tasks, render_args):
+    """Compute each multiply-used mesh's plane slice once and place it in shared memory."""
+    from plane_slice import PlaneSlice
+    from polymesh import read_polymesh
+
+    cases = [case for case in dict.fromkeys(task['case'] for task in tasks) if _needs_slice(case, render_args)]
+    groups = {}
+    for case in cases:
+        groups.setdefault(mesh_digest(case), []).append(case)
+
+    blocks, shared_slices = [], []
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        start = time.perf_counter()
+        plane = PlaneSlice.from_mesh(read_polymesh(os.path.join(group[0], 'constant', 'polyMesh')), 0.0)
+        group_blocks, descriptors = share_arrays({'cells': plane.cells, 'centres_xy': plane.centres_xy})
+        blocks.extend(group_blocks)
+        shared_slices.append((group, 0.0, descriptors))
+        print(f"Sharing plane slice of {group[0]} ({len(plane.cells)} cells) with {len(group)} cases "
+              f"({time.perf_counter() - start:.2f}s)")
+    return blocks, shared_slices
+
+
+def render_batch(roots, times=('latest',), jobs=None, output_dir=None, output_name='render.png',
+                 share_mesh=True, **render_args):
+    """Render every (case, time) frame below roots on a process pool; returns per-frame results."""
+    from render_slice import render_slice
+
+    defaults = {k: v.default for k, v in inspect.signature(render_slice).parameters.items()
+                if v.default is not inspect.Parameter.empty}
+    render_args = dict(defaults, **render_args)
+
+    sources = find_cases(roots)
+    if not sources:
+        raise FileNotFoundError(f"No OpenFOAM cases or AoA folders with {CASE_RECORD} found under: {', '.join(roots)}")
+
+    tasks = plan_frames(sources, times, output_dir, output_name, render_args)
+    if not tasks:
+        raise ValueError("None of the requested time directories exist.")
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+    n_cases = len({task['case'] for task in tasks})
+    print(f"Rendering {len(tasks)} frames from {n_cases} cases with {jobs} processes")
+
+    wall_start = time.perf_counter()
+    blocks, shared_slices = prepare_shared_slices(tasks, render_args) if share_mesh else ([], [])
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(shared_slices,)) as pool:
+            futures = [pool.submit(_render_frame, task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                status = f"FAILED: {result['error']}" if result['error'] else result['output_file']
+                print(f"[{done}/{len(tasks)}] {result['folder']} @ {result['time']}: "
+                      f"{result['elapsed']:.2f}s (pid {result['pid']}) -> {status}")
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    wall = time.perf_counter() - wall_start
+
+    frame_total = sum(result['elapsed'] for result in results)
+    n_failed = sum(1 for result in results if result['error'])
+    print(f"Rendered {len(results) - n_failed}/{len(results)} frames in {wall:.2f}s wall, "
+          f"{frame_total:.2f}s of frame time ({len(results) / wall:.2f} frames/s)")
+    if results:
+        slowest = max(results, key=lambda result: result['elapsed'])
+        print(f"Slowest frame: {slowest['folder']} @ {slowest['time']} ({slowest['elapsed']:.2f}s)")
+    return {'frames': results, 'wall_time': wall, 'jobs': jobs, 'failed': n_failed}
+
+
+def main(argv=None):
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(
+        description='Re-render the z=0 slices of many OpenFOAM cases in parallel',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python render_batch.py output/my_job/
+  python render_batch.py run/ --time 400 800 --jobs 8
+  python render_batch.py output/my_job/ --max-speed 40 --width 3840 --height 2160
+  python render_batch.py run/ --output-dir renders/ --fields speed p --report timings.json
+        """
+    )
+
+    parser.add_argument('roots', nargs='+',
+                        help='Directories to search for AoA folders and cases (e.g. output/<job>/ or run/)')
+    parser.add_argument('--time', '-t', dest='times', nargs='+', default=['latest'],
+                        help="Time directories to render; 'latest' picks an AoA's final time, "
+                             "or a case's last (default: latest)")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Number of worker processes (default: number of cores)')
+    parser.add_argument('--output-dir', default=None,
+                        help='Write renders here, mirroring the folder layout (default: into each AoA folder or case)')
+    parser.add_argument('--output-name', default='render.png',
+                        help='Image name; _<time> is appended when rendering several times (default: render.png)')
+    parser.add_argument('--no-share', dest='share_mesh', action='store_false',
+                        help='Do not share plane slices of identical meshes between workers')
+    parser.add_argument('--report', default=None,
+                        help='Save per-frame timings to this JSON file')
+    parser.add_argument('--notes', '-n', default='',
+                        help='Text for every frame (default: AoA from the case directory name)')
+    parser.add_argument('--min-speed', type=float, default=0.0,
+                        help='Minimum speed for colormap normalization (default: 0.0)')
+    parser.add_argument('--max-speed', type=float, default=35.0,
+                        help='Maximum speed for colormap normalization (default: 35.0)')
+    parser.add_argument('--width', '-w', type=int, default=1920,
+                        help='Image width in pixels (default: 1920)')
+    parser.add_argument('--height', type=int, default=1080,
+                        help='Image height in pixels (default: 1080)')
+    parser.add_argument('--padding', type=float, default=0.05,
+                        help='Padding around viewing area as fraction (default: 0.05)')
+    parser.add_argument('--colormap', default='jet',
+                        help='OpenCV colormap name (default: jet)')
+    parser.add_argument('--fields', nargs='+', default=None,
+                        help='Render several fields per frame (see render_slice.py --fields)')
+    parser.add_argument('--streamlines', action='store_true',
+                        help='Overlay streamlines')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Render cache directory (default: <case>/renderCache)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Do not read or write the render cache')
+
+    args = vars(parser.parse_args(argv))
+    report = args.pop('report')
+
+    try:
+        result = render_batch(**args)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if report:
+        with open(report, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved timings to {report}")
+
+    if result['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Persistent on-disk cache for slice render inputs.
+
+Entries live under `<cache_dir>/<case key>/` as uncompressed `.npz` files.
+The case key is a content hash of the polyMesh, the STL and the render
+parameters, so a changed mesh never reuses stale weights. Hashing a large
+mesh is itself costly, so digests are remembered in `<cache_dir>/index.json`
+against each file's path, mtime and size and only recomputed when those change.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+HASH_BLOCK = 8 * 1024 * 1024
+MESH_FILES = ('points', 'faces', 'owner', 'neighbour', 'boundary')
+
+
+def _resolve(path):
+    """Path of an OpenFOAM file, accepting its gzip-compressed variant."""
+    if not os.path.exists(path) and os.path.exists(path + '.gz'):
+        return path + '.gz'
+    return path
+
+
+class RenderCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self._index_path = os.path.join(cache_dir, 'index.json')
+        self._index = None
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self._index_path, 'r') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Concurrent renders of one case share the index: each writes its own temp file
+        with tempfile.NamedTemporaryFile('w', dir=self.cache_dir, prefix='index.', suffix='.tmp', delete=False) as f:
+            json.dump(self._index, f)
+        os.replace(f.name, self._index_path)
+
+    def file_digest(self, path):
+        """Content digest of a file, reusing the indexed value while its stat is unchanged."""
+        path = os.path.realpath(_resolve(path))
+        st = os.stat(path)
+        stamp = f"{st.st_mtime_ns}:{st.st_size}"
+        index = self._load_index()
+        entry = index.get(path)
+        if entry and entry[0] == stamp:
+            return entry[1]
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b''):
+                digest.update(block)
+        index[path] = [stamp, digest.hexdigest()]
+        self._save_index()
+        return digest.hexdigest()
+
+    def case_key(self, sol_dir, *params, polymesh_dirs=None):
+        """Key for everything derived from a case's mesh and STL plus the given render parameters.
+
+        `polymesh_dirs` replaces the case's constant/polyMesh, e.g. by the
+        subdomain meshes of a decomposed case.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for polymesh_dir in polymesh_dirs or [os.path.join(sol_dir, 'constant', 'polyMesh')]:
+            for name in MESH_FILES:
+                digest.update(self.file_digest(os.path.join(polymesh_dir, name)).encode())
+        digest.update(self.file_digest(os.path.join(sol_dir, 'constant', 'triSurface', 'model.stl')).encode())
+        digest.update(repr(params).encode())
+        return digest.hexdigest()
+
+    def field_key(self, sol_dir, time_name, *field_names):
+        """Key for data read from fields of one time directory."""
+        stamps = []
+        for name in field_names:
+            st = os.stat(_resolve(os.path.join(sol_dir, str(time_name), name)))
+            stamps.append((name, st.st_mtime_ns, st.st_size))
+        digest = hashlib.blake2b(repr((str(time_name), stamps)).encode(), digest_size=8)
+        return f"{time_name}_{digest.hexdigest()}"
+
+    def _path(self, key, name):
+        return os.path.join(self.cache_dir, key, name + '.npz')
+
+    def has(self, key, name):
+        return os.path.exists(self._path(key, name))
+
+    def load(self, key, name):
+        """Return the cached arrays as a dict, or None on a miss."""
+        path = self._path(key, name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return {k: data[k] for k in data.files}
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key, name, **arrays):
+        path = self._path(key, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=name + '.', suffix='.tmp.npz',
+                                         delete=False) as f:
+            np.savez(f, **arrays)
+        os.replace(f.name, path)
@@ -1,309 +1,405 @@
-from fluidfoam import readmesh
-from fluidfoam import readvector
-
 import cv2
 import numpy as np
-from scipy.interpolate import griddata, RegularGridInterpolator
-from stl import mesh  # Requires: pip install numpy-stl
+import decomposed
+from geometry import load_and_project_stl, profile_mask, view_bounds
+from plane_slice import GridWeights, BilinearWeights
+from render_cache import RenderCache
+from streamlines import draw_streamlines, mask_stop, seed_grid, streamlines as trace_streamlines
 import argparse
 import os
 import sys
 
-# Parse command line arguments
-parser = argparse.ArgumentParser(
-    description='Render flow visualization slice from OpenFOAM simulation data',
-    formatter_class=argparse.RawDescriptionHelpFormatter,
-    epilog="""
-Examples:
-  python render_slice.py ./run/ output.png
-  python render_slice.py ./run/ output.png --notes "High Reynolds simulation"
-  python render_slice.py ./run/ output.png --time 600 --min-speed 0 --max-speed 40
-  python render_slice.py ./run/ output.png --width 1920 --height 1080 --tolerance 0.05
-    """
-)
-
-parser.add_argument('sol_dir', 
-                    help='Path to OpenFOAM solution directory (e.g., ./run/)')
-parser.add_argument('output_file', 
-                    help='Output PNG file name (e.g., flow_slice.png)')
-parser.add_argument('--notes', '-n', 
-                    default='', 
-                    help='Text to render in top left corner of image')
-parser.add_argument('--time', '-t', 
-                    default='800', 
-                    help='Time directory to read from (default: 800)')
-parser.add_argument('--min-speed', 
-                    type=float, 
-                    default=0.0, 
-                    help='Minimum speed for colormap normalization (default: 0.0)')
-parser.add_argument('--max-speed', 
-                    type=float, 
-                    default=35.0, 
-                    help='Maximum speed for colormap normalization (default: 35.0)')
-parser.add_argument('--width', '-w', 
-                    type=int, 
-                    default=1920, 
-                    help='Image width in pixels (default: 1920)')
-parser.add_argument('--height', 
-                    type=int, 
-                    default=1080, 
-                    help='Image height in pixels (default: 1080)')
-parser.add_argument('--tolerance', 
-                    type=float, 
-                    default=0.02, 
-                    help='Z-tolerance for selecting xy-plane cells (default: 0.02)')
-parser.add_argument('--padding', 
-                    type=float, 
-                    default=0.05, 
-                    help='Padding around viewing area as fraction (default: 0.05)')
-
-args = parser.parse_args()
-
-# Validate inputs
-if not os.path.exists(args.sol_dir):
-    print(f"Error: Solution directory '{args.sol_dir}' does not exist.")
-    sys.exit(1)
-
-if not args.sol_dir.endswith('/'):
-    args.sol_dir += '/'
-
-sol = args.sol_dir
-timename = args.time
-min_speed = args.min_speed
-max_speed = args.max_speed
-# Image dimensions (approximating figsize=(12,9) at ~100 dpi)
-h = args.height
-w = args.width
-notes = args.notes
-
-aspect = w / h
-
-
-# Helper function to project STL triangles to XY plane and filter near z=0
-def load_and_project_stl(stl_path, tol=0.001):
-    your_mesh = mesh.Mesh.from_file(stl_path)
-    triangles = []
-    for i in range(your_mesh.data.shape[0]):
-        triangle = your_mesh.vectors[i]  # Shape: (3, 3) for vertices
-        z_coords = triangle[:, 2]
-        if np.abs(np.mean(z_coords)) < tol * 10:  # Filter triangles near z=0
-            # Project to XY: ignore z
-            xy_triangle = triangle[:, :2]
-            triangles.append(xy_triangle)
-    return np.array(triangles) if triangles else np.empty((0, 3, 2))
-
-
-
-
-# # Read unstructured mesh points
-points = readmesh(sol, structured=False)  # Shape: (n_points, 3)
-
-# Unpack and stack into cell centers (n_cells, 3)
-X, Y, Z = points
-cell_centers = np.column_stack((X, Y, Z))
-n_cells = len(X)
-
-print(f"Loaded {n_cells} cell centers.")
-
-
-vel = readvector(sol, timename, 'U', structured=False)  # Shape: (3, n_vel) apparently
-print("Velocity shape:", vel.shape)
-
-n_vel = vel.shape[1]
-
-if n_vel != n_cells:
-    print(f"Warning: n_cells={n_cells}, n_vel={n_vel}. Using min({n_cells}, {n_vel}).")
-    n = min(n_cells, n_vel)
-    cell_centers = cell_centers[:n]
-    # Trim vel if needed, but since n_vel > n_cells, we can just use up to n_cells
-    vel = vel[:, :n]  # Trim extra if present
-else:
-    n = n_cells
-
-print(f"Using {n} cells for analysis.")
-
-
-tol = args.tolerance  # Adjust if too few/many points on plane
-plane_mask = np.abs(cell_centers[:, 2]) < tol  # z = 0
-
-# Extract plane data
-plane_centers_xy = cell_centers[plane_mask, :2]  # (x, y)
-plane_vel_x = vel[0, plane_mask]  # Ux
-plane_vel_y = vel[1, plane_mask]  # Uy
-
-num_plane_cells = len(plane_centers_xy)
-print(f"Cells on xy-plane (z≈0): {num_plane_cells}")
-
-# Load and overlay the model wall geometry from STL
-stl_path = sol + 'constant/triSurface/model.stl'
-
-triangles_xy = load_and_project_stl(stl_path, 0.001)
-
-# Calculate xmin, xmax, ymin, ymax from the triangle_xy vertices
-x_min = np.inf
-x_max = -np.inf
-y_min = np.inf
-y_max = -np.inf
-
-tri_mean = np.mean(triangles_xy, axis=(0,1)) if len(triangles_xy) > 0 else (0,0)
-print(f"STL projected mean position: x={tri_mean[0]:.3f}, y={tri_mean[1]:.3f}")
-
-vertices = triangles_xy.reshape(-1, 2)
-dists = np.linalg.norm(vertices - tri_mean, axis=1)
-tri_max_dist = np.max(dists)
-print(f"STL projected max distance from mean: {tri_max_dist:.3f}")
-
-x_center = tri_mean[0]
-y_center = tri_mean[1]
-
-# Fix aspect ratio to image
-x_half_range = tri_max_dist
-y_half_range = tri_max_dist
-
-if (x_half_range / y_half_range) > aspect:
-    # Width is limiting factor
-    y_half_range = x_half_range / aspect
-else:
-    # Height is limiting factor
-    x_half_range = y_half_range * aspect
-
-x_min = x_center - x_half_range
-x_max = x_center + x_half_range
-y_min = y_center - y_half_range
-y_max = y_center + y_half_range
-
-# Expand viewing area slightly (padding on each side)
-pad_x = args.padding * (x_max - x_min)
-pad_y = args.padding * (y_max - y_min)
-x_min -= pad_x
-x_max += pad_x
-y_min -= pad_y
-y_max += pad_y
-
-print(f"Viewing bounds (with padding): x[{x_min:.3f}, {x_max:.3f}], y[{y_min:.3f}, {y_max:.3f}]")
-
-# Create grid for interpolation
-xi = np.linspace(x_min, x_max, 200)
-yi = np.linspace(y_min, y_max, 200)
-XI, YI = np.meshgrid(xi, yi)
-
-# Interpolate velocity components and magnitude to grid
-vel_x_grid = griddata((plane_centers_xy[:, 0], plane_centers_xy[:, 1]), plane_vel_x, (XI, YI), method='linear')
-vel_y_grid = griddata((plane_centers_xy[:, 0], plane_centers_xy[:, 1]), plane_vel_y, (XI, YI), method='linear')
-speed = np.sqrt(plane_vel_x**2 + plane_vel_y**2)
-speed_grid = griddata((plane_centers_xy[:, 0], plane_centers_xy[:, 1]), speed, (XI, YI), method='linear')
-
-# Create interpolation functions for velocity (for streamlines)
-vel_x_interp = RegularGridInterpolator((yi, xi), vel_x_grid, method='linear', bounds_error=False, fill_value=np.nan)
-vel_y_interp = RegularGridInterpolator((yi, xi), vel_y_grid, method='linear', bounds_error=False, fill_value=np.nan)
-speed_interp = RegularGridInterpolator((yi, xi), speed_grid, method='linear', bounds_error=False, fill_value=np.nan)
-
-
-# Create high-res coordinate grids for image (y decreasing for cv2 top-to-bottom = high y to low y)
-xi_h = np.linspace(x_min, x_max, w)
-yi_h = np.linspace(y_max, y_min, h)  # decreasing
-XI_h, YI_h = np.meshgrid(xi_h, yi_h)
-
-# Interpolate speed to high-res grid
-points_h = np.stack([YI_h.ravel(), XI_h.ravel()], axis=-1)
-speed_h_flat = speed_interp(points_h)
-speed_h = speed_h_flat.reshape(YI_h.shape)
-
-# Normalize and create grayscale
-speed_h_norm = np.nan_to_num((speed_h - min_speed) / (max_speed - min_speed), nan=0.0)
-gray_h = (speed_h_norm * 255).clip(0, 255).astype(np.uint8)
-
-# Apply viridis colormap
-colored = cv2.applyColorMap(gray_h, cv2.COLORMAP_JET )
-
-# Function to map world to pixel
-def world_to_pixel(x, y, x_min, x_max, y_min, y_max, width, height):
-    px = int((x - x_min) / (x_max - x_min) * (width - 1))
-    py = int((y_max - y) / (y_max - y_min) * (height - 1))
-    return px, py
-
-
-if len(triangles_xy) > 0:
-    # Create a binary mask for the shape (same size as the image)
-    mask = np.zeros((h, w), dtype=np.uint8)
-    
-    # Fill all projected triangles on the mask
-    for tri in triangles_xy:
-        verts = tri.reshape(3, 2)
-        pts_list = [world_to_pixel(verts[k, 0], verts[k, 1], x_min, x_max, y_min, y_max, w, h) for k in range(3)]
-        pts = np.array(pts_list, np.int32)
-        cv2.fillPoly(mask, [pts], 255)  # White fill on mask
-    
-    # Find external contours (boundaries) of the filled mask
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    
-    if len(contours) > 0:
-        # Select the largest contour by area (the main profile boundary)
-        largest_contour = max(contours, key=cv2.contourArea)
-
-        # Fill the single connected polygon on the colored image
-        cv2.fillPoly(colored, [largest_contour], (128, 128, 128))
-
-img = colored
-
-# Add notes text to top left corner if provided
-if notes:
+# Resolution of the intermediate interpolation grid
+GRID_SIZE = 200
+
+
+# Everything that depends only on the mesh, the STL and the image size
+def compute_geometry(sol, w, h, padding, is_decomposed=False):
+    from plane_slice import load_plane_slice
+
+    # Find the cells cut by the z=0 plane, per subdomain when the case is not reconstructed
+    plane = decomposed.plane_slice(sol, z=0.0) if is_decomposed else load_plane_slice(sol, z=0.0)
+    print(f"Cells cut by xy-plane (z=0): {len(plane.cells)}")
+
+    # Load the model wall geometry from STL
+    stl_path = sol + 'constant/triSurface/model.stl'
+    triangles_xy = load_and_project_stl(stl_path, 0.001)
+    x_min, x_max, y_min, y_max = view_bounds(triangles_xy, w, h, padding)
+
+    # Intermediate interpolation grid and high-res image grid (y decreasing for cv2 top-to-bottom)
+    xi = np.linspace(x_min, x_max, GRID_SIZE)
+    yi = np.linspace(y_min, y_max, GRID_SIZE)
+    xi_h = np.linspace(x_min, x_max, w)
+    yi_h = np.linspace(y_max, y_min, h)  # decreasing
+
+    grid_weights = plane.grid_weights(xi, yi)
+    pixel_weights = BilinearWeights.from_axes(xi, yi, xi_h, yi_h)
+
+    # Filled outline of the model profile
+    mask = profile_mask(triangles_xy, (x_min, x_max, y_min, y_max), w, h)
+
+    geometry = {
+        'bounds': np.array([x_min, x_max, y_min, y_max]),
+        'cells': plane.cells,
+        'mask': np.packbits(mask > 0),
+    }
+    if is_decomposed:
+        geometry['offsets'] = plane.offsets
+        geometry['order'] = plane.order
+    geometry.update({'grid_' + k: v for k, v in grid_weights.arrays().items()})
+    geometry.update({'pixel_' + k: v for k, v in pixel_weights.arrays().items()})
+    return geometry
+
+
+# Fields that can be rendered and the file each one is read from
+FIELD_SOURCES = {
+    'speed': 'U',
+    'vorticity': 'U',
+    'p': 'p',
+    'k': 'k',
+    'omega': 'omega',
+    'nut': 'nut',
+}
+FIELDS = tuple(FIELD_SOURCES)
+
+# Image label per field
+FIELD_LABELS = {
+    'speed': 'Speed [m/s]',
+    'vorticity': 'Vorticity z [1/s]',
+    'p': 'Kinematic pressure [m2/s2]',
+    'k': 'Turbulent kinetic energy [m2/s2]',
+    'omega': 'Specific dissipation rate [1/s]',
+    'nut': 'Turbulent viscosity [m2/s]',
+}
+
+
+# Plane values of one field file on the intermediate grid, all with the same triangulation weights
+def compute_field_grids(sol, timename, geometry, source='U'):
+    from fluidfoam import readscalar, readvector
+
+    cells = geometry['cells']
+    grid_weights = GridWeights.from_arrays(**{k[5:]: v for k, v in geometry.items() if k.startswith('grid_')})
+
+    read = {'U': readvector}.get(source, readscalar)
+    if 'offsets' in geometry:
+        # Decomposed case: every subdomain returns only its plane cells, already in slice order
+        slice_cells, offsets, order = cells, geometry['offsets'], geometry['order']
+        read = lambda sol, timename, name, structured: decomposed.read_field(
+            sol, timename, name, slice_cells, offsets, order)
+        cells = np.arange(len(slice_cells))
+
+    if source == 'U':
+        vel = read(sol, timename, 'U', structured=False)  # Shape: (3, n_cells)
+        print("Velocity shape:", vel.shape)
+
+        plane_cells = cells if vel.shape[1] > 1 else np.zeros(len(cells), dtype=int)
+        plane_vel_x = vel[0, plane_cells]  # Ux
+        plane_vel_y = vel[1, plane_cells]  # Uy
+        speed = np.sqrt(plane_vel_x**2 + plane_vel_y**2)
+
+        vel_x_grid, vel_y_grid, speed_grid = np.moveaxis(grid_weights(np.column_stack((plane_vel_x, plane_vel_y, speed))), -1, 0)
+        return {'vel_x': vel_x_grid, 'vel_y': vel_y_grid, 'speed': speed_grid}
+
+    values = read(sol, timename, source, structured=False)
+    print(f"{source} shape:", values.shape)
+
+    plane_cells = cells if values.shape[0] > 1 else np.zeros(len(cells), dtype=int)
+    return {source: grid_weights(values[plane_cells])}
+
+
+# Out-of-plane vorticity dUy/dx - dUx/dy from the intermediate velocity grids
+def vorticity_grid(vel_x, vel_y, bounds):
+    x_min, x_max, y_min, y_max = bounds
+    dx = (x_max - x_min) / (vel_x.shape[1] - 1)
+    dy = (y_max - y_min) / (vel_x.shape[0] - 1)
+    return np.gradient(vel_y, dx, axis=1) - np.gradient(vel_x, dy, axis=0)
+
+
+# Colour range of a field: fixed for speed, symmetric for vorticity, robust percentiles otherwise
+def field_range(field, grid, min_speed, max_speed):
+    if field == 'speed':
+        return min_speed, max_speed
+    finite = grid[np.isfinite(grid)]
+    if finite.size == 0:
+        return 0.0, 1.0
+    if field == 'vorticity':
+        limit = np.percentile(np.abs(finite), 99)
+        return -limit, limit
+    low, high = np.percentile(finite, [1, 99])
+    if high <= low:
+        # Uniform field: centre it in the colormap instead of dividing by zero
+        return low - 0.5, high + 0.5
+    return low, high
+
+
+def parse_range(text):
+    """Parse a FIELD=MIN:MAX colour range."""
+    try:
+        field, limits = text.split('=', 1)
+        low, high = limits.split(':', 1)
+        return field, (float(low), float(high))
+    except ValueError:
+        raise ValueError(f"Invalid range '{text}', expected FIELD=MIN:MAX.")
+
+
+def draw_notes(img, notes):
     # Set up text properties
     font = cv2.FONT_HERSHEY_SIMPLEX
     font_scale = 1.0
     text_color = (255, 255, 255)  # White text
     text_thickness = 2
-    
+
     # Get text size for background rectangle
     (text_width, text_height), baseline = cv2.getTextSize(notes, font, font_scale, text_thickness)
-    
+
     # Draw background rectangle (semi-transparent black)
     overlay = img.copy()
     cv2.rectangle(overlay, (10, 10), (text_width + 30, text_height + 30), (0, 0, 0), -1)
     alpha = 0.7  # Transparency factor
     img = cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0)
-    
+
     # Draw text
     cv2.putText(img, notes, (20, text_height + 20), font, font_scale, text_color, text_thickness)
+    return img
+
 
-# Optional: Streamlines (commented out)
-# step_size = 0.02  # Adjust based on domain size
-# max_len = 200
-# seed_step = 15  # Adjust for density
-#
-# def trace_streamline(x0, y0, direction=1):
-#     path = []
-#     x, y = x0, y0
-#     for _ in range(max_len):
-#         path.append((x, y))
-#         ux = vel_x_interp([y, x])
-#         uy = vel_y_interp([y, x])
-#         if np.isnan(ux) or np.isnan(uy):
-#             break
-#         mag = np.sqrt(ux**2 + uy**2)
-#         if mag < 1e-6:
-#             break
-#         dx = (ux / mag) * step_size * direction
-#         dy = (uy / mag) * step_size * direction
-#         x += dx
-#         y += dy
-#         if x < x_min or x > x_max or y < y_min or y > y_max:
-#             break
-#     return path
-#
-# for i in range(0, len(xi), seed_step):
-#     for j in range(0, len(yi), seed_step):
-#         x0 = xi[i]
-#         y0 = yi[j]
-#         path_fwd = trace_streamline(x0, y0, 1)
-#         path_bwd = trace_streamline(x0, y0, -1)
-#         full_path = path_bwd[::-1] + path_fwd[1:]
-#         if len(full_path) > 5:
-#             pts_list = [world_to_pixel(p[0], p[1], x_min, x_max, y_min, y_max, w, h) for p in full_path]
-#             pts = np.array(pts_list, np.int32)
-#             cv2.polylines(img, [pts], isClosed=False, color=(0, 0, 0), thickness=1)
-
-
-# Save the image
-cv2.imwrite(args.output_file, img)
-print(f"Saved {args.output_file}")
\ No newline at end of file
+def render_slice(sol_dir, output_file, notes='', time='800', min_speed=0.0, max_speed=35.0,
+                 width=1920, height=1080, padding=0.05, colormap='jet', cache_dir=None, no_cache=False,
+                 fields=None, ranges=None, dump=None, streamlines=False, seed_spacing=15,
+                 streamline_steps=400, streamline_method='rk4'):
+    """Render z=0 slices of a case.
+
+    Without `fields` the velocity magnitude is written to output_file. With a
+    list of fields, one image per field is written as `<stem>_<field><ext>`,
+    all from a single mesh load and the same interpolation weights. A time
+    that only exists in processor*/ is read from the subdomains directly.
+    """
+    # Validate inputs
+    if not os.path.exists(sol_dir):
+        raise FileNotFoundError(f"Solution directory '{sol_dir}' does not exist.")
+
+    if not sol_dir.endswith('/'):
+        sol_dir += '/'
+
+    sol = sol_dir
+    timename = str(time)
+    # Image dimensions (approximating figsize=(12,9) at ~100 dpi)
+    h = height
+    w = width
+
+    colormap_id = getattr(cv2, f'COLORMAP_{colormap.upper()}', None)
+    if colormap_id is None:
+        raise ValueError(f"Unknown colormap '{colormap}'.")
+
+    multi_field = fields is not None
+    fields = list(fields) if multi_field else ['speed']
+    unknown = [field for field in fields if field not in FIELD_SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown field(s) {', '.join(unknown)}; choose from {', '.join(FIELDS)}.")
+    ranges = dict(ranges or {})
+
+    # Reuse cached geometry and field grids where the mesh, STL and fields are unchanged
+    cache = None if no_cache else RenderCache(cache_dir or os.path.join(sol, 'renderCache'))
+
+    # Read the subdomains when reconstructPar was skipped
+    is_decomposed = decomposed.is_decomposed(sol, timename)
+    if is_decomposed:
+        print(f"Time {timename} is decomposed; reading {len(decomposed.processor_dirs(sol))} processor directories.")
+    field_dir = os.path.join(sol, 'processor0') if is_decomposed else sol
+
+    geometry = None
+    if cache:
+        polymesh_dirs = [os.path.join(proc, 'constant', 'polyMesh') for proc in decomposed.processor_dirs(sol)] \
+            if is_decomposed else None
+        case_key = cache.case_key(sol, w, h, padding, GRID_SIZE, polymesh_dirs=polymesh_dirs)
+        geometry = cache.load(case_key, 'geometry')
+    if geometry is None:
+        geometry = compute_geometry(sol, w, h, padding, is_decomposed)
+        if cache:
+            cache.save(case_key, 'geometry', **geometry)
+    else:
+        print("Loaded slice geometry from render cache.")
+
+    # Read each field file once, however many rendered fields derive from it
+    sources = [FIELD_SOURCES[field] for field in fields] + (['U'] if streamlines else [])
+    grids = {}
+    for source in dict.fromkeys(sources):
+        source_grids = None
+        if cache:
+            field_key = cache.field_key(field_dir, timename, source)
+            source_grids = cache.load(case_key, field_key)
+        if source_grids is None:
+            source_grids = compute_field_grids(sol, timename, geometry, source)
+            if cache:
+                cache.save(case_key, field_key, **source_grids)
+        else:
+            print(f"Loaded time {timename} {source} grids from render cache.")
+        grids.update(source_grids)
+
+    if 'vorticity' in fields:
+        grids['vorticity'] = vorticity_grid(grids['vel_x'], grids['vel_y'], geometry['bounds'])
+
+    x_min, x_max, y_min, y_max = geometry['bounds']
+    print(f"Viewing bounds (with padding): x[{x_min:.3f}, {x_max:.3f}], y[{y_min:.3f}, {y_max:.3f}]")
+
+    pixel_weights = BilinearWeights.from_arrays(**{k[6:]: v for k, v in geometry.items() if k.startswith('pixel_')})
+    mask = np.unpackbits(geometry['mask'], count=h * w).reshape(h, w).astype(bool)
+
+    paths = []
+    if streamlines:
+        # Trace every seed at once, half an interpolation cell per step, stopping at the model
+        bounds = tuple(geometry['bounds'])
+        seeds = seed_grid(bounds, grids['vel_x'].shape, seed_spacing)
+        step = 0.5 * (x_max - x_min) / (GRID_SIZE - 1)
+        paths = trace_streamlines(grids['vel_x'], grids['vel_y'], bounds, seeds, step,
+                                  streamline_steps, streamline_method, mask_stop(mask, bounds))
+        print(f"Traced {len(paths)} streamlines from {len(seeds)} seeds.")
+
+    stem, ext = os.path.splitext(output_file)
+    outputs = {}
+    for field in fields:
+        low, high = ranges.get(field) or field_range(field, grids[field], min_speed, max_speed)
+
+        # Interpolate to high-res grid
+        field_h = pixel_weights(grids[field])
+
+        # Normalize and create grayscale
+        field_h_norm = np.nan_to_num((field_h - low) / (high - low), nan=0.0)
+        gray_h = (field_h_norm * 255).clip(0, 255).astype(np.uint8)
+
+        # Apply colormap
+        colored = cv2.applyColorMap(gray_h, colormap_id)
+
+        # Fill the model profile in grey
+        colored[mask] = (128, 128, 128)
+
+        img = colored
+
+        # Overlay streamlines
+        if paths:
+            draw_streamlines(img, paths, tuple(geometry['bounds']))
+
+        # Add notes text to top left corner if provided
+        label = notes
+        if multi_field:
+            label = f"{notes} - {FIELD_LABELS[field]}" if notes else FIELD_LABELS[field]
+        if label:
+            img = draw_notes(img, label)
+
+        # Save the image
+        path = f"{stem}_{field}{ext}" if multi_field else output_file
+        cv2.imwrite(path, img)
+        print(f"Saved {path} (range {low:.4g} to {high:.4g})")
+        outputs[field] = path
+
+    # Optionally keep the interpolated grids for further analysis
+    if dump:
+        xi = np.linspace(x_min, x_max, GRID_SIZE)
+        yi = np.linspace(y_min, y_max, GRID_SIZE)
+        np.savez_compressed(dump, x=xi, y=yi, time=timename, **{field: grids[field] for field in fields})
+        print(f"Saved field grids to {dump}")
+
+    if multi_field:
+        return {'outputs': outputs, 'dump': dump}
+    return {'output_file': output_file}
+
+
+def main(argv=None):
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(
+        description='Render flow visualization slice from OpenFOAM simulation data',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python render_slice.py ./run/ output.png
+  python render_slice.py ./run/ output.png --notes "High Reynolds simulation"
+  python render_slice.py ./run/ output.png --time 600 --min-speed 0 --max-speed 40
+  python render_slice.py ./run/ output.png --width 1920 --height 1080
+  python render_slice.py ./run/ output.png --colormap viridis --no-cache
+  python render_slice.py ./run/ slice.png --fields speed p vorticity --dump slice.npz
+  python render_slice.py ./run/ slice.png --fields p k --range p=-400:200
+  python render_slice.py ./run/ output.png --streamlines --seed-spacing 8
+        """
+    )
+
+    parser.add_argument('sol_dir',
+                        help='Path to OpenFOAM solution directory (e.g., ./run/)')
+    parser.add_argument('output_file',
+                        help='Output PNG file name (e.g., flow_slice.png)')
+    parser.add_argument('--notes', '-n',
+                        default='',
+                        help='Text to render in top left corner of image')
+    parser.add_argument('--time', '-t',
+                        default='800',
+                        help='Time directory to read from (default: 800)')
+    parser.add_argument('--min-speed',
+                        type=float,
+                        default=0.0,
+                        help='Minimum speed for colormap normalization (default: 0.0)')
+    parser.add_argument('--max-speed',
+                        type=float,
+                        default=35.0,
+                        help='Maximum speed for colormap normalization (default: 35.0)')
+    parser.add_argument('--width', '-w',
+                        type=int,
+                        default=1920,
+                        help='Image width in pixels (default: 1920)')
+    parser.add_argument('--height',
+                        type=int,
+                        default=1080,
+                        help='Image height in pixels (default: 1080)')
+    parser.add_argument('--padding',
+                        type=float,
+                        default=0.05,
+                        help='Padding around viewing area as fraction (default: 0.05)')
+    parser.add_argument('--colormap',
+                        default='jet',
+                        help='OpenCV colormap name, e.g. jet, viridis, turbo (default: jet)')
+    parser.add_argument('--cache-dir',
+                        default=None,
+                        help='Render cache directory (default: <sol_dir>/renderCache)')
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help='Recompute everything and do not read or write the render cache')
+    parser.add_argument('--fields',
+                        nargs='+',
+                        choices=FIELDS,
+                        default=None,
+                        help='Render several fields in one pass, writing <stem>_<field>.png for each')
+    parser.add_argument('--range',
+                        dest='ranges',
+                        action='append',
+                        default=[],
+                        metavar='FIELD=MIN:MAX',
+                        help='Fixed colour range for a field (default: percentile based; speed uses --min/--max-speed)')
+    parser.add_argument('--dump',
+                        default=None,
+                        help='Also save the interpolated field grids to this .npz file')
+    parser.add_argument('--streamlines',
+                        action='store_true',
+                        help='Overlay streamlines traced through the in-plane velocity')
+    parser.add_argument('--seed-spacing',
+                        type=int,
+                        default=15,
+                        help='Streamline seed spacing in interpolation grid cells (default: 15)')
+    parser.add_argument('--streamline-steps',
+                        type=int,
+                        default=400,
+                        help='Maximum integration steps per direction (default: 400)')
+    parser.add_argument('--streamline-method',
+                        choices=['rk2', 'rk4'],
+                        default='rk4',
+                        help='Streamline integration scheme (default: rk4)')
+
+    args = parser.parse_args(argv)
+
+    try:
+        args.ranges = dict(parse_range(text) for text in args.ranges)
+        render_slice(**vars(args))
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Per-job columnar store of force coefficients.
+
+`output/<job>/coefficients.npz` holds one row per AoA: the AoA, its output
+folder name and every value from that AoA's results.json (Cl, CdPressure,
+CdViscous, CmPitch and the rest of functionObjectProperties) as a single
+(n_aoa, n_keys) float array. It is updated when each AoA finishes, so
+consumers load a whole sweep with one file read instead of listing the job
+folder and opening a results.json per AoA. Jobs written before the store
+existed are converted on first load. Updates hold an flock on
+`coefficients.lock`, since the AoAs of one job finish in several worker
+processes side by side.
+"""
+
+import argparse
+import contextlib
+import fcntl
+import json
+import os
+import sys
+
+import numpy as np
+
+STORE_NAME = "coefficients.npz"
+LOCK_NAME = "coefficients.lock"
+
+# Columns every table has, even when empty
+COEFFICIENTS = ('Cl', 'CdPressure', 'CdViscous', 'CmPitch')
+
+
+def store_path(job_dir):
+    return os.path.join(job_dir, STORE_NAME)
+
+
+@contextlib.contextmanager
+def locked(job_dir):
+    """Hold the job's store lock, so concurrent read-modify-write updates do not lose rows."""
+    with open(os.path.join(job_dir, LOCK_NAME), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _table(aoa, folders, keys, values):
+    """Column dict sorted by AoA: 'aoa', 'folder' and one float array per key."""
+    order = np.argsort(aoa, kind='stable')
+    table = {'aoa': np.asarray(aoa, dtype=np.float64)[order], 'folder': np.asarray(folders, dtype=str)[order]}
+    values = np.asarray(values, dtype=np.float64).reshape(len(order), len(keys))[order]
+    for j, key in enumerate(keys):
+        table[key] = values[:, j]
+    return table
+
+
+def value_keys(table):
+    return [key for key in table if key not in ('aoa', 'folder')]
+
+
+def load_results(job_dir):
+    """Load a job's coefficient table in one read; raises FileNotFoundError if there is no store."""
+    with np.load(store_path(job_dir), allow_pickle=False) as data:
+        return _table(data['aoa'], data['folder'], [str(k) for k in data['keys']], data['values'])
+
+
+def save_results(job_dir, table):
+    keys = value_keys(table)
+    values = np.column_stack([table[key] for key in keys]) if keys else np.empty((len(table['aoa']), 0))
+    path = store_path(job_dir)
+    tmp = f"{path[:-4]}.tmp{os.getpid()}.npz"
+    np.savez(tmp, aoa=table['aoa'], folder=table['folder'], keys=np.asarray(keys, dtype=str), values=values)
+    os.replace(tmp, path)
+
+
+def _rows_to_table(rows):
+    """Table from (aoa, folder, results dict) rows; keys missing from a row become NaN."""
+    keys = list(dict.fromkeys(COEFFICIENTS + tuple(key for _, _, results in rows for key in results)))
+    values = [[float(results.get(key, np.nan)) for key in keys] for _, _, results in rows]
+    return _table([aoa for aoa, _, _ in rows], [folder for _, folder, _ in rows], keys, values)
+
+
+def _table_rows(table):
+    keys = value_keys(table)
+    return [(float(table['aoa'][i]), str(table['folder'][i]), {key: float(table[key][i]) for key in keys})
+            for i in range(len(table['aoa']))]
+
+
+def add_results(job_dir, folder, results, aoa=None):
+    """Insert or replace the row of one AoA folder and rewrite the store."""
+    return update_results(job_dir, {folder: results}, aoa=None if aoa is None else {folder: aoa})
+
+
+def update_results(job_dir, changed, removed=(), aoa=None):
+    """Upsert {folder: results} rows, drop the `removed` folders and rewrite the store once.
+
+    A row's AoA is its folder name unless `aoa` maps the folder to another value.
+    """
+    aoa = aoa or {}
+    dropped = {str(folder) for folder in list(changed) + list(removed)}
+    with locked(job_dir):
+        try:
+            rows = [row for row in _table_rows(load_results(job_dir)) if row[1] not in dropped]
+        except FileNotFoundError:
+            rows = []
+        rows += [(float(aoa.get(folder, folder)), str(folder), results) for folder, results in changed.items()]
+        table = _rows_to_table(rows)
+        save_results(job_dir, table)
+    return table
+
+
+def build_results(job_dir, save=True):
+    """Rebuild the store from the AoA folders' results.json files (only read them if not save)."""
+    if save:
+        with locked(job_dir):
+            table = build_results(job_dir, save=False)
+            save_results(job_dir, table)
+        return table
+    rows = []
+    for folder in os.listdir(job_dir):
+        json_file = os.path.join(job_dir, folder, "results.json")
+        try:
+            aoa = float(folder)
+        except ValueError:
+            continue
+        if os.path.exists(json_file):
+            with open(json_file, 'r') as f:
+                rows.append((aoa, folder, json.load(f)))
+    return _rows_to_table(rows)
+
+
+def load_or_build(job_dir, save=True):
+    """Load the store, converting a job from per-AoA results.json files on first use."""
+    try:
+        return load_results(job_dir)
+    except FileNotFoundError:
+        return build_results(job_dir, save)
+
+
+def total_drag(table):
+    return table['CdPressure'] + table['CdViscous']
+
+
+def to_records(table):
+    """JSON-friendly list of {'aoa', 'folder', 'data'} rows; values a row lacks are left out."""
+    return [{'aoa': aoa, 'folder': folder, 'data': {k: v for k, v in data.items() if not np.isnan(v)}}
+            for aoa, folder, data in _table_rows(table)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Maintain the per-job coefficient store (coefficients.npz)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python results_store.py add output/my_job 5.0 output/my_job/5.0/results.json
+  python results_store.py build output/my_job
+  python results_store.py show output/my_job
+        """
+    )
+    sub = parser.add_subparsers(dest='command', required=True)
+    add = sub.add_parser('add', help='Insert or replace one AoA from its results.json')
+    add.add_argument('job_dir')
+    add.add_argument('folder', help='AoA folder name (the AoA in degrees)')
+    add.add_argument('results_file')
+    build = sub.add_parser('build', help='Rebuild the store from every AoA folder')
+    build.add_argument('job_dir')
+    show = sub.add_parser('show', help='Print the stored table')
+    show.add_argument('job_dir')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'add':
+            with open(args.results_file, 'r') as f:
+                table = add_results(args.job_dir, args.folder, json.load(f))
+        elif args.command == 'build':
+            table = build_results(args.job_dir)
+        else:
+            table = load_results(args.job_dir)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    keys = value_keys(table)
+    print(f"{store_path(args.job_dir)}: {len(table['aoa'])} AoA x {len(keys)} values")
+    if args.command == 'show':
+        print(' '.join(f"{k:>12}" for k in ['aoa'] + keys))
+        for i in range(len(table['aoa'])):
+            print(' '.join(f"{table[k][i]:>12.6g}" for k in ['aoa'] + keys))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""Incremental solver log ingestion with bounded, typed history.
+
+`SolverLog` tails an OpenFOAM solver log (log.simpleFoam) from the last byte
+it read and parses one row per iteration: the time, the initial residual of
+every solved field, ExecutionTime and ClockTime, and the time step continuity
+errors (local, global, cumulative). Rows live in fixed-size float64 ring
+buffers, one per column, so memory stays the same however long the run is.
+Before rows are overwritten they are flushed, as compressed npz chunks, to a
+history directory next to the log; `series` stitches the chunks and the ring
+together and downsamples them to a fixed number of points.
+
+The worker keeps one SolverLog per log file, so repeated telemetry requests
+only parse what the solver wrote since the previous one.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+HISTORY_DIR = "solver_history"
+DEFAULT_CAPACITY = 2048
+
+_LINE_RE = re.compile(
+    r'^Time = (?P<time>[0-9.eE+-]+)\s*$'
+    r'|Solving for (?P<field>\w+), Initial residual = (?P<residual>[0-9.eE+-]+),'
+    r'|^ExecutionTime = (?P<execution>[0-9.eE+-]+) s\s+ClockTime = (?P<clock>[0-9.eE+-]+) s'
+    r'|continuity errors : sum local = (?P<local>[0-9.eE+-]+), global = (?P<global>[0-9.eE+-]+),'
+    r' cumulative = (?P<cumulative>[0-9.eE+-]+)',
+    re.M)
+_CONTINUITY = (('local', 'continuity_local'), ('global', 'continuity_global'), ('cumulative', 'continuity_cumulative'))
+
+
+class SolverLog:
+    """Per-iteration solver telemetry in ring buffers, flushed to compressed chunks."""
+
+    def __init__(self, log_file, history_dir=None, capacity=DEFAULT_CAPACITY):
+        self.log_file = log_file
+        self.history_dir = history_dir or os.path.join(os.path.dirname(log_file), HISTORY_DIR)
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.identity = None
+        self.partial = b''
+        self.count = 0          # rows started so far
+        self.flushed = 0        # rows already written to history chunks
+        self.columns = {'time': self._empty()}
+        # Chunks of a previous pass over the log would duplicate rows parsed again
+        for path in glob.glob(os.path.join(self.history_dir, '*.npz')):
+            os.remove(path)
+
+    def _empty(self):
+        return np.full(self.capacity, np.nan)
+
+    def _set(self, name, value):
+        if self.count == 0:
+            return  # Output before the first iteration (mesh checks, setup)
+        column = self.columns.get(name)
+        if column is None:
+            column = self.columns[name] = self._empty()
+        row = (self.count - 1) % self.capacity
+        if name.startswith('residual_') and not np.isnan(column[row]):
+            value = max(value, column[row])  # Fields solved more than once per iteration
+        column[row] = value
+
+    def _new_row(self, time):
+        if self.count - self.flushed >= self.capacity:
+            self.flush()
+        row = self.count % self.capacity
+        for column in self.columns.values():
+            column[row] = np.nan
+        self.count += 1
+        self.columns['time'][row] = time
+
+    def feed(self, data):
+        """Parse a chunk of log output; a trailing partial line waits for the next chunk."""
+        data = self.partial + data
+        end = data.rfind(b'\n') + 1
+        self.partial = data[end:]
+        for match in _LINE_RE.finditer(data[:end].decode(errors='replace')):
+            groups = match.groupdict()
+            if groups['time'] is not None:
+                self._new_row(float(groups['time']))
+            elif groups['field'] is not None:
+                self._set(f"residual_{groups['field']}", float(groups['residual']))
+            elif groups['execution'] is not None:
+                self._set('execution_time', float(groups['execution']))
+                self._set('clock_time', float(groups['clock']))
+            else:
+                for group, name in _CONTINUITY:
+                    self._set(name, float(groups[group]))
+
+    def tail(self):
+        """Read whatever the solver appended since the last call; starts over if the log was replaced."""
+        try:
+            st = os.stat(self.log_file)
+        except FileNotFoundError:
+            return 0
+        identity = (st.st_dev, st.st_ino)
+        if identity != self.identity or st.st_size < self.offset:
+            self.reset()
+            self.identity = identity
+        with open(self.log_file, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        self.offset += len(data)
+        self.feed(data)
+        return len(data)
+
+    def _ring_rows(self, start):
+        """Row indices of the ring from absolute row `start` to the newest, oldest first."""
+        start = max(start, self.count - self.capacity)
+        return np.arange(start, self.count) % self.capacity
+
+    def flush(self):
+        """Write rows not yet on disk as a compressed chunk."""
+        if self.count == self.flushed:
+            return None
+        os.makedirs(self.history_dir, exist_ok=True)
+        rows = self._ring_rows(self.flushed)
+        path = os.path.join(self.history_dir, f"{self.flushed:08d}.npz")
+        np.savez_compressed(path, **{name: column[rows] for name, column in self.columns.items()})
+        self.flushed = self.count
+        return path
+
+    def history(self, names=None):
+        """Every row so far, {name: array}, from the flushed chunks and the ring."""
+        names = list(self.columns) if names is None else ['time'] + [n for n in names if n != 'time']
+        parts = {name: [] for name in names}
+        for path in sorted(glob.glob(os.path.join(self.history_dir, '*.npz'))):
+            with np.load(path) as chunk:
+                n = len(chunk['time'])
+                for name in names:
+                    parts[name].append(chunk[name] if name in chunk.files else np.full(n, np.nan))
+        rows = self._ring_rows(self.flushed)
+        for name in names:
+            column = self.columns.get(name)
+            parts[name].append(column[rows] if column is not None else np.full(len(rows), np.nan))
+        return {name: np.concatenate(values) for name, values in parts.items()}
+
+    def series(self, names=None, points=200):
+        """History downsampled to at most `points` evenly spaced rows (the last row always kept)."""
+        history = self.history(names)
+        n = len(history['time'])
+        if points and n > points:
+            index = np.unique(np.linspace(0, n - 1, points).round().astype(np.int64))
+            history = {name: values[index] for name, values in history.items()}
+        return history
+
+    def summary(self, window=50):
+        """Latest values and the mean seconds per iteration over the last `window` iterations."""
+        if self.count == 0:
+            return {'iterations': 0, 'time': None, 'residuals': {}, 'execution_time': None,
+                    'seconds_per_iteration': None, 'continuity': {}, 'flushed': self.flushed}
+        last = (self.count - 1) % self.capacity
+
+        def latest(name):
+            # The newest row may still be filling in: fall back to the previous one
+            for row in (last, (self.count - 2) % self.capacity):
+                value = self.columns[name][row]
+                if not np.isnan(value):
+                    return float(value)
+            return None
+
+        recent = self.columns['execution_time'][self._ring_rows(self.count - window)] \
+            if 'execution_time' in self.columns else np.array([])
+        recent = recent[~np.isnan(recent)]
+        return {
+            'iterations': self.count,
+            'time': float(self.columns['time'][last]),
+            'residuals': {name[len('residual_'):]: latest(name) for name in self.columns if name.startswith('residual_')},
+            'execution_time': latest('execution_time') if 'execution_time' in self.columns else None,
+            'seconds_per_iteration': float(np.diff(recent).mean()) if len(recent) > 1 else None,
+            'continuity': {name: latest(name) for _, name in _CONTINUITY if name in self.columns},
+            'flushed': self.flushed,
+        }
+
+
+# Open SolverLogs by log path, least recently used first; finished AoAs are dropped on close
+_LOGS = {}
+MAX_OPEN_LOGS = 8
+
+
+def _json_series(series):
+    return {name: [None if np.isnan(v) else float(v) for v in values] for name, values in series.items()}
+
+
+def telemetry(log_file, columns=None, points=200, flush=False, capacity=DEFAULT_CAPACITY, close=False):
+    """Tail log_file and return {'summary', 'series'}.
+
+    `flush` also writes pending rows to disk; `close` (after the AoA has
+    finished) flushes and forgets the log, so its ring buffers are freed.
+    """
+    key = os.path.abspath(log_file)
+    log = _LOGS.pop(key, None)
+    if log is None or log.capacity != capacity:
+        log = SolverLog(log_file, capacity=capacity)
+    log.tail()
+    if flush or close:
+        log.flush()
+    series = _json_series(log.series(columns, points)) if points else None
+    result = {'summary': log.summary(), 'series': series}
+    if not close:
+        _LOGS[key] = log
+        while len(_LOGS) > MAX_OPEN_LOGS:
+            del _LOGS[next(iter(_LOGS))]
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Parse an OpenFOAM solver log into residual, timing and continuity telemetry',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python solver_log.py output/my_job/5.0/log.simpleFoam
+  python solver_log.py output/my_job/5.0/log.simpleFoam --points 50 --json
+  python solver_log.py output/my_job/5.0/log.simpleFoam --columns residual_p execution_time --flush
+        """
+    )
+    parser.add_argument('log_file', help='Solver log file')
+    parser.add_argument('--columns', nargs='+', default=None,
+                        help='Columns of the series, e.g. residual_p execution_time (default: all)')
+    parser.add_argument('--points', type=int, default=200, help='Maximum series points (default: 200, 0 for none)')
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY,
+                        help=f'Iterations kept in memory before flushing (default: {DEFAULT_CAPACITY})')
+    parser.add_argument('--flush', action='store_true', help='Write all parsed rows to the history directory')
+    parser.add_argument('--json', action='store_true', help='Print summary and series as JSON')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.log_file):
+        print(f"Error: log file not found: {args.log_file}")
+        sys.exit(1)
+    result = telemetry(args.log_file, args.columns, args.points, args.flush, args.capacity)
+
+    if args.json:
+        print(json.dumps(result))
+        return
+    summary = result['summary']
+    print(f"{summary['iterations']} iterations, time {summary['time']}, "
+          f"{summary['seconds_per_iteration'] or 0:.3f} s/iteration")
+    for field, residual in summary['residuals'].items():
+        print(f"  {field:<8} initial residual {residual:.3e}" if residual is not None else f"  {field:<8} -")
+    for name, value in summary['continuity'].items():
+        print(f"  {name:<22} {value:.3e}")
+
+
+if __name__ == '__main__':
+    main()
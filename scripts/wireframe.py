@@ -0,0 +1,53 @@
+"""Vectorized wireframe extraction and drawing for polyMesh slices.
+
+Works on the CSR face arrays returned by polymesh.read_faces: every face edge
+is built at once, filtered to the z-plane with a single mask, deduplicated
+with a sort-based unique, converted to pixels in one array operation and
+drawn with batched cv2.polylines calls.
+"""
+
+import cv2
+import numpy as np
+
+from geometry import world_to_pixels
+from polymesh import next_vertex_index
+
+# Number of edges handed to a single cv2.polylines call
+DRAW_BATCH = 1 << 20
+
+
+def face_edges(face_offsets, face_labels):
+    """Return every face edge as canonical (min, max) vertex label arrays."""
+    v1 = face_labels
+    v2 = face_labels[next_vertex_index(face_offsets)]
+    return np.minimum(v1, v2), np.maximum(v1, v2)
+
+
+def plane_edges(points, face_offsets, face_labels, tol, z=0.0):
+    """Unique (n_edges, 2) vertex pairs whose midpoint lies within `tol` of the z-plane."""
+    lo, hi = face_edges(face_offsets, face_labels)
+    mean_z = 0.5 * (points[lo, 2] + points[hi, 2])
+    near = np.abs(mean_z - z) < tol
+    lo = lo[near].astype(np.int64)
+    hi = hi[near].astype(np.int64)
+    # Shared edges appear once per adjacent face; pack pairs into one key and sort-unique
+    keys = np.unique(lo * len(points) + hi)
+    return np.column_stack((keys // len(points), keys % len(points)))
+
+
+def draw_edges(img, points, edges, bounds, color=(0, 0, 0), thickness=1):
+    """Draw the edges that have at least one endpoint inside `bounds` onto img."""
+    x_min, x_max, y_min, y_max = bounds
+    h, w = img.shape[:2]
+    p1 = points[edges[:, 0], :2]
+    p2 = points[edges[:, 1], :2]
+
+    def inside(p):
+        return (x_min <= p[:, 0]) & (p[:, 0] <= x_max) & (y_min <= p[:, 1]) & (p[:, 1] <= y_max)
+
+    visible = inside(p1) | inside(p2)
+    segments = np.stack((p1[visible], p2[visible]), axis=1)  # (n, 2, 2)
+    pixels = world_to_pixels(segments, x_min, x_max, y_min, y_max, w, h)
+    for start in range(0, len(pixels), DRAW_BATCH):
+        cv2.polylines(img, pixels[start:start + DRAW_BATCH], False, color, thickness)
+    return len(pixels)
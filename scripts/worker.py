@@ -0,0 +1,139 @@
+"""Long-lived render/postprocess worker speaking JSON lines over stdin/stdout.
+
+Each request is one line:
+
+    {"id": 1, "op": "render_slice", "args": {"sol_dir": "run/job", "output_file": "render.png"}}
+
+and gets exactly one response line:
+
+    {"id": 1, "ok": true, "result": {...}, "output": "<captured prints>", "elapsed_ms": 12.5}
+
+or, on failure, `"ok": false` with `error` and `traceback`. Anything the
+operations print is captured into `output` so stdout carries only protocol
+lines. Heavy imports, parsed meshes, cached slice weights and coefficient
+models stay warm between requests.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import traceback
+
+import matplotlib
+matplotlib.use('Agg')  # Never open plot windows from the worker
+
+import adaptive_aoa
+import aoa_case
+import case_cache
+import coeff_model
+import compare
+import force_history
+import map_fields
+import postprocess
+import render_mesh
+import render_slice
+import results_store
+import solver_log
+
+
+def _predict(params_files, aoa=0.0):
+    return [coeff_model.predict_coefficients(aoa, params_file) for params_file in params_files]
+
+
+def _record_results(job_dir, folder, results):
+    table = results_store.add_results(job_dir, folder, results)
+    return {'n_aoa': len(table['aoa'])}
+
+
+def _load_results(job_dir):
+    return results_store.to_records(results_store.load_or_build(job_dir))
+
+
+def _cache_lookup(model_path, aoas, settings=None):
+    return case_cache.lookup(model_path, aoas, settings=case_cache.case_settings(**(settings or {})))
+
+
+def _cache_restore(key, job_dir, folder):
+    # A restored AoA also joins the job's coefficient store
+    results = case_cache.restore(key, os.path.join(job_dir, folder))
+    _record_results(job_dir, folder, results)
+    return results
+
+
+OPERATIONS = {
+    'ping': lambda: {'pong': True},
+    'render_slice': render_slice.render_slice,
+    'render_mesh': render_mesh.render_mesh,
+    'postprocess': postprocess.postprocess,
+    'compare': compare.compare,
+    'predict': _predict,
+    'record_results': _record_results,
+    'load_results': _load_results,
+    'propose_aoas': adaptive_aoa.plan_job,
+    'aoa_case': aoa_case.write_aoa_case,
+    'snapshot_fields': map_fields.snapshot,
+    'warm_start': map_fields.warm_start,
+    'ingest_results': force_history.ingest,
+    'solver_telemetry': solver_log.telemetry,
+    'cache_lookup': _cache_lookup,
+    'cache_store': case_cache.store,
+    'cache_restore': _cache_restore,
+}
+
+
+def _preload():
+    """Import the optional heavy dependencies up front so the first request is fast."""
+    for module in ('fluidfoam', 'scipy.spatial', 'stl'):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
+def handle(request):
+    response = {'id': request.get('id')}
+    operation = OPERATIONS.get(request.get('op'))
+    if operation is None:
+        response.update(ok=False, error=f"Unknown operation: {request.get('op')}")
+        return response
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            response['result'] = operation(**request.get('args', {}))
+        response['ok'] = True
+    except Exception as e:
+        response['ok'] = False
+        response['error'] = str(e)
+        response['traceback'] = traceback.format_exc()
+    response['output'] = output.getvalue()
+    response['elapsed_ms'] = (time.perf_counter() - start) * 1000
+    return response
+
+
+def serve(stdin=sys.stdin, stdout=sys.stdout):
+    _preload()
+    stdout.write(json.dumps({'id': None, 'ok': True, 'result': {'ready': sorted(OPERATIONS)}}) + '\n')
+    stdout.flush()
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {'id': None, 'ok': False, 'error': f"Invalid request: {e}"}
+        else:
+            if request.get('op') == 'shutdown':
+                break
+            response = handle(request)
+        stdout.write(json.dumps(response, default=str) + '\n')
+        stdout.flush()
+
+
+if __name__ == '__main__':
+    serve()
@@ -1,5 +1,6 @@
 const express = require('express');
 const path = require('path');
+const os = require('os');
 const fs = require('fs').promises;
 const fsSync = require('fs');
 const { exec, spawn } = require('child_process');
@@ -10,10 +11,44 @@ const multer = require('multer');
 const si = require('systeminformation');
 
 const Simulation = require('./Simulation');
+const Scheduler = require('./Scheduler');
+const PythonWorker = require('./PythonWorker');
+const PythonWorkerPool = require('./PythonWorkerPool');
+const CoefficientModel = require('./CoefficientModel');
 
 const app = express();
 const PORT = process.env.PORT || 3000;
 
+// Resident Python process for the interactive endpoints (telemetry, compare, predict, adaptive
+// proposals, cache lookups, results); it never queues behind a running task's renders
+const pythonWorker = new PythonWorker({ cwd: __dirname });
+
+// Workers for scheduler tasks and postprocessing: one per concurrently running task (each holds
+// at least one core) plus one so postprocessing does not wait for a task to finish
+const taskWorkers = new PythonWorkerPool({ size: os.cpus().length + 1, worker_options: { cwd: __dirname } });
+
+// Job log entries kept in memory; solver output goes to output/<job>/<aoa>/log.simpleFoam instead
+const MAX_JOB_LOGS = 2000;
+
+// Solver end time of every AoA; part of the result cache key
+const SIMULATION_MAX_TIME = 1200;
+
+// Log array whose push drops the oldest entries beyond MAX_JOB_LOGS, trimming in batches
+// so pushes stay O(1) amortized. `total` counts every entry ever pushed.
+function boundedLogs(entries = []) {
+    const logs = entries.slice(-MAX_JOB_LOGS);
+    logs.total = entries.length;
+    logs.push = function (...items) {
+        logs.total += items.length;
+        const length = Array.prototype.push.apply(logs, items);
+        if (length > 2 * MAX_JOB_LOGS) {
+            logs.splice(0, length - MAX_JOB_LOGS);
+        }
+        return logs.length;
+    };
+    return logs;
+}
+
 // Authentication credentials
 const AUTH_USERNAME = 'admin';
 const AUTH_PASSWORD = 'splungus';
@@ -66,7 +101,13 @@ app.use(express.static(path.join(__dirname, 'webapp/public')));
 // In-memory job storage (in production, use a database)
 let jobs = new Map();
 let jobCounter = 0;
-let runningProcesses = new Map(); // Track running processes for job termination
+
+// Packs the AoAs of all jobs onto the host's cores
+const scheduler = new Scheduler({
+    cores: os.cpus().length,
+    run_task: (task) => taskWorkers.run((worker) => runTask(task, worker)),
+    on_job_done: (job, error) => finishJob(job, error),
+});
 
 // Job status enum
 const JobStatus = {
@@ -170,9 +211,9 @@ app.get('/api/jobs/:id', requireAuth, async (req, res) => {
         const logLimit = 200;
         const logs = job.logs.slice(-logLimit);
         const logInfo = {
-            totalLogs: job.logs.length,
+            totalLogs: job.logs.total,
             showing: logs.length,
-            limited: job.logs.length > logLimit
+            limited: job.logs.total > logLimit
         };
 
         res.json({
@@ -189,7 +230,8 @@ app.get('/api/jobs/:id', requireAuth, async (req, res) => {
 // Create new job
 app.post('/api/jobs', requireAuth, async (req, res) => {
     try {
-        const { name, modelPath, angleOfAttacks, processors = 4 } = req.body;
+        const { name, modelPath, angleOfAttacks, processors = 4, aoaMode = 'rotate-geometry', warmStart = false,
+            convergence = {}, useCache = true, reconstruct = true } = req.body;
 
         if (!name || !modelPath || !angleOfAttacks || !Array.isArray(angleOfAttacks)) {
             return res.status(400).json({ 
@@ -204,28 +246,19 @@ app.post('/api/jobs', requireAuth, async (req, res) => {
             });
         }
 
-        jobCounter++;
-        const job = {
-            id: jobCounter,
-            name: name,
-            modelPath: modelPath,
-            angleOfAttacks: angleOfAttacks,
-            processors: processors,
-            status: JobStatus.QUEUED,
-            created: new Date().toISOString(),
-            started: null,
-            completed: null,
-            progress: 0,
-            currentAoA: null,
-            totalAoA: angleOfAttacks.length,
-            logs: [],
-            error: null
-        };
-
-        jobs.set(job.id, job);
+        if (!Simulation.AOA_MODES.includes(aoaMode)) {
+            return res.status(400).json({
+                error: `aoaMode must be one of: ${Simulation.AOA_MODES.join(', ')}`
+            });
+        }
 
-        // Start job asynchronously
-        runJob(job);
+        const job = createJob(name, modelPath, angleOfAttacks, processors, {
+            aoaMode,
+            warmStart: Boolean(warmStart),
+            convergence,
+            useCache: Boolean(useCache),
+            reconstruct: Boolean(reconstruct),
+        });
 
         res.status(201).json({ id: job.id, status: job.status });
     } catch (error) {
@@ -249,15 +282,44 @@ app.get('/api/jobs/:id/logs', requireAuth, async (req, res) => {
         
         res.json({ 
             logs: logs,
-            totalLogs: job.logs.length,
+            totalLogs: job.logs.total,
             showing: logs.length,
-            limited: job.logs.length > logLimit
+            limited: job.logs.total > logLimit
         });
     } catch (error) {
         res.status(500).json({ error: error.message });
     }
 });
 
+// Solver telemetry (residuals, iteration timing, continuity errors) of one AoA
+app.get('/api/jobs/:id/telemetry', requireAuth, async (req, res) => {
+    try {
+        const jobId = parseInt(req.params.id);
+        const job = jobs.get(jobId);
+
+        if (!job) {
+            return res.status(404).json({ error: 'Job not found' });
+        }
+
+        // Defaults to the AoA being solved, or the last one of the job
+        const aoa = req.query.aoa ?? job.currentAoA ?? job.angleOfAttacks[job.angleOfAttacks.length - 1];
+        const logFile = path.join(__dirname, 'output', job.name, `${aoa}`, 'log.simpleFoam');
+        if (!fsSync.existsSync(logFile)) {
+            return res.status(404).json({ error: `No solver log for AoA ${aoa}` });
+        }
+
+        const telemetry = await pythonWorker.call('solver_telemetry', {
+            log_file: logFile,
+            columns: req.query.columns ? req.query.columns.split(',') : null,
+            points: parseInt(req.query.points ?? 200),
+        });
+
+        res.json({ aoa, ...telemetry });
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
 // Download job results (JSON)
 app.get('/api/jobs/:id/download/:aoa?', requireAuth, async (req, res) => {
     try {
@@ -336,32 +398,21 @@ app.delete('/api/jobs/:id', requireAuth, async (req, res) => {
             return res.status(404).json({ error: 'Job not found' });
         }
 
-        // Stop running job if it exists
-        if (runningProcesses.has(jobId)) {
-            const simulation = runningProcesses.get(jobId);
-            try {
-                if (simulation.current_process) {
-                    console.log(`Terminating job ${jobId} (PID: ${simulation.current_process.pid})`);
-                    simulation.current_process.kill('SIGTERM'); // Gracefully terminate
-                    setTimeout(() => {
-                        if (simulation.current_process && !simulation.current_process.killed) {
-                            simulation.current_process.kill('SIGKILL'); // Force kill if still running
-                        }
-                    }, 5000);
-                }
-                runningProcesses.delete(jobId);
-                
-                // Update job status
+        // Stop the job's queued and running tasks if it has any
+        try {
+            if (scheduler.cancel(jobId)) {
+                console.log(`Terminating job ${jobId}`);
                 job.status = JobStatus.FAILED;
                 job.error = 'Job terminated by user';
                 job.completed = new Date().toISOString();
                 job.logs.push('[SYSTEM] Job terminated by user request');
-            } catch (killError) {
-                console.error(`Error terminating job ${jobId}:`, killError);
             }
+        } catch (killError) {
+            console.error(`Error terminating job ${jobId}:`, killError);
         }
 
         jobs.delete(jobId);
+        await removeRunDirectories(job);
         res.json({ message: 'Job deleted successfully' });
     } catch (error) {
         res.status(500).json({ error: error.message });
@@ -422,7 +473,9 @@ app.post('/api/jobs/:id/postprocess', requireAuth, async (req, res) => {
 
         // Run postprocessing
         job.logs.push('[POSTPROCESS] Starting postprocessing...');
-        await execAsync(`cd ${__dirname} && ./venv/bin/python3 -u scripts/postprocess.py output/${job.name}`);
+        // Incremental unless a full rebuild is requested
+        const incremental = !(req.body && req.body.full);
+        await taskWorkers.call('postprocess', { folder_path: path.join(__dirname, 'output', job.name), incremental });
         job.logs.push('[POSTPROCESS] Postprocessing completed successfully');
 
         res.json({ success: true, message: 'Postprocessing completed' });
@@ -437,6 +490,59 @@ app.post('/api/jobs/:id/postprocess', requireAuth, async (req, res) => {
     }
 });
 
+// Propose the next AoAs where a completed job's fitted curves are least certain,
+// optionally queueing them as a follow-up run into the same output folder
+app.post('/api/jobs/:id/adaptive', requireAuth, async (req, res) => {
+    try {
+        const jobId = parseInt(req.params.id);
+        const job = jobs.get(jobId);
+
+        if (!job) {
+            return res.status(404).json({ error: 'Job not found' });
+        }
+
+        if (job.status !== JobStatus.COMPLETED) {
+            return res.status(400).json({ error: 'Job not completed yet' });
+        }
+
+        const { count = 3, range = null, minSpacing = 1.0, tolerance = 0.0, queue = false } = req.body;
+        if (range !== null && (!Array.isArray(range) || range.length !== 2)) {
+            return res.status(400).json({ error: 'range must be [min, max]' });
+        }
+
+        const plan = await pythonWorker.call('propose_aoas', {
+            job_dir: path.join(__dirname, 'output', job.name),
+            count: parseInt(count),
+            aoa_range: range,
+            min_spacing: parseFloat(minSpacing),
+            tolerance: parseFloat(tolerance),
+        });
+
+        let queued = null;
+        const aoas = plan.proposals.map((proposal) => proposal.aoa);
+        if (queue && aoas.length > 0) {
+            const busy = Array.from(jobs.values()).some((other) =>
+                other.name === job.name && (other.status === JobStatus.QUEUED || other.status === JobStatus.RUNNING));
+            if (busy) {
+                return res.status(409).json({ error: `A run of ${job.name} is already in progress`, plan });
+            }
+            const followUp = createJob(job.name, job.modelPath, aoas, job.processors, {
+                aoaMode: job.aoaMode,
+                warmStart: job.warmStart,
+                convergence: job.convergence,
+                useCache: job.useCache,
+                reconstruct: job.reconstruct,
+                followUp: true,
+            });
+            queued = { id: followUp.id, status: followUp.status, angleOfAttacks: aoas };
+        }
+
+        res.json({ success: true, sampled: plan.sampled, proposals: plan.proposals, queued });
+    } catch (error) {
+        res.status(500).json({ error: error.message });
+    }
+});
+
 // Get system CPU usage
 app.get('/api/system/cpu', requireAuth, async (req, res) => {
     try {
@@ -459,6 +565,11 @@ app.get('/api/system/cpu', requireAuth, async (req, res) => {
     }
 });
 
+// Core allocation, running and queued tasks of the scheduler
+app.get('/api/scheduler', requireAuth, (req, res) => {
+    res.json(scheduler.status());
+});
+
 // Compare two jobs
 app.post('/api/compare', requireAuth, async (req, res) => {
     try {
@@ -498,64 +609,37 @@ app.post('/api/compare', requireAuth, async (req, res) => {
             fsSync.mkdirSync(tempDir, { recursive: true });
         }
 
-        // Run comparison script
-        const compareCommand = `./venv/bin/python3 scripts/compare.py "${outputDir1}" "${outputDir2}" "${comparePath}"`;
-        console.log('Running comparison:', compareCommand);
-        
-        const result = await execAsync(compareCommand);
+        // Run comparison in the worker
+        console.log(`Running comparison: ${outputDir1} vs ${outputDir2}`);
+        await pythonWorker.call('compare', {
+            folder_paths: [outputDir1, outputDir2],
+            output_path: comparePath,
+        });
         
         // Get stats at 0 degrees for both jobs
         let stats = {};
         try {
-            // Load PCHIP parameters for both jobs
-            const pchip1Path = path.join(outputDir1, 'pchip_parameters.json');
-            const pchip2Path = path.join(outputDir2, 'pchip_parameters.json');
-            
-            if (fsSync.existsSync(pchip1Path) && fsSync.existsSync(pchip2Path)) {
-                const pchip1 = JSON.parse(fsSync.readFileSync(pchip1Path, 'utf8'));
-                const pchip2 = JSON.parse(fsSync.readFileSync(pchip2Path, 'utf8'));
-                
-                // Use compare.py functionality to get values at 0 degrees
-                const predictCommand = `./venv/bin/python3 -c "
-import json
-import numpy as np
-from scipy.interpolate import PchipInterpolator
-
-# Load PCHIP data
-with open('${pchip1Path}') as f:
-    data1 = json.load(f)
-with open('${pchip2Path}') as f:
-    data2 = json.load(f)
-
-# Create interpolators
-cl1 = PchipInterpolator(data1['Cl']['knots'], data1['Cl']['values'])
-cd1 = PchipInterpolator(data1['Cd']['knots'], data1['Cd']['values']) 
-cm1 = PchipInterpolator(data1['CmPitch']['knots'], data1['CmPitch']['values'])
-
-cl2 = PchipInterpolator(data2['Cl']['knots'], data2['Cl']['values'])
-cd2 = PchipInterpolator(data2['Cd']['knots'], data2['Cd']['values'])
-cm2 = PchipInterpolator(data2['CmPitch']['knots'], data2['CmPitch']['values'])
-
-# Get values at 0 degrees
-aoa = 0.0
-values = {
-    'job1': {
-        'cl': float(cl1(aoa)),
-        'cd': float(cd1(aoa)), 
-        'cm': float(cm1(aoa))
-    },
-    'job2': {
-        'cl': float(cl2(aoa)),
-        'cd': float(cd2(aoa)),
-        'cm': float(cm2(aoa))
-    }
-}
+            // Evaluate both jobs' fitted coefficient models at 0 degrees
+            const modelPaths = [outputDir1, outputDir2].map((dir) => path.join(dir, 'coefficient_model.json'));
+            const pchipPaths = [outputDir1, outputDir2].map((dir) => path.join(dir, 'pchip_parameters.json'));
+            let predictions = null;
+
+            if (modelPaths.every((file) => fsSync.existsSync(file))) {
+                predictions = modelPaths.map((file) => CoefficientModel.load(file).evaluate(0.0));
+            } else if (pchipPaths.every((file) => fsSync.existsSync(file))) {
+                // Jobs postprocessed before coefficient models existed
+                predictions = await pythonWorker.call('predict', {
+                    params_files: pchipPaths,
+                    aoa: 0.0,
+                });
+            }
 
-print(json.dumps(values))
-"`;
-                
-                const statsResult = await execAsync(predictCommand);
-                const parsedStats = JSON.parse(statsResult.stdout.trim());
+            if (predictions) {
+                const [prediction1, prediction2] = predictions;
+                const parsedStats = {
+                    job1: { cl: prediction1.Cl, cd: prediction1.Cd, cm: prediction1.CmPitch },
+                    job2: { cl: prediction2.Cl, cd: prediction2.Cd, cm: prediction2.CmPitch },
+                };
                 
                 stats = {
                     job1: {
@@ -604,89 +688,333 @@ app.get('*', isAuthenticated, (req, res) => {
 
 // Helper Functions
 
-async function runJob(job) {
+function createJob(name, modelPath, angleOfAttacks, processors,
+    { aoaMode = 'rotate-geometry', warmStart = false, convergence = {}, useCache = true, reconstruct = true,
+      followUp = false } = {}) {
+    jobCounter++;
+    const job = {
+        id: jobCounter,
+        name: name,
+        modelPath: modelPath,
+        angleOfAttacks: angleOfAttacks,
+        processors: processors,
+        aoaMode: aoaMode,
+        warmStart: warmStart,
+        convergence: convergence,
+        useCache: useCache,
+        reconstruct: reconstruct,
+        followUp: followUp, // Adds AoAs to an earlier job's output folder
+        cacheKeys: {},
+        cachedAoA: [],
+        runDirectories: [],
+        status: JobStatus.QUEUED,
+        created: new Date().toISOString(),
+        started: null,
+        completed: null,
+        progress: 0,
+        currentAoA: null,
+        totalAoA: angleOfAttacks.length,
+        completedAoA: 0,
+        logs: boundedLogs(),
+        error: null
+    };
+
+    jobs.set(job.id, job);
+
+    // Start job asynchronously
+    submitJob(job);
+    return job;
+}
+
+// Serve AoAs already in the result cache, then queue the rest on the scheduler
+async function submitJob(job) {
     try {
+        await writeJobManifest(job);
+
+        let missing = job.angleOfAttacks;
+        if (job.useCache) {
+            missing = await restoreCachedAoAs(job);
+        }
+        if (missing.length === 0) {
+            job.started = new Date().toISOString();
+            job.logs.push('[CACHE] Every AoA was served from the cache');
+            await finishJob(job, null);
+            return;
+        }
+
+        // Queue the job's AoAs; rotate-inflow runs them in one case so the mesh is reused
+        scheduler.submit(job, {
+            aoas: missing,
+            max_ranks: job.processors,
+            grouped: job.aoaMode === 'rotate-inflow',
+        });
+    } catch (error) {
+        await finishJob(job, error);
+    }
+}
+
+// Settings besides the STL and base-case dictionaries that change a case's results
+function cacheSettings(job) {
+    return {
+        aoa_mode: job.aoaMode,
+        end_time: SIMULATION_MAX_TIME,
+        convergence: job.convergence,
+    };
+}
+
+// Copy cached AoAs into the job's output folder; returns the AoAs that still need solving
+async function restoreCachedAoAs(job) {
+    let lookup;
+    try {
+        lookup = await pythonWorker.call('cache_lookup', {
+            model_path: job.modelPath,
+            aoas: job.angleOfAttacks,
+            settings: cacheSettings(job),
+        });
+    } catch (error) {
+        job.logs.push(`[CACHE] Lookup failed, simulating every AoA: ${error.message}`);
+        return job.angleOfAttacks;
+    }
+    job.modelSha256 = lookup.model_sha256;
+
+    const missing = [];
+    for (const entry of lookup.entries) {
+        job.cacheKeys[entry.aoa] = entry.key;
+        if (!entry.cached) {
+            missing.push(entry.aoa);
+            continue;
+        }
+        try {
+            await pythonWorker.call('cache_restore', { key: entry.key, job_dir: `output/${job.name}`, folder: `${entry.aoa}` });
+            job.cachedAoA.push(entry.aoa);
+            job.completedAoA++;
+            job.progress = Math.round((job.completedAoA / job.totalAoA) * 100);
+            job.logs.push(`[CACHE] AoA ${entry.aoa}° served from cache (${entry.key.slice(0, 12)})`);
+        } catch (error) {
+            job.logs.push(`[CACHE] Restoring AoA ${entry.aoa}° failed, simulating it: ${error.message}`);
+            missing.push(entry.aoa);
+        }
+    }
+    return missing;
+}
+
+// Add a finished AoA to the result cache on the task's worker; failures only cost a future cache hit
+function cacheAoA(job, aoa, worker) {
+    const key = job.cacheKeys[aoa];
+    if (!job.useCache || !key) {
+        return;
+    }
+    worker.call('cache_store', {
+        key: key,
+        aoa_dir: `output/${job.name}/${aoa}`,
+        meta: {
+            model: job.modelPath,
+            model_sha256: job.modelSha256,
+            aoa: aoa,
+            job: job.name,
+            settings: cacheSettings(job),
+        },
+    }).catch((error) => job.logs.push(`[CACHE] Storing AoA ${aoa}° failed: ${error.message}`));
+}
+
+// output/<job>/job.json records how the job was submitted, for loadPreviousJobs
+async function writeJobManifest(job) {
+    const jobDir = path.join(__dirname, 'output', job.name);
+    const manifestPath = path.join(jobDir, 'job.json');
+    await fs.mkdir(jobDir, { recursive: true });
+    let manifest = {
+        name: job.name,
+        modelPath: job.modelPath,
+        angleOfAttacks: job.angleOfAttacks,
+        processors: job.processors,
+        aoaMode: job.aoaMode,
+        warmStart: job.warmStart,
+        convergence: job.convergence,
+        reconstruct: job.reconstruct,
+        cachedAoA: job.cachedAoA,
+        runDirectories: job.runDirectories,
+        status: job.status,
+        created: job.created,
+        started: job.started,
+        completed: job.completed,
+        error: job.error,
+    };
+    if (job.followUp) {
+        // Keep the original submission and its settings; the follow-up run is recorded beside it
+        const original = await fs.readFile(manifestPath, 'utf8').then(JSON.parse).catch(() => null);
+        if (original) {
+            const union = (a, b) => Array.from(new Set([...(a || []), ...(b || [])]));
+            const run = {
+                angleOfAttacks: job.angleOfAttacks,
+                cachedAoA: job.cachedAoA,
+                status: job.status,
+                created: job.created,
+                started: job.started,
+                completed: job.completed,
+                error: job.error,
+            };
+            manifest = {
+                ...original,
+                angleOfAttacks: union(original.angleOfAttacks, job.angleOfAttacks).sort((a, b) => a - b),
+                cachedAoA: union(original.cachedAoA, job.cachedAoA),
+                runDirectories: union(original.runDirectories, job.runDirectories),
+                followUps: (original.followUps || []).filter((entry) => entry.created !== job.created).concat([run]),
+            };
+        }
+    }
+    await fs.writeFile(manifestPath, JSON.stringify(manifest, null, 2));
+}
+
+// Progress over the job's AoAs: finished ones plus the fraction of those being solved
+function updateJobProgress(job) {
+    const running = scheduler.tasks_for(job.id).reduce((sum, task) => sum + task.fraction, 0);
+    job.progress = Math.max(job.progress, Math.round(((job.completedAoA + running) / job.totalAoA) * 100));
+}
+
+// Run one scheduler task: a Simulation over the task's AoAs in its own run directory,
+// with a Python worker of its own
+async function runTask(task, worker) {
+    const job = task.job;
+    if (job.status === JobStatus.QUEUED) {
         job.status = JobStatus.RUNNING;
         job.started = new Date().toISOString();
         job.logs.push(`Job started at ${job.started}`);
-
-        // Create simulation with callback options
-        const simulation = new Simulation(job.name, job.modelPath, job.angleOfAttacks, {
-            // Progress callback - called on time updates
-            onProgress: (overallProgress, currentAoA, currentTime) => {
-                job.progress = Math.max(job.progress, overallProgress); // Only increase progress
-                job.currentAoA = currentAoA;
-                job.logs.push(`[PROGRESS] ${overallProgress}% - AoA: ${currentAoA}° - Time: ${currentTime}`);
-            },
-            
-            // AoA start callback
-            onAoAStart: (aoa, index, total) => {
-                job.currentAoA = aoa;
-                job.logs.push(`[AoA START] Starting AoA ${aoa}° (${index + 1}/${total})`);
-            },
-            
-            // AoA completion callback
-            onAoAComplete: (aoa, index, total) => {
-                const baseProgress = Math.round(((index + 1) / total) * 100);
-                job.progress = baseProgress;
-                job.logs.push(`[AoA COMPLETE] Completed AoA ${aoa}° (${index + 1}/${total}) - ${baseProgress}%`);
-            },
-            
-            // Time update callback for fine-grained progress
-            onTimeUpdate: (time, timeProgress, overallProgress, aoaIndex) => {
-                // Update progress if it's higher than current
-                if (overallProgress > job.progress) {
-                    job.progress = Math.round(overallProgress);
-                }
-                
-                // Log less frequently to avoid spam (every 100 time units)
-                if (Math.floor(time) % 100 === 0 && time > 0) {
-                    job.logs.push(`[TIME UPDATE] Simulation time: ${time}/${simulation.MAX_SIMULATION_TIME} (${Math.round(timeProgress * 100)}% of current AoA)`);
-                }
-            },
+    }
+    const tag = `[AoA ${task.aoas.join(', ')}]`;
+    // Recorded in job.json so the run directory is removed with the job, also after a restart
+    job.runDirectories.push(task.run_directory);
+    await writeJobManifest(job).catch((error) => console.error(`Could not write job.json for ${job.name}:`, error));
+    job.logs.push(`[SCHEDULER] ${tag} Starting on ${task.ranks} rank(s), cores ${task.cores.join(',')}, in ${task.run_directory}`);
+
+    // Create simulation with callback options
+    let lastLoggedProgress = null;
+    const simulation = new Simulation(job.name, job.modelPath, task.aoas, {
+        // Progress callback - called on time updates
+        onProgress: (overallProgress, currentAoA, currentTime) => {
+            // Log only when the percentage moves, not on every iteration
+            if (job.progress !== lastLoggedProgress) {
+                lastLoggedProgress = job.progress;
+                job.logs.push(`[PROGRESS] ${job.progress}% - AoA: ${currentAoA}° - Time: ${currentTime}`);
+            }
+        },
+        
+        // AoA start callback
+        onAoAStart: (aoa, index, total) => {
+            job.currentAoA = aoa;
+            job.logs.push(`[AoA START] Starting AoA ${aoa}° (${index + 1}/${total} in this task)`);
+        },
+        
+        // AoA completion callback
+        onAoAComplete: (aoa, index, total) => {
+            job.completedAoA++;
+            task.fraction = 0;
+            cacheAoA(job, aoa, worker);
+            updateJobProgress(job);
+            job.logs.push(`[AoA COMPLETE] Completed AoA ${aoa}° (${job.completedAoA}/${job.totalAoA}) - ${job.progress}%`);
+        },
+        
+        // Time update callback for fine-grained progress
+        onTimeUpdate: (time, timeProgress, overallProgress, aoaIndex) => {
+            task.fraction = timeProgress;
+            updateJobProgress(job);
             
-            // Log message callback
-            onLogMessage: (message) => {
-                // Filter out excessive debug messages, keep important ones
-                if (message.includes('Solving for') || 
-                    message.includes('Time =') || 
-                    message.includes('SIMPLE:') ||
-                    message.includes('ExecutionTime')) {
-                    job.logs.push(`[SOLVER] ${message}`);
-                }
+            // Log less frequently to avoid spam (every 100 time units)
+            if (Math.floor(time) % 100 === 0 && time > 0) {
+                job.logs.push(`[TIME UPDATE] ${tag} Simulation time: ${time}/${simulation.simulation_max_time} (${Math.round(timeProgress * 100)}% of current AoA)`);
             }
-        });
+        },
 
-        // Override logging to capture logs with cleaner formatting
-        const originalLog = simulation.log;
-        simulation.log = {
-            info: (msg) => {
-                job.logs.push(`[INFO] ${msg}`);
-                originalLog.info(msg);
-            },
-            error: (msg) => {
-                job.logs.push(`[ERROR] ${msg}`);
-                originalLog.error(msg);
-            },
-            debug: (msg) => {
-                // Only log debug messages that are important
-                if (msg.includes('Command') || msg.includes('Working directory')) {
-                    job.logs.push(`[DEBUG] ${msg}`);
-                }
-                originalLog.debug(msg);
-            },
-            set_log_level: originalLog.set_log_level.bind(originalLog)
-        };
-
-        // Store simulation reference for process tracking
-        runningProcesses.set(job.id, simulation);
+        // Later tasks of the same model get rank counts from the real mesh size
+        onMeshReady: (nCells) => {
+            scheduler.record_cells(job.modelPath, nCells);
+            job.logs.push(`[SCHEDULER] ${tag} Mesh has ${nCells} cells`);
+        },
         
-        // Run the simulation with callbacks
-        await simulation.run(job.processors);
+        // Render through the task's resident worker instead of a fresh interpreter
+        worker: worker,
+        telemetry_worker: pythonWorker,
+
+        // Isolated case directory and the cores this task may use
+        run_directory: task.run_directory,
+        mpirun_args: scheduler.mpirun_args(task),
+
+        // Remesh per AoA, or mesh once and rotate the inflow
+        aoa_mode: job.aoaMode,
+
+        // Initialise each AoA from the nearest finished one
+        warm_start: job.warmStart,
+
+        // Early stopping settings (false runs every AoA to endTime)
+        convergence: job.convergence,
+
+        simulation_max_time: SIMULATION_MAX_TIME,
+
+        // Skip reconstructPar and read results from processor*/ directly
+        reconstruct: job.reconstruct,
+
+        // Solver lines are not kept in job.logs; see GET /api/jobs/:id/telemetry
+    });
+
+    // Override logging to capture logs with cleaner formatting
+    const originalLog = simulation.log;
+    simulation.log = {
+        info: (msg) => {
+            job.logs.push(`[INFO] ${tag} ${msg}`);
+            originalLog.info(msg);
+        },
+        error: (msg) => {
+            job.logs.push(`[ERROR] ${tag} ${msg}`);
+            originalLog.error(msg);
+        },
+        debug: (msg) => {
+            // Only log debug messages that are important
+            if (msg.includes('Command') || msg.includes('Working directory')) {
+                job.logs.push(`[DEBUG] ${tag} ${msg}`);
+            }
+            originalLog.debug(msg);
+        },
+        set_log_level: originalLog.set_log_level.bind(originalLog)
+    };
+
+    // Lets the scheduler terminate the task
+    task.simulation = simulation;
+    await simulation.run(task.ranks);
+
+    await pruneRunDirectory(task.run_directory, job.reconstruct !== false);
+}
+
+// Finished run directories are kept until their job is deleted, so `render_batch.py run/` can
+// re-render them and reuse their renderCache. A reconstructed case drops its processor*/
+// directories, which only duplicate the reconstructed mesh and fields.
+async function pruneRunDirectory(runDirectory, reconstructed) {
+    if (!reconstructed) {
+        return;
+    }
+    const directory = path.join(__dirname, runDirectory);
+    const entries = await fs.readdir(directory).catch(() => []);
+    await Promise.all(entries.filter(name => /^processor\d+$/.test(name))
+        .map(name => fs.rm(path.join(directory, name), { recursive: true, force: true })));
+}
+
+// Remove the run directories the job's tasks solved in, and only those
+async function removeRunDirectories(job) {
+    const runDir = path.join(__dirname, 'run');
+    const directories = (job.runDirectories || []).map(directory => path.join(__dirname, directory))
+        .filter(directory => path.dirname(directory) === runDir);
+    await Promise.all(directories.map(directory => fs.rm(directory, { recursive: true, force: true })));
+}
+
+// Called by the scheduler once every task of a job has finished
+async function finishJob(job, error) {
+    try {
+        if (error) {
+            throw error;
+        }
 
         // Run postprocessing
         job.logs.push('Running postprocessing...');
-        await execAsync(`./venv/bin/python3 -u scripts/postprocess.py output/${job.name}`);
+        await taskWorkers.call('postprocess', { folder_path: `output/${job.name}`, incremental: true },
+            (output) => { output.trim().split('\n').forEach(line => job.logs.push(`[POSTPROCESS] ${line}`)); });
         job.logs.push('Postprocessing completed');
 
         job.status = JobStatus.COMPLETED;
@@ -701,10 +1029,8 @@ async function runJob(job) {
         job.completed = new Date().toISOString();
         job.logs.push(`Job failed: ${error.message}`);
         console.error(`Job ${job.id} failed:`, error);
-    } finally {
-        // Remove from running processes
-        runningProcesses.delete(job.id);
     }
+    await writeJobManifest(job).catch((error) => console.error(`Could not write job.json for ${job.name}:`, error));
 }
 
 async function loadPreviousJobs() {
@@ -738,8 +1064,18 @@ async function loadPreviousJobs() {
                         }
                     }
 
-                    // Try to guess model from the job name or use a default
-                    if (entry.includes('driver')) {
+                    // job.json records how the job was submitted; older outputs predate it
+                    let manifest = null;
+                    try {
+                        manifest = JSON.parse(await fs.readFile(path.join(entryPath, 'job.json'), 'utf8'));
+                    } catch (manifestError) {
+                        manifest = null;
+                    }
+
+                    if (manifest && manifest.modelPath) {
+                        modelPath = manifest.modelPath;
+                    } else if (entry.includes('driver')) {
+                        // Guess the model from the job name or use a default
                         modelPath = 'models/driver.stl';
                     } else if (entry.includes('putter')) {
                         modelPath = 'models/putter.stl';
@@ -754,16 +1090,22 @@ async function loadPreviousJobs() {
                             name: entry,
                             modelPath: modelPath,
                             angleOfAttacks: aoaValues.sort((a, b) => a - b),
-                            processors: 4, // Default assumption
-                            status: JobStatus.COMPLETED,
-                            created: stat.birthtime.toISOString(),
-                            started: stat.birthtime.toISOString(),
-                            completed: stat.mtime.toISOString(),
+                            processors: manifest?.processors ?? 4, // Default assumption
+                            aoaMode: manifest?.aoaMode ?? 'rotate-geometry',
+                            warmStart: manifest?.warmStart ?? false,
+                            convergence: manifest?.convergence ?? {},
+                            useCache: true,
+                            reconstruct: manifest?.reconstruct ?? true,
+                            runDirectories: manifest?.runDirectories ?? [],
+                            status: manifest?.status === JobStatus.FAILED ? JobStatus.FAILED : JobStatus.COMPLETED,
+                            created: manifest?.created ?? stat.birthtime.toISOString(),
+                            started: manifest?.started ?? stat.birthtime.toISOString(),
+                            completed: manifest?.completed ?? stat.mtime.toISOString(),
                             progress: 100,
                             currentAoA: null,
                             totalAoA: aoaValues.length,
-                            logs: [`[SYSTEM] Job loaded from existing output directory`],
-                            error: null
+                            logs: boundedLogs([`[SYSTEM] Job loaded from existing output directory`]),
+                            error: manifest?.error ?? null
                         };
 
                         jobs.set(job.id, job);
@@ -797,26 +1139,14 @@ async function getJobResults(jobName) {
             aoaResults: []
         };
 
-        // Get AoA results
-        const entries = await fs.readdir(outputDir);
-        for (const entry of entries) {
-            const entryPath = path.join(outputDir, entry);
-            const stat = await fs.stat(entryPath);
-            
-            if (stat.isDirectory() && !isNaN(parseFloat(entry))) {
-                const aoa = parseFloat(entry);
-                const resultsPath = path.join(entryPath, 'results.json');
-                const renderPath = path.join(entryPath, 'render.png');
-                
-                if (fsSync.existsSync(resultsPath)) {
-                    const aoaData = JSON.parse(await fs.readFile(resultsPath, 'utf8'));
-                    results.aoaResults.push({
-                        aoa: aoa,
-                        data: aoaData,
-                        hasRender: fsSync.existsSync(renderPath)
-                    });
-                }
-            }
+        // Get AoA results from the job's coefficient store (one read, built on first use)
+        const records = await pythonWorker.call('load_results', { job_dir: outputDir });
+        for (const record of records) {
+            results.aoaResults.push({
+                aoa: record.aoa,
+                data: record.data,
+                hasRender: fsSync.existsSync(path.join(outputDir, record.folder, 'render.png'))
+            });
         }
 
         // Sort by AoA
@@ -835,6 +1165,15 @@ app.listen(PORT, async () => {
     
     // Load previous jobs on startup
     await loadPreviousJobs();
+
+    // Warm up the Python workers so the first render/compare does not pay for imports
+    pythonWorker.start().catch(error => console.error('Python worker failed to start:', error));
+    taskWorkers.start().catch(error => console.error('Python task worker failed to start:', error));
+});
+
+process.on('exit', () => {
+    pythonWorker.stop();
+    taskWorkers.stop();
 });
 
 module.exports = app;
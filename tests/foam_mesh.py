@@ -0,0 +1,133 @@
+"""Write small structured hex polyMeshes in the formats OpenFOAM produces.
+
+`write_box_mesh` returns the arrays it wrote, so readers can be checked
+against them: points, CSR faces, owner, neighbour and the patch list.
+"""
+
+import gzip
+import os
+
+import numpy as np
+
+HEADER = """FoamFile
+{{
+    version     2.0;
+    format      {format};
+    arch        "LSB;label=32;scalar=64";
+    class       {cls};
+    note        "{note}";
+    location    "constant/polyMesh";
+    object      {name};
+}}
+// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //
+
+"""
+
+
+def box_mesh(nx, ny, nz, lo=(-1.0, -1.0, -0.5), hi=(1.0, 1.0, 0.5)):
+    """(points, faces, owner, neighbour, patches) of an nx x ny x nz block, internal faces first."""
+    xs, ys, zs = (np.linspace(a, b, n + 1) for a, b, n in zip(lo, hi, (nx, ny, nz)))
+    points = np.array([(x, y, z) for z in zs for y in ys for x in xs])
+
+    def p(i, j, k):
+        return i + (nx + 1) * (j + (ny + 1) * k)
+
+    def c(i, j, k):
+        return i + nx * (j + ny * k)
+
+    internal = []
+    for k in range(nz):
+        for j in range(ny):
+            for i in range(nx):
+                if i < nx - 1:
+                    internal.append((c(i, j, k), c(i + 1, j, k),
+                                     [p(i + 1, j, k), p(i + 1, j + 1, k), p(i + 1, j + 1, k + 1), p(i + 1, j, k + 1)]))
+                if j < ny - 1:
+                    internal.append((c(i, j, k), c(i, j + 1, k),
+                                     [p(i, j + 1, k), p(i, j + 1, k + 1), p(i + 1, j + 1, k + 1), p(i + 1, j + 1, k)]))
+                if k < nz - 1:
+                    internal.append((c(i, j, k), c(i, j, k + 1),
+                                     [p(i, j, k + 1), p(i + 1, j, k + 1), p(i + 1, j + 1, k + 1), p(i, j + 1, k + 1)]))
+    sides = [
+        ('inlet', [(c(0, j, k), [p(0, j, k), p(0, j, k + 1), p(0, j + 1, k + 1), p(0, j + 1, k)])
+                   for k in range(nz) for j in range(ny)]),
+        ('outlet', [(c(nx - 1, j, k), [p(nx, j, k), p(nx, j + 1, k), p(nx, j + 1, k + 1), p(nx, j, k + 1)])
+                    for k in range(nz) for j in range(ny)]),
+        ('yMin', [(c(i, 0, k), [p(i, 0, k), p(i + 1, 0, k), p(i + 1, 0, k + 1), p(i, 0, k + 1)])
+                  for k in range(nz) for i in range(nx)]),
+        ('yMax', [(c(i, ny - 1, k), [p(i, ny, k), p(i, ny, k + 1), p(i + 1, ny, k + 1), p(i + 1, ny, k)])
+                  for k in range(nz) for i in range(nx)]),
+        ('zMin', [(c(i, j, 0), [p(i, j, 0), p(i, j + 1, 0), p(i + 1, j + 1, 0), p(i + 1, j, 0)])
+                  for j in range(ny) for i in range(nx)]),
+        ('zMax', [(c(i, j, nz - 1), [p(i, j, nz), p(i + 1, j, nz), p(i + 1, j + 1, nz), p(i, j + 1, nz)])
+                  for j in range(ny) for i in range(nx)]),
+    ]
+    faces = [face for _, _, face in internal]
+    owner = [o for o, _, _ in internal]
+    neighbour = [n for _, n, _ in internal]
+    patches = []
+    for name, patch_faces in sides:
+        patches.append({'name': name, 'type': 'patch', 'nFaces': len(patch_faces), 'startFace': len(faces)})
+        for cell, face in patch_faces:
+            faces.append(face)
+            owner.append(cell)
+    return points, faces, np.array(owner), np.array(neighbour), patches
+
+
+def _ascii_list(rows):
+    return f"{len(rows)}\n(\n" + ''.join(f"{row}\n" for row in rows) + ")\n"
+
+
+def _binary_list(array):
+    return f"{len(array)}\n(".encode() + array.tobytes() + b")\n"
+
+
+def write_box_mesh(polymesh_dir, nx=4, ny=3, nz=2, format='ascii', compact=False, compress=False):
+    """Write a box mesh to polymesh_dir and return {'points', 'face_offsets', 'face_labels', ...}.
+
+    `compact` writes faces as a faceCompactList (always the case in binary),
+    `compress` gzips every file as writeCompression does.
+    """
+    points, faces, owner, neighbour, patches = box_mesh(nx, ny, nz)
+    n_cells = nx * ny * nz
+    offsets = np.concatenate([[0], np.cumsum([len(face) for face in faces])])
+    labels = np.concatenate(faces)
+    binary = format == 'binary'
+    note = f"nPoints:{len(points)}  nCells:{n_cells}  nFaces:{len(faces)}  nInternalFaces:{len(neighbour)}"
+
+    def header(cls, name, file_format=format):
+        return HEADER.format(format=file_format, cls=cls, note=note, name=name).encode()
+
+    files = {}
+    if binary:
+        files['points'] = header('vectorField', 'points') + _binary_list(points.astype('<f8'))
+    else:
+        files['points'] = header('vectorField', 'points') + _ascii_list(
+            [f"({x:.17g} {y:.17g} {z:.17g})" for x, y, z in points]).encode()
+    if binary:
+        files['faces'] = (header('faceCompactList', 'faces') + _binary_list(offsets.astype('<i4')) + b"\n"
+                          + _binary_list(labels.astype('<i4')))
+    elif compact:
+        files['faces'] = (header('faceCompactList', 'faces') + _ascii_list(offsets.tolist()).encode() + b"\n"
+                          + _ascii_list(labels.tolist()).encode())
+    else:
+        files['faces'] = header('faceList', 'faces') + _ascii_list(
+            [f"{len(face)}({' '.join(map(str, face))})" for face in faces]).encode()
+    for name, values in (('owner', owner), ('neighbour', neighbour)):
+        body = _binary_list(values.astype('<i4')) if binary else _ascii_list(values.tolist()).encode()
+        files[name] = header('labelList', name) + body
+    files['boundary'] = header('polyBoundaryMesh', 'boundary', 'ascii') + _ascii_list(
+        [f"    {patch['name']}\n    {{\n        type            {patch['type']};\n"
+         f"        nFaces          {patch['nFaces']};\n        startFace       {patch['startFace']};\n    }}"
+         for patch in patches]).encode()
+
+    os.makedirs(polymesh_dir, exist_ok=True)
+    for name, data in files.items():
+        if compress:
+            with gzip.open(os.path.join(polymesh_dir, name + '.gz'), 'wb') as f:
+                f.write(data)
+        else:
+            with open(os.path.join(polymesh_dir, name), 'wb') as f:
+                f.write(data)
+    return {'points': points, 'face_offsets': offsets, 'face_labels': labels, 'owner': owner,
+            'neighbour': neighbour, 'boundary': patches, 'n_cells': n_cells}
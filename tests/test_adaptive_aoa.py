@@ -0,0 +1,28 @@
+import numpy as np
+
+from adaptive_aoa import propose_aoas
+
+TWO_SAMPLES = ([0.0, 5.0], [[0.0, 0.10, 0.0], [0.5, 0.12, 0.01]])
+
+
+def test_two_samples_bisect_the_widest_gap():
+    proposals = propose_aoas(*TWO_SAMPLES, count=3)
+    assert [p['aoa'] for p in proposals] == [2.5, 1.25, 3.75]
+    assert all(p['reason'] == 'too few samples to fit' for p in proposals)
+
+
+def test_two_samples_respect_tolerance_and_range():
+    assert [p['aoa'] for p in propose_aoas(*TWO_SAMPLES, tolerance=0.3)] == [2.5]
+    proposals = propose_aoas(*TWO_SAMPLES, count=2, aoa_range=(-5, 10))
+    assert {p['reason'] for p in proposals} == {'unsampled range'}
+
+
+def test_curved_sweep_is_scored_by_the_fit():
+    aoa = np.arange(0, 25, 5.0)
+    values = np.column_stack([np.sin(aoa / 10), 0.1 + aoa ** 2 / 1000, aoa / 100])
+    proposals = propose_aoas(aoa, values)
+    assert len(proposals) == 3
+    assert all(p['reason'].startswith(('curvature', 'interpolant disagreement')) for p in proposals)
+    # A straight sweep is resolved
+    line = np.column_stack([aoa / 10, 0.1 + aoa / 100, aoa / 100])
+    assert propose_aoas(aoa, line, tolerance=1e-9) == []
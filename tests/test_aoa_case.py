@@ -0,0 +1,93 @@
+import math
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import foam_dict
+from aoa_case import force_directions, freestream, inlet_speed, patch_body, set_patch, write_aoa_case
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'base-case')
+
+U_TEXT = """boundaryField
+{
+    inlet
+    {
+        type            fixedValue;
+        value           uniform (26.9 0 0);
+    }
+    outlet
+    {
+        type            zeroGradient;
+    }
+    discWall
+    {
+        type            fixedValue;
+        value           uniform (0 0 0);
+    }
+}
+"""
+
+
+@pytest.mark.parametrize('aoa, lift, drag', [
+    (0, (0, 1, 0), (1, 0, 0)),
+    (90, (-1, 0, 0), (0, 1, 0)),
+    (-90, (1, 0, 0), (0, -1, 0)),
+])
+def test_force_directions(aoa, lift, drag):
+    lift_dir, drag_dir = force_directions(aoa)
+    np.testing.assert_allclose(lift_dir, lift, atol=1e-12)
+    np.testing.assert_allclose(drag_dir, drag, atol=1e-12)
+
+
+@pytest.mark.parametrize('aoa', [-12.5, 0, 7, 30])
+def test_drag_follows_freestream_and_lift_is_normal(aoa):
+    lift_dir, drag_dir = force_directions(aoa)
+    u = np.array(freestream(aoa, 26.9))
+
+    np.testing.assert_allclose(u / np.linalg.norm(u), drag_dir, atol=1e-12)
+    assert np.dot(lift_dir, drag_dir) == pytest.approx(0, abs=1e-12)
+    assert np.linalg.norm(lift_dir) == pytest.approx(1)
+    # Lift points to +y rotated with the flow, i.e. z = drag x lift
+    np.testing.assert_allclose(np.cross(drag_dir, lift_dir), (0, 0, 1), atol=1e-12)
+
+
+def test_set_patch_replaces_only_that_patch():
+    text = set_patch(U_TEXT, 'outlet', {'type': 'inletOutlet', 'inletValue': 'uniform (0 0 0)'})
+
+    body = patch_body(text, 'outlet')
+    assert 'inletOutlet' in body and 'zeroGradient' not in body
+    assert 'inletValue      uniform (0 0 0);' in body
+    assert patch_body(text, 'inlet') == patch_body(U_TEXT, 'inlet')
+    assert patch_body(text, 'discWall') == patch_body(U_TEXT, 'discWall')
+
+
+def test_set_patch_missing_patch():
+    with pytest.raises(ValueError, match="yMin"):
+        set_patch(U_TEXT, 'yMin', {'type': 'slip'})
+
+
+def test_inlet_speed():
+    assert inlet_speed(U_TEXT) == pytest.approx(26.9)
+
+
+def test_write_aoa_case(tmp_path):
+    case = str(tmp_path / 'case')
+    shutil.copytree(TEMPLATE_DIR, case)
+    os.makedirs(os.path.join(case, '400'))
+    os.makedirs(os.path.join(case, 'processor0'))
+
+    result = write_aoa_case(case, 10, template_dir=TEMPLATE_DIR)
+
+    assert result['removed'] == ['400', 'processor0']
+    a = math.radians(10)
+    np.testing.assert_allclose(result['U'], (26.9 * math.cos(a), 26.9 * math.sin(a), 0))
+    force_coeffs = foam_dict.load(os.path.join(case, 'system', 'controlDict'))['functions']['forceCoeffs']
+    np.testing.assert_allclose(force_coeffs['liftDir'], result['liftDir'], atol=1e-8)
+    np.testing.assert_allclose(force_coeffs['dragDir'], result['dragDir'], atol=1e-8)
+    assert force_coeffs['magUInf'] == pytest.approx(26.9)
+    with open(os.path.join(case, '0', 'U'), 'r') as f:
+        u_text = f.read()
+    assert 'freestreamVelocity' in patch_body(u_text, 'yMin')
+    assert 'fixedValue' in patch_body(u_text, 'discWall')
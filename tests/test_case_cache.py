@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import case_cache
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'base-case')
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = str(tmp_path / 'template')
+    shutil.copytree(TEMPLATE_DIR, path)
+    return path
+
+
+@pytest.fixture
+def model(tmp_path):
+    path = tmp_path / 'driver.stl'
+    path.write_text('solid disc\nendsolid disc\n')
+    return str(path)
+
+
+def test_key_is_stable(tmp_path, template, model):
+    digest = case_cache.case_digest(model, template)
+    assert case_cache.case_digest(model, template) == digest
+
+    # The STL's name and location play no part, only its bytes
+    copy = str(tmp_path / 'renamed.stl')
+    shutil.copy(model, copy)
+    assert case_cache.case_digest(copy, template) == digest
+
+    # 5, 5.0 and "5" are one AoA
+    assert case_cache.aoa_key(digest, 5) == case_cache.aoa_key(digest, 5.0) == case_cache.aoa_key(digest, "5")
+    assert case_cache.aoa_key(digest, 5) != case_cache.aoa_key(digest, -5)
+
+    # Settings are canonicalised before hashing
+    settings = case_cache.case_settings('rotate-geometry', 1200, {'window': 100, 'residual_tolerance': 1e-4})
+    reordered = case_cache.case_settings('rotate-geometry', 1200.0, {'residual_tolerance': 1e-4, 'window': 100})
+    assert case_cache.case_digest(model, template, settings) == case_cache.case_digest(model, template, reordered)
+    assert case_cache.case_digest(model, template, case_cache.case_settings()) == digest
+
+
+def test_key_follows_inputs(template, model):
+    digest = case_cache.case_digest(model, template)
+
+    with open(model, 'a') as f:
+        f.write('\n')
+    assert case_cache.case_digest(model, template) != digest
+    changed_model = case_cache.case_digest(model, template)
+
+    with open(os.path.join(template, 'system', 'fvSchemes'), 'a') as f:
+        f.write('// edited\n')
+    assert case_cache.case_digest(model, template) != changed_model
+
+    settings = case_cache.case_settings(aoa_mode='rotate-inflow')
+    assert case_cache.case_digest(model, template, settings) != case_cache.case_digest(model, template)
+
+
+def test_rank_count_is_not_part_of_the_key(template, model):
+    digest = case_cache.case_digest(model, template)
+    with open(os.path.join(template, 'system', 'decomposeParDict'), 'a') as f:
+        f.write('// numberOfSubdomains 8\n')
+    assert case_cache.case_digest(model, template) == digest
+
+
+def test_missing_and_empty_files_differ(template, model):
+    path = os.path.join(template, 'constant', 'turbulenceProperties')
+    os.remove(path)
+    missing = case_cache.case_digest(model, template)
+    open(path, 'w').close()
+    assert case_cache.case_digest(model, template) != missing
+
+
+def test_store_lookup_restore(tmp_path, template, model):
+    cache_dir = str(tmp_path / 'cache')
+    aoa_dir = tmp_path / 'output' / 'job' / '5'
+    aoa_dir.mkdir(parents=True)
+    (aoa_dir / 'results.json').write_text(json.dumps({'Cl': 0.4}))
+
+    before = case_cache.lookup(model, [0, 5], template, cache_dir=cache_dir)
+    assert [entry['cached'] for entry in before['entries']] == [False, False]
+
+    key = before['entries'][1]['key']
+    entry = case_cache.store(key, str(aoa_dir), {'aoa': 5, 'model_sha256': before['model_sha256']}, cache_dir)
+    assert entry['key'] == key and entry['files'] == ['results.json']
+
+    after = case_cache.lookup(model, [0, 5], template, cache_dir=cache_dir)
+    assert [entry['cached'] for entry in after['entries']] == [False, True]
+    assert after['entries'][1]['key'] == key
+
+    restored = str(tmp_path / 'output' / 'other' / '5')
+    assert case_cache.restore(key, restored, cache_dir) == {'Cl': 0.4}
+    assert not os.path.exists(os.path.join(restored, case_cache.ENTRY_NAME))
+    assert [e['key'] for e in case_cache.entries(cache_dir, model)] == [key]
+
+
+def test_store_requires_results(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        case_cache.store('0' * 64, str(tmp_path), cache_dir=str(tmp_path / 'cache'))
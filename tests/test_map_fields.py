@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pytest
+
+from foam_mesh import write_box_mesh
+from map_fields import SNAPSHOT_NAME, case_centres, map_fields, map_values, nearest_snapshot
+
+P_FIELD = """FoamFile
+{
+    version     2.0;
+    format      ascii;
+    class       volScalarField;
+    object      p;
+}
+
+dimensions      [0 2 -2 0 0 0 0];
+
+internalField   uniform 0;
+
+boundaryField
+{
+    inlet
+    {
+        type            zeroGradient;
+    }
+}
+"""
+
+
+def test_same_centres_are_copied():
+    centres = np.random.default_rng(0).random((50, 3))
+    values = {'p': np.arange(50.0), 'U': np.ones((50, 3))}
+
+    mapped, method = map_values(centres.astype(np.float32), centres, values)
+    assert method == 'copy'
+    assert mapped is values
+
+
+def test_other_centres_are_interpolated():
+    source = np.array([[0.0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]])
+    target = np.array([[0.0, 0, 0], [0.5, 0, 0], [0.5, 0.5, 0]])
+    values = {'p': np.array([1.0, 3, 5, 7]), 'U': np.column_stack([np.arange(4.0)] * 3)}
+
+    mapped, method = map_values(source, target, values)
+    assert method == 'interpolate'
+    # Inverse squared distance weights: a coincident cell dominates, equidistant ones are averaged
+    weights = np.array([4, 4, 0.8, 0.8]) / 9.6
+    np.testing.assert_allclose(mapped['p'], [1, weights @ values['p'], 4], atol=1e-9)
+    assert mapped['U'].shape == (3, 3)
+    np.testing.assert_allclose(mapped['U'][:, 0], [0, weights @ np.arange(4.0), 1.5], atol=1e-9)
+
+
+def test_single_neighbour_is_nearest():
+    source = np.array([[0.0, 0, 0], [10, 0, 0]])
+    mapped, _ = map_values(source, np.array([[2.0, 0, 0], [9, 0, 0]]), {'p': np.array([1.0, 2])}, neighbours=1)
+    np.testing.assert_array_equal(mapped['p'], [1, 2])
+
+
+def test_nearest_snapshot(tmp_path):
+    assert nearest_snapshot(str(tmp_path / 'missing'), 5) == (None, None)
+    for folder in ('0', '10', 'renders'):
+        os.makedirs(tmp_path / folder)
+        (tmp_path / folder / SNAPSHOT_NAME).write_bytes(b'')
+    os.makedirs(tmp_path / '6')  # no snapshot
+
+    path, aoa = nearest_snapshot(str(tmp_path), 7)
+    assert aoa == 10 and path == os.path.join(str(tmp_path), '10', SNAPSHOT_NAME)
+
+
+@pytest.mark.parametrize('nx, method', [(4, 'copy'), (6, 'interpolate')])
+def test_map_fields_writes_internal_field(tmp_path, nx, method):
+    source = str(tmp_path / 'source')
+    write_box_mesh(os.path.join(source, 'constant', 'polyMesh'))
+    centres = case_centres(source)
+    snapshot = str(tmp_path / SNAPSHOT_NAME)
+    np.savez(snapshot, centres=centres.astype(np.float32), p=centres[:, 0].astype(np.float32))
+
+    target = str(tmp_path / 'target')
+    write_box_mesh(os.path.join(target, 'constant', 'polyMesh'), nx=nx)
+    os.makedirs(os.path.join(target, '0'))
+    with open(os.path.join(target, '0', 'p'), 'w') as f:
+        f.write(P_FIELD)
+
+    result = map_fields(snapshot, target)
+    assert result['method'] == method and result['fields'] == ['p']
+    with open(os.path.join(target, '0', 'p'), 'r') as f:
+        text = f.read()
+    assert f"internalField   nonuniform List<scalar> \n{nx * 3 * 2}\n(" in text
+    assert 'zeroGradient' in text
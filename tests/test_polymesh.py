@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from foam_mesh import write_box_mesh
+from polymesh import next_vertex_index, read_boundary, read_mesh_counts, read_polymesh
+
+FORMATS = {
+    'ascii': {},
+    'ascii-compact': {'compact': True},
+    'binary': {'format': 'binary'},
+    'ascii-gzip': {'compress': True},
+    'binary-gzip': {'format': 'binary', 'compress': True},
+}
+
+
+@pytest.mark.parametrize('options', FORMATS.values(), ids=FORMATS.keys())
+def test_read_polymesh_matches_written_mesh(tmp_path, options):
+    expected = write_box_mesh(str(tmp_path), **options)
+    mesh = read_polymesh(str(tmp_path))
+
+    np.testing.assert_array_equal(mesh.points, expected['points'])
+    np.testing.assert_array_equal(mesh.face_offsets, expected['face_offsets'])
+    np.testing.assert_array_equal(mesh.face_labels, expected['face_labels'])
+    np.testing.assert_array_equal(mesh.owner, expected['owner'])
+    np.testing.assert_array_equal(mesh.neighbour, expected['neighbour'])
+    assert mesh.n_cells == expected['n_cells']
+    assert mesh.boundary == expected['boundary']
+
+
+def test_formats_read_identically(tmp_path):
+    meshes = []
+    for name, options in FORMATS.items():
+        write_box_mesh(str(tmp_path / name), 5, 4, 3, **options)
+        meshes.append(read_polymesh(str(tmp_path / name)))
+    for mesh in meshes[1:]:
+        for attr in ('points', 'face_offsets', 'face_labels', 'owner', 'neighbour'):
+            np.testing.assert_array_equal(getattr(mesh, attr), getattr(meshes[0], attr))
+
+
+def test_mesh_counts_and_sizes(tmp_path):
+    write_box_mesh(str(tmp_path), 4, 3, 2, format='binary')
+    counts = read_mesh_counts(str(tmp_path))
+    mesh = read_polymesh(str(tmp_path))
+
+    assert counts == {'nPoints': 60, 'nCells': 24, 'nFaces': 98, 'nInternalFaces': 46}
+    assert (mesh.n_points, mesh.n_faces, mesh.n_internal_faces) == (60, 98, 46)
+    assert (mesh.face_sizes() == 4).all()
+    assert [patch['name'] for patch in read_boundary(str(tmp_path))] == \
+        ['inlet', 'outlet', 'yMin', 'yMax', 'zMin', 'zMax']
+
+
+def test_next_vertex_index_wraps_each_face():
+    offsets = np.array([0, 3, 7])
+    np.testing.assert_array_equal(next_vertex_index(offsets), [1, 2, 0, 4, 5, 6, 3])
+
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_polymesh(str(tmp_path))
@@ -0,0 +1,63 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import results_store
+from postprocess import scan_results
+
+
+def write_results(job_dir, aoa, cl):
+    folder = job_dir / f"{aoa:g}"
+    folder.mkdir(exist_ok=True)
+    (folder / 'results.json').write_text(json.dumps({'Cl': cl, 'CdPressure': 0.1, 'CdViscous': 0.01, 'CmPitch': 0.0}))
+
+
+def scan(job_dir, manifest):
+    data, inputs, n_read = scan_results(str(job_dir), manifest)
+    return data, {'inputs': inputs}, n_read
+
+
+@pytest.fixture
+def job_dir(tmp_path):
+    for aoa in (0, 5, 10):
+        write_results(tmp_path, aoa, aoa / 10)
+    return tmp_path
+
+
+def test_first_scan_builds_the_store(job_dir):
+    data, _, n_read = scan(job_dir, None)
+    assert n_read == 3
+    assert [row['aoa'] for row in data] == [0, 5, 10]
+    assert os.path.exists(results_store.store_path(str(job_dir)))
+
+
+def test_unchanged_job_reads_only_the_store(job_dir):
+    _, manifest, _ = scan(job_dir, None)
+    data, _, n_read = scan(job_dir, manifest)
+    assert n_read == 1
+    assert [row['cl'] for row in data] == [0, 0.5, 1]
+
+
+def test_changed_added_and_removed_folders_are_upserted(job_dir):
+    _, manifest, _ = scan(job_dir, None)
+    write_results(job_dir, 5, 0.75)
+    write_results(job_dir, 15, 1.2)
+    os.remove(job_dir / '0' / 'results.json')
+
+    data, manifest, n_read = scan(job_dir, manifest)
+    assert n_read == 3  # the store, 5 and 15
+    assert [(row['aoa'], row['cl']) for row in data] == [(5, 0.75), (10, 1), (15, 1.2)]
+    assert sorted(manifest['inputs']['results']) == ['10', '15', '5']
+    # The upserted store matches a rebuild from every results.json
+    rebuilt = results_store.build_results(str(job_dir), save=False)
+    stored = results_store.load_results(str(job_dir))
+    np.testing.assert_array_equal(stored['aoa'], rebuilt['aoa'])
+    np.testing.assert_array_equal(stored['Cl'], rebuilt['Cl'])
+
+
+def test_rebuild_reads_every_file(job_dir):
+    _, manifest, _ = scan(job_dir, None)
+    _, _, n_read = scan_results(str(job_dir), manifest, rebuild=True)
+    assert n_read == 3
@@ -0,0 +1,51 @@
+import json
+import os
+
+from foam_mesh import write_box_mesh
+from render_batch import find_cases, plan_frames
+
+
+def make_case(path, times):
+    write_box_mesh(os.path.join(path, 'constant', 'polyMesh'))
+    for t in times:
+        os.makedirs(os.path.join(path, t))
+
+
+def write_record(folder, aoa, case, time):
+    os.makedirs(folder)
+    with open(os.path.join(folder, 'case.json'), 'w') as f:
+        json.dump({'aoa': aoa, 'case': os.path.relpath(case, folder), 'time': time}, f)
+
+
+def test_aoa_folders_resolve_to_their_recorded_case(tmp_path):
+    run = str(tmp_path / 'run' / 'job-1-0')
+    make_case(run, ['100', '200', '300'])
+    kept = os.path.join(run, 'aoa', '5')
+    make_case(kept, ['250'])
+    job = tmp_path / 'output' / 'job'
+    write_record(str(job / '5'), 5, kept, '250')
+    write_record(str(job / '10'), 10, run, '200')
+    write_record(str(job / '15'), 15, str(tmp_path / 'run' / 'deleted'), '300')
+
+    sources = find_cases([str(job)])
+    assert [(os.path.basename(s['folder']), s['case'], s['time']) for s in sources] == \
+        [('10', run, '200'), ('5', kept, '250')]
+
+    tasks = plan_frames(sources, ['latest'], None, 'render.png', {})
+    assert [(task['time'], task['render']['notes'], task['render']['output_file']) for task in tasks] == [
+        ('200', 'AoA: 10 degrees', str(job / '10' / 'render.png')),
+        ('250', 'AoA: 5 degrees', str(job / '5' / 'render.png')),
+    ]
+
+
+def test_plain_cases_render_their_last_time(tmp_path):
+    case = str(tmp_path / 'run' / '7.5')
+    make_case(case, ['100', '400'])
+
+    sources = find_cases([str(tmp_path / 'run')])
+    assert sources == [{'folder': case, 'case': case, 'time': None, 'notes': 'AoA: 7.5 degrees'}]
+    tasks = plan_frames(sources, ['latest', '100'], str(tmp_path / 'renders'), 'render.png', {})
+    assert [task['render']['output_file'] for task in tasks] == [
+        str(tmp_path / 'renders' / '7.5' / 'render_400.png'),
+        str(tmp_path / 'renders' / '7.5' / 'render_100.png'),
+    ]
@@ -0,0 +1,59 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from foam_mesh import write_box_mesh
+from render_cache import RenderCache
+
+
+def _write_entries(cache_dir, worker, rounds):
+    cache = RenderCache(cache_dir)
+    for i in range(rounds):
+        cache.save('case', 'geometry', cells=np.arange(1000) + worker, z=np.array(float(i)))
+        # Every worker also rewrites the shared index
+        path = os.path.join(cache_dir, f"input{worker}_{i}")
+        with open(path, 'w') as f:
+            f.write(str(i))
+        cache.file_digest(path)
+    return worker
+
+
+def test_save_load_round_trip(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    assert cache.load('key', 'geometry') is None
+    cache.save('key', 'geometry', cells=np.arange(5), centres_xy=np.ones((5, 2)))
+
+    assert cache.has('key', 'geometry')
+    entry = cache.load('key', 'geometry')
+    np.testing.assert_array_equal(entry['cells'], np.arange(5))
+    np.testing.assert_array_equal(entry['centres_xy'], np.ones((5, 2)))
+
+
+def test_concurrent_writers(tmp_path):
+    cache_dir = str(tmp_path)
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        done = list(pool.map(_write_entries, [cache_dir] * 4, range(4), [25] * 4))
+    assert done == [0, 1, 2, 3]
+
+    entry = RenderCache(cache_dir).load('case', 'geometry')
+    assert entry is not None and len(entry['cells']) == 1000
+    # Every temp file was renamed into place
+    leftovers = [name for _, _, names in os.walk(cache_dir) for name in names if '.tmp' in name]
+    assert leftovers == []
+    assert RenderCache(cache_dir)._load_index()
+
+
+def test_case_key_follows_mesh_and_params(tmp_path):
+    case = tmp_path / 'case'
+    write_box_mesh(str(case / 'constant' / 'polyMesh'))
+    (case / 'constant' / 'triSurface').mkdir()
+    (case / 'constant' / 'triSurface' / 'model.stl').write_text('solid disc\nendsolid disc\n')
+    cache = RenderCache(str(tmp_path / 'cache'))
+
+    key = cache.case_key(str(case), 1920, 1080)
+    assert RenderCache(str(tmp_path / 'cache')).case_key(str(case), 1920, 1080) == key
+    assert cache.case_key(str(case), 1280, 720) != key
+
+    write_box_mesh(str(case / 'constant' / 'polyMesh'), nx=5)
+    assert cache.case_key(str(case), 1920, 1080) != key
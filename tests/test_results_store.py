@@ -0,0 +1,33 @@
+import multiprocessing
+
+import numpy as np
+
+import results_store
+
+
+def add(job_dir, aoa):
+    results_store.add_results(job_dir, f"{aoa:g}", {'Cl': aoa / 10, 'CdPressure': 0.1})
+
+
+def test_concurrent_adds_keep_every_row(tmp_path):
+    job_dir = str(tmp_path)
+    processes = [multiprocessing.Process(target=add, args=(job_dir, aoa)) for aoa in range(0, 40, 5)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    table = results_store.load_results(job_dir)
+    np.testing.assert_array_equal(table['aoa'], np.arange(0, 40, 5))
+    np.testing.assert_allclose(table['Cl'], np.arange(0, 40, 5) / 10)
+    assert np.isnan(table['CdViscous']).all()
+
+
+def test_update_replaces_and_removes_rows(tmp_path):
+    job_dir = str(tmp_path)
+    results_store.update_results(job_dir, {'0': {'Cl': 0.0}, '5': {'Cl': 0.5}, '10': {'Cl': 1.0}})
+    table = results_store.update_results(job_dir, {'5': {'Cl': 0.6}, '2.5': {'Cl': 0.25}}, removed=['10'])
+    assert table['folder'].tolist() == ['0', '2.5', '5']
+    np.testing.assert_allclose(table['Cl'], [0.0, 0.25, 0.6])
+    table = results_store.add_results(job_dir, 'rotated', {'Cl': 0.3}, aoa=3)
+    assert table['folder'].tolist() == ['0', '2.5', 'rotated', '5']
@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+import pytest
+
+import solver_log
+from solver_log import SolverLog, telemetry
+
+HEADER = "Create time\n\nStarting time loop\n\n"
+
+
+def iteration(i):
+    return (f"Time = {i}\n\n"
+            f"smoothSolver:  Solving for Ux, Initial residual = {1.0 / i:.6e}, Final residual = 1e-6, No Iterations 2\n"
+            f"GAMG:  Solving for p, Initial residual = {0.5 / i:.6e}, Final residual = 1e-7, No Iterations 10\n"
+            f"GAMG:  Solving for p, Initial residual = {0.1 / i:.6e}, Final residual = 1e-7, No Iterations 10\n"
+            f"time step continuity errors : sum local = {1e-3 / i:.6e}, global = {1e-5 / i:.6e}, "
+            f"cumulative = 1.000000e-04\n"
+            f"ExecutionTime = {0.2 * i:.2f} s  ClockTime = {i} s\n\n")
+
+
+def write_log(path, first, last, mode='w'):
+    with open(path, mode) as f:
+        if mode == 'w':
+            f.write(HEADER)
+        f.write(''.join(iteration(i) for i in range(first, last + 1)))
+
+
+def test_parses_one_row_per_iteration(tmp_path):
+    log_file = str(tmp_path / 'log.simpleFoam')
+    write_log(log_file, 1, 10)
+    log = SolverLog(log_file)
+    log.tail()
+
+    history = log.history()
+    np.testing.assert_array_equal(history['time'], np.arange(1, 11))
+    np.testing.assert_allclose(history['residual_Ux'], 1.0 / np.arange(1, 11), rtol=1e-6)
+    # p is solved twice per iteration: the larger initial residual is kept
+    np.testing.assert_allclose(history['residual_p'], 0.5 / np.arange(1, 11), rtol=1e-6)
+    np.testing.assert_allclose(history['execution_time'], 0.2 * np.arange(1, 11))
+    np.testing.assert_allclose(history['continuity_local'], 1e-3 / np.arange(1, 11), rtol=1e-6)
+
+    summary = log.summary()
+    assert summary['iterations'] == 10 and summary['time'] == 10
+    assert summary['residuals']['Ux'] == pytest.approx(0.1)
+    assert summary['seconds_per_iteration'] == pytest.approx(0.2)
+    assert summary['continuity']['continuity_cumulative'] == pytest.approx(1e-4)
+
+
+def test_partial_lines_wait_for_the_rest(tmp_path):
+    log = SolverLog(str(tmp_path / 'log.simpleFoam'))
+    text = (HEADER + iteration(1) + iteration(2)).encode()
+    split = text.index(b'Ux, Initial residual = 5.0') + 10
+    log.feed(text[:split])
+    assert np.isnan(log.history()['residual_Ux'][-1])
+    log.feed(text[split:])
+    np.testing.assert_allclose(log.history()['residual_Ux'], [1.0, 0.5])
+
+
+def test_tail_reads_only_appended_output(tmp_path):
+    log_file = str(tmp_path / 'log.simpleFoam')
+    write_log(log_file, 1, 5)
+    log = SolverLog(log_file)
+    first = log.tail()
+    write_log(log_file, 6, 8, mode='a')
+
+    assert 0 < log.tail() < first
+    assert log.tail() == 0
+    np.testing.assert_array_equal(log.history()['time'], np.arange(1, 9))
+
+
+def test_ring_overflow_is_flushed_to_history(tmp_path):
+    log_file = str(tmp_path / 'log.simpleFoam')
+    write_log(log_file, 1, 50)
+    log = SolverLog(log_file, capacity=16)
+    log.tail()
+
+    assert log.flushed > 0
+    assert os.listdir(log.history_dir)
+    history = log.history()
+    np.testing.assert_array_equal(history['time'], np.arange(1, 51))
+    np.testing.assert_allclose(history['residual_Ux'], 1.0 / np.arange(1, 51), rtol=1e-6)
+    series = log.series(['residual_Ux'], points=10)
+    assert len(series['time']) == 10 and series['time'][-1] == 50
+
+
+def test_replaced_log_starts_over(tmp_path):
+    log_file = str(tmp_path / 'log.simpleFoam')
+    write_log(log_file, 1, 20)
+    log = SolverLog(log_file, capacity=8)
+    log.tail()
+    os.remove(log_file)
+    write_log(log_file, 1, 3)
+    log.tail()
+
+    np.testing.assert_array_equal(log.history()['time'], [1, 2, 3])
+
+
+def test_telemetry_keeps_open_logs_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(solver_log, '_LOGS', {})
+    paths = []
+    for i in range(solver_log.MAX_OPEN_LOGS + 3):
+        paths.append(str(tmp_path / f"log{i}"))
+        write_log(paths[-1], 1, 4)
+        result = telemetry(paths[-1], points=2)
+    assert result['summary']['iterations'] == 4
+    assert result['series']['time'] == [1.0, 4.0]
+    assert list(solver_log._LOGS) == [os.path.abspath(path) for path in paths[-solver_log.MAX_OPEN_LOGS:]]
+
+    telemetry(paths[-1], points=0, close=True)
+    assert os.path.abspath(paths[-1]) not in solver_log._LOGS
@@ -133,6 +133,10 @@
           name: formData.get("name"),
           modelPath: formData.get("modelPath"),
           processors: parseInt(formData.get("processors")),
+          aoaMode: formData.get("aoaMode") || "rotate-geometry",
+          warmStart: formData.get("warmStart") === "on",
+          useCache: formData.get("useCache") === "on",
+          reconstruct: formData.get("skipReconstruct") !== "on",
           angleOfAttacks
         };
         const response = await fetch("/api/jobs", {